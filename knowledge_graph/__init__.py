@@ -1,5 +1,28 @@
-from .cassandra_graph_store import CassandraGraphStore
-from .runnables import extract_entities
+from typing import TYPE_CHECKING, Any
+
 from .traverse import Node, Relation
 
+if TYPE_CHECKING:
+    from .cassandra_graph_store import CassandraGraphStore
+    from .runnables import extract_entities
+
 __all__ = ["CassandraGraphStore", "extract_entities", "Node", "Relation"]
+
+# Submodules defining these are imported on first access, since they depend on
+# LangChain and the Cassandra driver.
+_LAZY_ATTRIBUTES = {
+    "CassandraGraphStore": ".cassandra_graph_store",
+    "extract_entities": ".runnables",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import importlib
+
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
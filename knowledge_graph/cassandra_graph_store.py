@@ -1,14 +1,19 @@
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Union
 
 from cassandra.cluster import Session
 from langchain_community.graphs.graph_document import GraphDocument
 from langchain_community.graphs.graph_document import Node as LangChainNode
 from langchain_community.graphs.graph_store import GraphStore
 from langchain_core.embeddings import Embeddings
-from langchain_core.runnables import Runnable, RunnableLambda
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
 
 from knowledge_graph.knowledge_graph import CassandraKnowledgeGraph
 
+from .entity_resolution import EntityResolver
 from .traverse import Node, Relation
 
 
@@ -47,24 +52,184 @@ class CassandraGraphStore(GraphStore):
         )
 
     def add_graph_documents(
-        self, graph_documents: List[GraphDocument], include_source: bool = False
+        self,
+        graph_documents: List[GraphDocument],
+        include_source: bool = False,
+        entity_resolver: Optional[EntityResolver] = None,
     ) -> None:
-        # TODO: Include source.
-        self.graph.insert(_elements(graph_documents))
+        """
+        Add the nodes and relationships of `graph_documents` to the graph.
+
+        Parameters:
+        - graph_documents: The graph documents to add.
+        - include_source: If set, the source document of each graph document is
+          stored (once per distinct content) and recorded as mentioning each of its
+          nodes and relations. See `CassandraKnowledgeGraph.supporting_sources`.
+          Nodes and relations mentioned by several documents are written once.
+        - entity_resolver: If set, near-duplicate nodes across the documents are
+          merged into canonical nodes before inserting, and the merged names are
+          recorded as aliases of the canonical nodes.
+        """
+        elements: Iterable[Union[Node, Relation]] = _elements(graph_documents)
+        aliases: Dict[Node, Node] = {}
+        if entity_resolver is not None:
+            # Resolve across all documents, so each node is written once (with its
+            # merged properties) and mentions are recorded against canonical nodes.
+            resolution = entity_resolver.resolve(elements)
+            elements = resolution.elements
+            aliases = resolution.aliases
+            self.graph.insert_aliases(aliases)
+        # Nodes and relations shared by several documents are only written once.
+        self.graph.insert(dict.fromkeys(elements))
+        if not include_source:
+            return
+
+        def _canonical(element: Union[Node, Relation]) -> Union[Node, Relation]:
+            if isinstance(element, Node):
+                return aliases.get(element, element)
+            return Relation(
+                source=aliases.get(element.source, element.source),
+                target=aliases.get(element.target, element.target),
+                type=element.type,
+            )
+
+        for document in graph_documents:
+            source_id = self.graph.insert_source(document.source)
+            self.graph.insert_mentions(map(_canonical, _elements([document])), source_id)
 
-    # TODO: should this include the types of each node?
     def query(self, query: str, params: dict = {}) -> List[Dict[str, Any]]:
-        raise ValueError("Querying Cassandra should use `as_runnable`.")
+        """
+        Return the paths matching a path pattern.
 
-    def as_runnable(self, steps: int = 3, edge_filters: Sequence[str] = []) -> Runnable:
+        See `CassandraKnowledgeGraph.query_paths`, and `parse_path_pattern` for the
+        syntax of patterns, such as `(Person)-[WORKS_AT]->(Org)-[LOCATED_IN]->(?)`.
+
+        Parameters:
+        - query: The path pattern.
+        - params: The values of the query parameters (such as `$name`) in the pattern.
+        """
+        return self.graph.query_paths(query, params)
+
+    def as_runnable(
+        self,
+        steps: int = 3,
+        edge_filters: Sequence[str] = [],
+        timeout: Optional[float] = None,
+    ) -> Runnable:
         """
         Return a runnable that retrieves the sub-graph near the input entity or entities.
 
         Parameters:
         - steps: The maximum distance to follow from the starting points.
         - edge_filters: Predicates to use for filtering the edges.
+        - timeout: If set, the maximum number of seconds to traverse for, after which
+          the relations found so far are returned.
         """
         return RunnableLambda(func=self.graph.traverse, afunc=self.graph.atraverse).bind(
             steps=steps,
             edge_filters=edge_filters,
+            timeout=timeout,
         )
+
+    def as_retrieval_runnable(
+        self,
+        entity_extractor: Runnable[Dict[str, Any], List[Node]],
+        steps: int = 3,
+        edge_filters: Sequence[str] = [],
+        timeout: Optional[float] = None,
+        k: int = 1,
+        min_similarity: Optional[float] = None,
+    ) -> Runnable[Dict[str, Any], Set[Relation]]:
+        """
+        Return a runnable that retrieves the sub-graph relevant to a question.
+
+        This expects a dictionary containing the `"question"`. Entities are extracted
+        from the question with `entity_extractor`, linked to nodes in the graph with
+        `link_nodes`, and the graph is traversed from the linked nodes as with
+        `as_runnable`. Each entity is linked concurrently, and the traversal from it
+        starts as soon as it is linked.
+
+        If `timeout` is reached, the relations found so far are returned. When invoked
+        asynchronously, extraction and linking which are still running are cancelled.
+        When invoked synchronously, extraction and linking which are still running are
+        abandoned (their results are ignored), so the call still returns on time.
+
+        Parameters:
+        - entity_extractor: The runnable extracting entities from the question, such
+          as `extract_entities` or `link_entities`.
+        - steps: The maximum distance to follow from the linked nodes.
+        - edge_filters: Predicates to use for filtering the edges.
+        - timeout: If set, the maximum number of seconds to retrieve for.
+        - k: The number of similar nodes to link to each entity which doesn't match a
+          node name.
+        - min_similarity: The minimum similarity of nodes linked by similarity.
+        """
+        traverse = self.as_runnable(steps=steps, edge_filters=edge_filters)
+
+        def _remaining(deadline: Optional[float], now: Callable[[], float]) -> Optional[float]:
+            return None if deadline is None else max(0.0, deadline - now())
+
+        def _retrieve(input: Dict[str, Any], config: RunnableConfig) -> Set[Relation]:
+            deadline = time.monotonic() + timeout if timeout is not None else None
+
+            executor = ThreadPoolExecutor(max_workers=1)
+            try:
+                extraction = executor.submit(entity_extractor.invoke, input, config)
+                entities = extraction.result(_remaining(deadline, time.monotonic))
+            except FutureTimeoutError:
+                return set()
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+            def _from(entity: Node) -> Iterable[Relation]:
+                linked = self.graph.link_nodes([entity], k=k, min_similarity=min_similarity)
+                if not linked:
+                    return []
+                return traverse.invoke(
+                    linked, config, timeout=_remaining(deadline, time.monotonic)
+                )
+
+            results: Set[Relation] = set()
+            executor = ThreadPoolExecutor(max_workers=max(1, len(entities)))
+            try:
+                futures = [executor.submit(_from, entity) for entity in entities]
+                # Traversals stop themselves at the deadline, but linking doesn't, so
+                # entities which are still being linked are abandoned.
+                done, _ = wait(futures, timeout=_remaining(deadline, time.monotonic))
+                for future in done:
+                    results.update(future.result())
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+            return results
+
+        async def _aretrieve(input: Dict[str, Any], config: RunnableConfig) -> Set[Relation]:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout if timeout is not None else None
+
+            try:
+                async with asyncio.timeout_at(deadline):
+                    entities = await entity_extractor.ainvoke(input, config)
+            except TimeoutError:
+                return set()
+
+            async def _from(entity: Node) -> Iterable[Relation]:
+                try:
+                    async with asyncio.timeout_at(deadline):
+                        linked = await self.graph.alink_nodes(
+                            [entity], k=k, min_similarity=min_similarity
+                        )
+                except TimeoutError:
+                    return []
+                if not linked:
+                    return []
+                # The traversal stops itself at the deadline, returning what it found.
+                return await traverse.ainvoke(
+                    linked, config, timeout=_remaining(deadline, loop.time)
+                )
+
+            results: Set[Relation] = set()
+            for relations in await asyncio.gather(*map(_from, entities)):
+                results.update(relations)
+            return results
+
+        return RunnableLambda(_retrieve, afunc=_aretrieve, name="GraphRetrieval")
@@ -0,0 +1,130 @@
+from abc import ABC, abstractmethod
+from os import PathLike
+from typing import List, Sequence, Union
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class EmbeddingReducer(ABC):
+    """Reduces embeddings to a smaller dimension before they are stored or queried."""
+
+    @property
+    @abstractmethod
+    def dimension(self) -> int:
+        """The dimension of the reduced embeddings."""
+
+    @abstractmethod
+    def reduce(self, embeddings: Sequence[Sequence[float]]) -> List[List[float]]:
+        """Reduce each of the given embeddings."""
+
+
+class TruncatingReducer(EmbeddingReducer):
+    def __init__(self, dimension: int) -> None:
+        """
+        Reduce embeddings by keeping the first `dimension` components.
+
+        This is only appropriate for models trained with Matryoshka representation
+        learning, where the leading components carry most of the information.
+        The truncated embeddings are re-normalized.
+
+        Parameters:
+        - dimension: The number of components to keep.
+        """
+        if dimension < 2:
+            # Cosine distance requires at least two dimensions.
+            raise ValueError("dimension must be at least two")
+        self._dimension = dimension
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def reduce(self, embeddings: Sequence[Sequence[float]]) -> List[List[float]]:
+        vectors = np.asarray(embeddings, dtype=np.float32)[:, : self._dimension]
+        return _normalize(vectors).tolist()
+
+
+class ProjectionReducer(EmbeddingReducer):
+    def __init__(self, mean: np.ndarray, components: np.ndarray) -> None:
+        """
+        Reduce embeddings by a fitted linear projection.
+
+        Most uses should create this with `fit` or `load`.
+
+        Parameters:
+        - mean: The mean embedding, subtracted before projecting.
+        - components: The projection matrix, with one row per reduced dimension.
+        """
+        self._mean = np.asarray(mean, dtype=np.float32)
+        self._components = np.asarray(components, dtype=np.float32)
+
+    @classmethod
+    def fit(cls, embeddings: Sequence[Sequence[float]], dimension: int) -> "ProjectionReducer":
+        """
+        Fit a projection onto the top `dimension` principal components.
+
+        Parameters:
+        - embeddings: A representative sample of (full dimension) embeddings.
+        - dimension: The number of dimensions to reduce to.
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if dimension < 2 or dimension > min(vectors.shape):
+            raise ValueError(
+                f"dimension must be between 2 and {min(vectors.shape)} for this sample"
+            )
+        mean = vectors.mean(axis=0)
+        _, _, components = np.linalg.svd(vectors - mean, full_matrices=False)
+        return cls(mean, components[:dimension])
+
+    @property
+    def dimension(self) -> int:
+        return len(self._components)
+
+    def reduce(self, embeddings: Sequence[Sequence[float]]) -> List[List[float]]:
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        return _normalize((vectors - self._mean) @ self._components.T).tolist()
+
+    def save(self, path: Union[str, PathLike]) -> None:
+        """Save the fitted projection to a `.npz` file."""
+        np.savez(path, mean=self._mean, components=self._components)
+
+    @classmethod
+    def load(cls, path: Union[str, PathLike]) -> "ProjectionReducer":
+        """Load a projection saved by `save`."""
+        with np.load(path) as data:
+            return cls(data["mean"], data["components"])
+
+
+class ReducedEmbeddings(Embeddings):
+    def __init__(self, embeddings: Embeddings, reducer: EmbeddingReducer) -> None:
+        """
+        Wrap `embeddings` so that every embedding is reduced by `reducer`.
+
+        Parameters:
+        - embeddings: The embeddings to wrap.
+        - reducer: The reducer to apply to documents and queries.
+        """
+        self.embeddings = embeddings
+        self.reducer = reducer
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self.reducer.reduce(self.embeddings.embed_documents(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.reducer.reduce([self.embeddings.embed_query(text)])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self.reducer.reduce(await self.embeddings.aembed_documents(texts))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self.reducer.reduce([await self.embeddings.aembed_query(text)])[0]
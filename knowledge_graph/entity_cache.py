@@ -0,0 +1,179 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, NamedTuple, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+
+from .node_cache import NodeCacheStats
+from .traverse import Node
+from .utils import normalize_name
+
+
+class _Entry(NamedTuple):
+    entities: List[Node]
+    vector: Optional[Any]
+    expires_at: Optional[float]
+
+
+class EntityCache:
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl: Optional[float] = None,
+        text_embeddings: Optional[Embeddings] = None,
+        min_similarity: float = 0.95,
+    ) -> None:
+        """
+        Create a bounded LRU cache of the entities extracted from questions.
+
+        Questions are matched exactly, ignoring case and whitespace. If
+        `text_embeddings` is set, questions which don't match exactly are embedded
+        and match the most similar cached question, if it is at least
+        `min_similarity` similar.
+
+        Parameters:
+        - max_entries: The maximum number of questions to cache. The least recently
+          used entries are evicted first.
+        - ttl: If set, the number of seconds after which an entry expires.
+        - text_embeddings: The embeddings used to match similar questions, if any.
+        - min_similarity: The minimum cosine similarity (from -1 to 1) of a similar
+          question to match.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least one")
+
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._text_embeddings = text_embeddings
+        self._min_similarity = min_similarity
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        # Embeddings of questions which missed, so they needn't be re-embedded
+        # when the extracted entities are put.
+        self._pending_vectors: OrderedDict[str, Any] = OrderedDict()
+        # The stacked vectors (and keys) of the entries, rebuilt after changes.
+        self._matrix: Optional[Any] = None
+        self._matrix_keys: List[str] = []
+        self._hits = 0
+        self._misses = 0
+
+    def _embed(self, questions: Sequence[str]) -> Any:
+        import numpy as np
+
+        assert self._text_embeddings is not None
+        vectors = np.asarray(self._text_embeddings.embed_documents(list(questions)), dtype=float)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def _live_entry(self, key: str, now: float) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at is not None and entry.expires_at <= now:
+            self._remove(key)
+            return None
+        return entry
+
+    def _similar_key(self, vector: Any, now: float) -> Optional[str]:
+        import numpy as np
+
+        if self._matrix is None:
+            self._matrix_keys = [k for k, e in self._entries.items() if e.vector is not None]
+            if not self._matrix_keys:
+                return None
+            self._matrix = np.stack([self._entries[k].vector for k in self._matrix_keys])
+
+        similarities = self._matrix @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < self._min_similarity:
+            return None
+        key = self._matrix_keys[best]
+        return key if self._live_entry(key, now) is not None else None
+
+    def lookup(self, questions: Sequence[str]) -> List[Optional[List[Node]]]:
+        """
+        Return the cached entities of each of `questions`, or `None` for misses.
+
+        Questions which don't match exactly are embedded together, in a single
+        request.
+        """
+        keys = [normalize_name(question) for question in questions]
+        results: List[Optional[List[Node]]] = [None] * len(keys)
+        with self._lock:
+            now = time.monotonic()
+            for idx, key in enumerate(keys):
+                entry = self._live_entry(key, now)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    results[idx] = list(entry.entities)
+        missed = [idx for idx, result in enumerate(results) if result is None]
+
+        if missed and self._text_embeddings is not None:
+            unique = list(dict.fromkeys(keys[idx] for idx in missed))
+            vectors = dict(zip(unique, self._embed(unique)))
+            with self._lock:
+                now = time.monotonic()
+                for idx in missed:
+                    similar = self._similar_key(vectors[keys[idx]], now)
+                    if similar is not None:
+                        self._entries.move_to_end(similar)
+                        results[idx] = list(self._entries[similar].entities)
+                for key, vector in vectors.items():
+                    self._pending_vectors[key] = vector
+                while len(self._pending_vectors) > self._max_entries:
+                    self._pending_vectors.popitem(last=False)
+
+        with self._lock:
+            hits = sum(1 for result in results if result is not None)
+            self._hits += hits
+            self._misses += len(results) - hits
+        return results
+
+    def get(self, question: str) -> Optional[List[Node]]:
+        """Return the cached entities of `question`, or `None` if it isn't cached."""
+        return self.lookup([question])[0]
+
+    def put(self, question: str, entities: Sequence[Node]) -> None:
+        """Cache the `entities` extracted from `question`."""
+        key = normalize_name(question)
+        vector = None
+        if self._text_embeddings is not None:
+            with self._lock:
+                vector = self._pending_vectors.pop(key, None)
+            if vector is None:
+                vector = self._embed([key])[0]
+        expires_at = time.monotonic() + self._ttl if self._ttl is not None else None
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = _Entry(list(entities), vector, expires_at)
+            self._matrix = None
+            while len(self._entries) > self._max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, question: str) -> None:
+        """Remove `question` from the cache, if present."""
+        with self._lock:
+            self._remove(normalize_name(question))
+
+    def clear(self) -> None:
+        """Remove all entries from the cache. Statistics are preserved."""
+        with self._lock:
+            self._entries.clear()
+            self._pending_vectors.clear()
+            self._matrix = None
+
+    def _remove(self, key: str) -> None:
+        if self._entries.pop(key, None) is not None:
+            self._matrix = None
+
+    def stats(self) -> NodeCacheStats:
+        """Return the hit statistics of the cache. Memory use isn't tracked."""
+        with self._lock:
+            return NodeCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                entries=len(self._entries),
+                memory_bytes=0,
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
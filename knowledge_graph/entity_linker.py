@@ -0,0 +1,188 @@
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .traverse import Node
+from .utils import normalize_name
+
+if TYPE_CHECKING:
+    from .knowledge_graph import CassandraKnowledgeGraph
+
+
+def _is_whole_words(text: str, start: int, end: int) -> bool:
+    return (start == 0 or not text[start - 1].isalnum()) and (
+        end == len(text) or not text[end].isalnum()
+    )
+
+
+class _Automaton:
+    def __init__(self, names: List[str]) -> None:
+        """An (immutable) Aho-Corasick automaton over distinct normalized names."""
+        self.names = names
+
+        # The trie, with one entry in each list per state. State 0 is the root.
+        self._children: List[Dict[str, int]] = [{}]
+        self._names: List[Optional[str]] = [None]
+        for name in names:
+            state = 0
+            for char in name:
+                next_state = self._children[state].get(char)
+                if next_state is None:
+                    next_state = len(self._children)
+                    self._children[state][char] = next_state
+                    self._children.append({})
+                    self._names.append(None)
+                state = next_state
+            self._names[state] = name
+
+        self._fail = [0] * len(self._children)
+        # The nearest state along the failure links which completes a name (or 0).
+        self._output = [0] * len(self._children)
+        queue = deque(self._children[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._children[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._children[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._children[fail].get(char, 0)
+                fail = self._fail[child]
+                self._output[child] = (
+                    fail if self._names[fail] is not None else self._output[fail]
+                )
+                queue.append(child)
+
+    def mentions(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """Yield the `(start, end, name)` of each whole-word mention in `text`."""
+        state = 0
+        for end, char in enumerate(text, start=1):
+            while state and char not in self._children[state]:
+                state = self._fail[state]
+            state = self._children[state].get(char, 0)
+
+            match = state if self._names[state] is not None else self._output[state]
+            while match:
+                name = self._names[match]
+                assert name is not None
+                start = end - len(name)
+                if _is_whole_words(text, start, end):
+                    yield (start, end, name)
+                match = self._output[match]
+
+
+class EntityLinker:
+    def __init__(self, min_length: int = 3) -> None:
+        """
+        Create a local linker from text to the nodes whose names it mentions.
+
+        Names are matched ignoring case and whitespace (see `normalize_name`), and
+        only as whole words. Matching uses Aho-Corasick automata over all names, so
+        the cost of linking depends on the length of the text and not on the number
+        of names.
+
+        Automata are immutable, so names are added incrementally by building an
+        automaton over just the new names. Automata are kept in levels of decreasing
+        size, and merged (rebuilt) when a new one is at least as large as the last.
+        So there are at most `log2(names)` automata to scan when linking, and each
+        name is rebuilt at most `log2(names)` times as names are added.
+
+        Parameters:
+        - min_length: Names (after normalization) shorter than this are ignored, to
+          avoid linking short words and initials.
+        """
+        self._min_length = min_length
+
+        self._lock = threading.Lock()
+        self._levels: List[_Automaton] = []
+        self._nodes: Dict[str, Dict[Node, None]] = {}
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def add(self, names: Iterable[Tuple[str, Node]]) -> None:
+        """
+        Add names (or aliases) of nodes to the linker.
+
+        Adding names in large batches (such as when bootstrapping) is cheapest,
+        since each call with new names builds an automaton over them.
+
+        Parameters:
+        - names: Pairs of the name to match and the node it refers to.
+        """
+        with self._lock:
+            new_names: List[str] = []
+            for name, node in names:
+                normalized = normalize_name(name)
+                if len(normalized) < self._min_length:
+                    continue
+
+                nodes = self._nodes.get(normalized)
+                if nodes is None:
+                    nodes = self._nodes[normalized] = {}
+                    new_names.append(normalized)
+                nodes[Node(node.name, node.type)] = None
+
+            if new_names:
+                while self._levels and len(self._levels[-1].names) <= len(new_names):
+                    new_names = self._levels.pop().names + new_names
+                self._levels.append(_Automaton(new_names))
+
+    def add_nodes(self, nodes: Iterable[Node]) -> None:
+        """Add the names of `nodes` to the linker."""
+        self.add((node.name, node) for node in nodes)
+
+    def bootstrap(self, graph: "CassandraKnowledgeGraph", batch_size: int = 1000) -> None:
+        """
+        Load all of the names of nodes in `graph`, and any aliases.
+
+        Names are read from the node table. Aliases are read from the
+        `{node_table}_names` table, if it exists.
+
+        Parameters:
+        - graph: The graph to load the names from.
+        - batch_size: The number of rows to fetch per page.
+        """
+        from cassandra.query import SimpleStatement
+
+        rows = graph._session.execute(
+            SimpleStatement(
+                f"SELECT name, type FROM {graph._keyspace}.{graph._node_table}",
+                fetch_size=batch_size,
+            )
+        )
+        names = [(row.name, Node(row.name, row.type)) for row in rows]
+
+        if graph._has_name_table:
+            rows = graph._session.execute(
+                SimpleStatement(
+                    f"""
+                    SELECT normalized_name, name, type
+                    FROM {graph._keyspace}.{graph._name_table}
+                    """,
+                    fetch_size=batch_size,
+                )
+            )
+            names.extend((row.normalized_name, Node(row.name, row.type)) for row in rows)
+        self.add(names)
+
+    def link(self, text: str) -> List[Node]:
+        """
+        Return the nodes whose names are mentioned in `text`, in order of mention.
+
+        Where mentions overlap, the leftmost (and then longest) is used. A name shared
+        by several nodes (such as of different types) links to each of them.
+        """
+        text = normalize_name(text)
+        with self._lock:
+            levels = list(self._levels)
+
+        mentions = [mention for level in levels for mention in level.mentions(text)]
+
+        linked: Dict[Node, None] = {}
+        covered = 0
+        with self._lock:
+            for start, end, name in sorted(mentions, key=lambda m: (m[0], -m[1])):
+                if start >= covered:
+                    linked.update(self._nodes[name])
+                    covered = end
+        return list(linked)
@@ -0,0 +1,223 @@
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from langchain_core.embeddings import Embeddings
+
+from .traverse import Node, Relation
+from .utils import normalize_name
+
+_TOKEN = re.compile(r"\w+")
+
+
+def _tokens(name: str) -> List[str]:
+    return _TOKEN.findall(normalize_name(name))
+
+
+def _compatible_names(a: str, b: str) -> bool:
+    """
+    Return whether the shorter name could abbreviate the longer one.
+
+    Each token of the shorter name must equal a token of the longer name, or be a
+    prefix of one (so initials such as "M." match "Marie").
+    """
+    a_tokens, b_tokens = _tokens(a), _tokens(b)
+    if len(a_tokens) > len(b_tokens):
+        a_tokens, b_tokens = b_tokens, a_tokens
+    elif len(a_tokens) == len(b_tokens) and _abbreviates(b_tokens, a_tokens):
+        return True
+    return _abbreviates(a_tokens, b_tokens)
+
+
+def _abbreviates(short: List[str], long: List[str]) -> bool:
+    return all(any(b.startswith(a) for b in long) for a in short)
+
+
+class _DisjointSet:
+    def __init__(self, size: int) -> None:
+        self._parents = list(range(size))
+
+    def find(self, x: int) -> int:
+        while self._parents[x] != x:
+            self._parents[x] = self._parents[self._parents[x]]
+            x = self._parents[x]
+        return x
+
+    def union(self, x: int, y: int) -> None:
+        self._parents[self.find(x)] = self.find(y)
+
+
+def _linked(nodes: Sequence[Node], similar: Dict[Tuple[int, int], float], i: int, j: int) -> bool:
+    """Return whether nodes `i` and `j` may be merged directly."""
+    if normalize_name(nodes[i].name) == normalize_name(nodes[j].name):
+        return True
+    return (min(i, j), max(i, j)) in similar and _compatible_names(nodes[i].name, nodes[j].name)
+
+
+class EntityResolution(NamedTuple):
+    elements: List[Union[Node, Relation]]
+    """The elements with each node rewritten to its canonical node."""
+
+    aliases: Dict[Node, Node]
+    """The canonical node of each node which was merged into another."""
+
+
+class EntityResolver:
+    def __init__(
+        self,
+        text_embeddings: Optional[Embeddings] = None,
+        min_similarity: float = 0.9,
+        min_token_length: int = 3,
+        max_block_size: int = 1000,
+    ) -> None:
+        """
+        Create a resolver which merges near-duplicate nodes within a batch.
+
+        Nodes of the same type are merged if their normalized names are equal. If
+        `text_embeddings` is set, nodes of the same type which share a name token
+        (a "block") are also merged if one name could abbreviate the other (such as
+        "M. Curie" and "Marie Curie") and the cosine similarity of the embedded names
+        is at least `min_similarity`. Similarities within each block are computed
+        as a single matrix product.
+
+        Merging isn't transitive: groups are merged most similar pair first, and only
+        if every member of one group could be merged with every member of the other.
+        So an ambiguous short name (such as "Curie") is merged with at most one of
+        the names it could abbreviate ("Marie Curie" or "Pierre Curie"), and never
+        joins them.
+
+        The canonical node of each group of merged nodes is the one with the longest
+        normalized name (the most complete identifier), then the most mentions, then
+        the first mentioned.
+
+        Parameters:
+        - text_embeddings: The embeddings used to compare names, if any.
+        - min_similarity: The minimum cosine similarity (from -1 to 1) of names to
+          merge.
+        - min_token_length: Shorter name tokens (such as initials) aren't used for
+          blocking.
+        - max_block_size: Blocks with more nodes than this (very common tokens) are
+          skipped.
+        """
+        self._text_embeddings = text_embeddings
+        self._min_similarity = min_similarity
+        self._min_token_length = min_token_length
+        self._max_block_size = max_block_size
+
+    def _blocks(self, nodes: Sequence[Node]) -> Iterable[List[int]]:
+        blocks: Dict[Tuple[str, str], List[int]] = {}
+        for idx, node in enumerate(nodes):
+            for token in set(_tokens(node.name)):
+                if len(token) >= self._min_token_length:
+                    blocks.setdefault((node.type, token), []).append(idx)
+        return (block for block in blocks.values() if 1 < len(block) <= self._max_block_size)
+
+    def _similar_pairs(self, nodes: Sequence[Node]) -> Dict[Tuple[int, int], float]:
+        """Return the similarity of each similar pair `(i, j)` of nodes, with `i < j`."""
+        if self._text_embeddings is None:
+            return {}
+        blocks = list(self._blocks(nodes))
+        if not blocks:
+            return {}
+
+        import numpy as np
+
+        # Only embed nodes which appear in at least one block.
+        embedded = sorted({idx for block in blocks for idx in block})
+        vectors = np.asarray(
+            self._text_embeddings.embed_documents([nodes[idx].name for idx in embedded]),
+            dtype=np.float32,
+        )
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1, norms)
+        rows = {idx: row for row, idx in enumerate(embedded)}
+
+        pairs: Dict[Tuple[int, int], float] = {}
+        for block in blocks:
+            block_vectors = vectors[[rows[idx] for idx in block]]
+            similarities = block_vectors @ block_vectors.T
+            for i, j in zip(*np.nonzero(np.triu(similarities >= self._min_similarity, k=1))):
+                pairs[(block[i], block[j])] = float(similarities[i, j])
+        return pairs
+
+    def resolve(self, elements: Iterable[Union[Node, Relation]]) -> EntityResolution:
+        """
+        Rewrite the nodes (and relation endpoints) of `elements` to canonical nodes.
+
+        Duplicate nodes are removed, with the canonical node's properties taking
+        precedence when merging properties.
+
+        Parameters:
+        - elements: The nodes and relations to resolve.
+        """
+        elements = list(elements)
+
+        mentions: Counter[Node] = Counter()
+        properties: Dict[Node, Dict[str, Any]] = {}
+        for element in elements:
+            if isinstance(element, Node):
+                mentions[element] += 1
+                properties.setdefault(element, {}).update(element.properties)
+            elif isinstance(element, Relation):
+                mentions[element.source] += 1
+                mentions[element.target] += 1
+            else:
+                raise ValueError(f"Unsupported element type: {element}")
+        nodes = list(mentions)
+
+        groups = _DisjointSet(len(nodes))
+        by_name: Dict[Tuple[str, str], int] = {}
+        for idx, node in enumerate(nodes):
+            key = (node.type, normalize_name(node.name))
+            if key in by_name:
+                groups.union(idx, by_name[key])
+            else:
+                by_name[key] = idx
+        indices: Dict[int, List[int]] = {}
+        for idx in range(len(nodes)):
+            indices.setdefault(groups.find(idx), []).append(idx)
+
+        similar = self._similar_pairs(nodes)
+        for (i, j), _similarity in sorted(similar.items(), key=lambda p: (-p[1], p[0])):
+            root_i, root_j = groups.find(i), groups.find(j)
+            if root_i == root_j:
+                continue
+            if all(
+                _linked(nodes, similar, a, b) for a in indices[root_i] for b in indices[root_j]
+            ):
+                groups.union(root_i, root_j)
+                indices[groups.find(root_i)] = indices.pop(root_i) + indices.pop(root_j)
+
+        members: Dict[int, List[Node]] = {}
+        for idx, node in enumerate(nodes):
+            members.setdefault(groups.find(idx), []).append(node)
+
+        canonical: Dict[Node, Node] = {}
+        aliases: Dict[Node, Node] = {}
+        for group in members.values():
+            target = max(group, key=lambda n: (len(normalize_name(n.name)), mentions[n]))
+            merged_properties: Dict[str, Any] = {}
+            for node in group:
+                if node != target:
+                    merged_properties.update(properties.get(node, {}))
+            merged_properties.update(properties.get(target, {}))
+
+            merged = Node(name=target.name, type=target.type, properties=merged_properties)
+            for node in group:
+                canonical[node] = merged
+                if node.name != target.name:
+                    aliases[node] = merged
+
+        resolved: Dict[Union[Node, Relation], Union[Node, Relation]] = {}
+        for element in elements:
+            if isinstance(element, Node):
+                node = canonical[element]
+                resolved.setdefault(node, node)
+            else:
+                relation = Relation(
+                    source=canonical[element.source],
+                    target=canonical[element.target],
+                    type=element.type,
+                )
+                resolved.setdefault(relation, relation)
+        return EntityResolution(elements=list(resolved.values()), aliases=aliases)
@@ -1,4 +1,19 @@
-from typing import Dict, List, Sequence, Union, cast
+import json
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Type,
+    Union,
+    cast,
+)
 
 from langchain_community.graphs.graph_document import GraphDocument
 from langchain_core.documents import Document
@@ -8,21 +23,21 @@ from langchain_core.prompts import (
     HumanMessagePromptTemplate,
     SystemMessagePromptTemplate,
 )
-from langchain_core.pydantic_v1 import BaseModel
-from langchain_experimental.graph_transformers.llm import (
-    _Graph,
-    create_simple_model,
-    map_to_base_node,
-    map_to_base_relationship,
-)
+from langchain_core.pydantic_v1 import BaseModel, Field
+from langchain_core.runnables import Runnable, RunnableLambda
 
+from knowledge_graph.extraction_cache import ExtractionCache, extraction_key
 from knowledge_graph.knowledge_schema import (
     Example,
     KnowledgeSchema,
     KnowledgeSchemaValidator,
 )
+from knowledge_graph.rate_limit import RateLimiter, estimate_tokens, rate_limit_errors
 from knowledge_graph.templates import load_template
 
+if TYPE_CHECKING:
+    from langchain_experimental.graph_transformers.llm import _Graph
+
 
 def _format_example(idx: int, example: Example) -> str:
     from pydantic_yaml import to_yaml_str
@@ -30,6 +45,38 @@ def _format_example(idx: int, example: Example) -> str:
     return f"Example {idx}:\n```yaml\n{to_yaml_str(example)}\n```"
 
 
+def _model_identity(llm: BaseChatModel) -> str:
+    return json.dumps(
+        {"type": llm._llm_type, **llm._identifying_params}, sort_keys=True, default=str
+    )
+
+
+_PACKING_INSTRUCTIONS = (
+    "The input contains several documents, each enclosed in a `<document>` tag with a "
+    "numeric `index`. Extract a separate graph from each document, as if it were the "
+    "only input, and identify each graph by the index of its document."
+)
+
+
+def _format_packed(documents: Sequence[Document]) -> str:
+    return "\n\n".join(
+        f'<document index="{idx}">\n{document.page_content}\n</document>'
+        for idx, document in enumerate(documents)
+    )
+
+
+def _packed_model(graph_model: Type[BaseModel]) -> Type[BaseModel]:
+    class DocumentGraph(graph_model):
+        document: int = Field(description="The index of the document the graph is from.")
+
+    class PackedGraphs(BaseModel):
+        """Graphs extracted from each of the input documents."""
+
+        graphs: List[DocumentGraph] = Field(description="The graph of each document.")
+
+    return PackedGraphs
+
+
 class KnowledgeSchemaExtractor:
     def __init__(
         self,
@@ -37,52 +84,277 @@ class KnowledgeSchemaExtractor:
         schema: KnowledgeSchema,
         examples: Sequence[Example] = [],
         strict: bool = False,
+        repair: bool = False,
+        max_concurrency: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_attempts: int = 3,
+        retry_on: Optional[Sequence[Type[BaseException]]] = None,
+        cache: Optional[ExtractionCache] = None,
+        packing_token_budget: Optional[int] = None,
     ) -> None:
+        """
+        Create an extractor for graph documents conforming to `schema`.
+
+        Parameters:
+        - llm: The LLM to use for extraction. It must support structured output.
+        - schema: The knowledge schema to extract.
+        - examples: Examples to include in the prompt.
+        - strict: If true, extracted documents are validated against the schema.
+        - repair: If true, elements of extracted documents which aren't allowed by the
+          schema are remapped to schema types where possible, and dropped otherwise.
+          See `KnowledgeSchemaValidator.filter_graph_document`.
+        - max_concurrency: The maximum number of concurrent LLM requests.
+        - rate_limiter: If set, requests wait for the request and token limits of
+          this rate limiter. It may be shared to apply a single quota across
+          extractors.
+        - max_attempts: The maximum number of attempts for each request which fails
+          with one of the `retry_on` errors. Retries use exponential backoff with
+          jitter.
+        - retry_on: The exceptions to retry. Defaults to the rate limit errors of the
+          installed LLM client libraries.
+        - cache: If set, extracted graph documents are cached here, keyed by a hash of
+          the document content, the prompt template, the schema, the examples, the
+          model and the `strict`, `repair` and packing options. Cached documents are
+          returned without calling the LLM.
+        - packing_token_budget: If set, consecutive documents are packed into a single
+          request (with a separate result for each document) as long as their total
+          (estimated) tokens are within this budget. This shares the cost of the
+          instructions, schema and examples between short documents. Documents the
+          LLM doesn't return a result for are re-extracted individually.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least one")
+        self.max_concurrency = max_concurrency
+        self._packing_token_budget = packing_token_budget
         self._validator = KnowledgeSchemaValidator(schema)
         self.strict = strict
+        self.repair = repair
 
-        messages = [
-            SystemMessagePromptTemplate(
-                prompt=load_template("extraction.md", knowledge_schema_yaml=schema.to_yaml_str())
-            )
-        ]
+        schema_yaml = schema.to_yaml_str()
+        template = load_template("extraction.md", knowledge_schema_yaml=schema_yaml)
+        formatted = "\n\n".join(map(_format_example, examples))
+
+        self._cache = cache
+        # Validation, repair and packing affect the cached results, so extractors
+        # sharing a cache only share results if these options match.
+        options = json.dumps(
+            {"strict": strict, "repair": repair, "packed": packing_token_budget is not None},
+            sort_keys=True,
+        )
+        self._cache_prefix = extraction_key(
+            template.template, schema_yaml, formatted, _model_identity(llm), options
+        )
+
+        messages = [SystemMessagePromptTemplate(prompt=template)]
 
         if examples:
-            formatted = "\n\n".join(map(_format_example, examples))
             messages.append(SystemMessagePromptTemplate(prompt=formatted))
 
-        messages.append(HumanMessagePromptTemplate.from_template("Input: {input}"))
+        prompt = ChatPromptTemplate.from_messages(
+            messages + [HumanMessagePromptTemplate.from_template("Input: {input}")]
+        )
+        packed_prompt = ChatPromptTemplate.from_messages(
+            messages
+            + [
+                SystemMessagePromptTemplate.from_template(_PACKING_INSTRUCTIONS),
+                HumanMessagePromptTemplate.from_template("Input: {input}"),
+            ]
+        )
+
+        from langchain_experimental.graph_transformers.llm import create_simple_model
 
-        prompt = ChatPromptTemplate.from_messages(messages)
-        schema = create_simple_model(
+        graph_model = create_simple_model(
             node_labels=[node.type for node in schema.nodes],
             rel_types=list({r.edge_type for r in schema.relationships}),
         )
-        # TODO: Use "full" output so we can detect parsing errors?
-        structured_llm = llm.with_structured_output(schema)
-        self._chain = prompt | structured_llm
+
+        retry_on = tuple(retry_on) if retry_on is not None else rate_limit_errors()
+
+        def _structured_llm(output_model: Type[BaseModel]) -> Runnable:
+            # TODO: Use "full" output so we can detect parsing errors?
+            structured_llm = llm.with_structured_output(output_model)
+            if rate_limiter is not None:
+                structured_llm = rate_limiter.as_runnable() | structured_llm
+            if retry_on and max_attempts > 1:
+                structured_llm = structured_llm.with_retry(
+                    retry_if_exception_type=retry_on,
+                    wait_exponential_jitter=True,
+                    stop_after_attempt=max_attempts,
+                )
+            return structured_llm
+
+        self._chain = prompt | _structured_llm(graph_model)
+        self._packed_chain = (
+            packed_prompt | _structured_llm(_packed_model(graph_model))
+            if packing_token_budget is not None
+            else None
+        )
 
     def _process_response(
         self, document: Document, response: Union[Dict, BaseModel]
     ) -> GraphDocument:
-        raw_graph = cast(_Graph, response)
-        nodes = [map_to_base_node(node) for node in raw_graph.nodes] if raw_graph.nodes else []
-        relationships = (
-            [map_to_base_relationship(rel) for rel in raw_graph.relationships]
-            if raw_graph.relationships
-            else []
+        raw_graph = cast("_Graph", response)
+        return self._graph_document(
+            document, raw_graph.nodes or [], raw_graph.relationships or []
         )
 
-        document = GraphDocument(nodes=nodes, relationships=relationships, source=document)
+    def _graph_document(
+        self, document: Document, raw_nodes: Sequence[Any], raw_relationships: Sequence[Any]
+    ) -> GraphDocument:
+        from langchain_experimental.graph_transformers.llm import (
+            map_to_base_node,
+            map_to_base_relationship,
+        )
 
+        nodes = [map_to_base_node(node) for node in raw_nodes]
+        relationships = [map_to_base_relationship(rel) for rel in raw_relationships]
+        graph_document = GraphDocument(nodes=nodes, relationships=relationships, source=document)
+
+        if self.repair:
+            graph_document = self._validator.filter_graph_document(graph_document)
         if self.strict:
-            self._validator.validate_graph_document(document)
+            self._validator.validate_graph_document(graph_document)
+        if self._cache is not None:
+            self._cache.put(self._cache_key(document), graph_document)
+
+        return graph_document
+
+    def _cache_key(self, document: Document) -> str:
+        return extraction_key(self._cache_prefix, document.page_content)
+
+    def _lookup(self, document: Document) -> Optional[GraphDocument]:
+        if self._cache is None:
+            return None
+        return self._cache.get(self._cache_key(document), document)
+
+    def _extract_one(self, document: Document) -> GraphDocument:
+        response = self._chain.invoke({"input": document.page_content})
+        return self._process_response(document, response)
+
+    async def _aextract_one(self, document: Document) -> GraphDocument:
+        response = await self._chain.ainvoke({"input": document.page_content})
+        return self._process_response(document, response)
+
+    def _groups(self, documents: Iterable[Document]) -> Iterator[List[Document]]:
+        """Group consecutive documents into requests, packing them if enabled."""
+        if self._packing_token_budget is None:
+            for document in documents:
+                yield [document]
+            return
+
+        group: List[Document] = []
+        group_tokens = 0
+        for document in documents:
+            tokens = estimate_tokens(document.page_content)
+            if group and group_tokens + tokens > self._packing_token_budget:
+                yield group
+                group, group_tokens = [], 0
+            group.append(document)
+            group_tokens += tokens
+        if group:
+            yield group
+
+    def _unpack(
+        self, documents: Sequence[Document], response: Union[Dict, BaseModel]
+    ) -> List[Optional[GraphDocument]]:
+        graphs: Dict[int, List[Any]] = {}
+        for graph in cast(Any, response).graphs or []:
+            if 0 <= graph.document < len(documents):
+                graphs.setdefault(graph.document, []).append(graph)
 
-        return document
+        results: List[Optional[GraphDocument]] = []
+        for idx, document in enumerate(documents):
+            if idx not in graphs:
+                results.append(None)
+                continue
+            # Combine the graphs if the LLM split a document's results.
+            nodes = [node for graph in graphs[idx] for node in graph.nodes or []]
+            relationships = [rel for graph in graphs[idx] for rel in graph.relationships or []]
+            results.append(self._graph_document(document, nodes, relationships))
+        return results
+
+    def _extract_group(self, documents: Sequence[Document]) -> List[GraphDocument]:
+        if self._packed_chain is None or len(documents) == 1:
+            return [self._extract_one(document) for document in documents]
+
+        response = self._packed_chain.invoke({"input": _format_packed(documents)})
+        results = self._unpack(documents, response)
+        return [
+            result if result is not None else self._extract_one(document)
+            for document, result in zip(documents, results)
+        ]
+
+    async def _aextract_group(self, documents: Sequence[Document]) -> List[GraphDocument]:
+        if self._packed_chain is None or len(documents) == 1:
+            return [await self._aextract_one(document) for document in documents]
+
+        response = await self._packed_chain.ainvoke({"input": _format_packed(documents)})
+        results = self._unpack(documents, response)
+        return [
+            result if result is not None else await self._aextract_one(document)
+            for document, result in zip(documents, results)
+        ]
 
     def extract(self, documents: List[Document]) -> List[GraphDocument]:
-        # TODO: Define an async version of extraction?
-        responses = self._chain.batch_as_completed(
-            [{"input": doc.page_content} for doc in documents]
+        """Extract a graph document from each of `documents`, in the same order."""
+        results = [self._lookup(document) for document in documents]
+        missing = [idx for idx, result in enumerate(results) if result is None]
+        extracted = RunnableLambda(self._extract_group).batch(
+            list(self._groups(documents[idx] for idx in missing)),
+            config={"max_concurrency": self.max_concurrency},
         )
-        return [self._process_response(documents[idx], response) for idx, response in responses]
+        graph_documents = (graph_document for group in extracted for graph_document in group)
+        for idx, graph_document in zip(missing, graph_documents):
+            results[idx] = graph_document
+        return cast(List[GraphDocument], results)
+
+    async def aextract(self, documents: Sequence[Document]) -> List[GraphDocument]:
+        """Asynchronously extract a graph document from each of `documents`, in order."""
+        results = [self._lookup(document) for document in documents]
+        missing = [idx for idx, result in enumerate(results) if result is None]
+        extract_group = RunnableLambda(self._extract_group, afunc=self._aextract_group)
+        extracted = await extract_group.abatch(
+            list(self._groups(documents[idx] for idx in missing)),
+            config={"max_concurrency": self.max_concurrency},
+        )
+        graph_documents = (graph_document for group in extracted for graph_document in group)
+        for idx, graph_document in zip(missing, graph_documents):
+            results[idx] = graph_document
+        return cast(List[GraphDocument], results)
+
+    def _uncached(
+        self, documents: Iterable[Document], cached: List[GraphDocument]
+    ) -> Iterator[Document]:
+        """Yield the uncached documents, adding the cached results to `cached`."""
+        for document in documents:
+            graph_document = self._lookup(document)
+            if graph_document is not None:
+                cached.append(graph_document)
+            else:
+                yield document
+
+    def iter_extract(self, documents: Iterable[Document]) -> Iterator[GraphDocument]:
+        """
+        Extract graph documents, yielding each as soon as it is available.
+
+        Documents are read from `documents` lazily, with at most `max_concurrency`
+        requests in flight, so this is suitable for large corpora. Results are
+        yielded in the order they complete. The `source` of each result is the
+        document it was extracted from.
+        """
+        cached: List[GraphDocument] = []
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            pending: Set[Future[List[GraphDocument]]] = set()
+            for group in self._groups(self._uncached(documents, cached)):
+                yield from cached
+                cached.clear()
+
+                if len(pending) >= self.max_concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from future.result()
+                pending.add(executor.submit(self._extract_group, group))
+
+            yield from cached
+            for future in as_completed(pending):
+                yield from future.result()
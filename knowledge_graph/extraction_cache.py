@@ -0,0 +1,108 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from os import PathLike
+from typing import Iterable, Optional, Union
+
+from langchain_community.graphs.graph_document import GraphDocument, Node, Relationship
+from langchain_core.documents import Document
+
+
+def extraction_key(*parts: str) -> str:
+    """Return a stable hash identifying the combination of `parts`."""
+    digest = hashlib.sha256()
+    for part in parts:
+        encoded = part.encode()
+        # Length-prefix each part so that different splits can't collide.
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+def _serialize(document: GraphDocument) -> str:
+    return json.dumps(
+        {
+            "nodes": [node.dict() for node in document.nodes],
+            "relationships": [relationship.dict() for relationship in document.relationships],
+        },
+        separators=(",", ":"),
+    )
+
+
+def _deserialize(data: str, source: Document) -> GraphDocument:
+    parsed = json.loads(data)
+    return GraphDocument(
+        nodes=[Node.parse_obj(node) for node in parsed["nodes"]],
+        relationships=[Relationship.parse_obj(r) for r in parsed["relationships"]],
+        source=source,
+    )
+
+
+class ExtractionCache:
+    def __init__(self, path: Union[str, PathLike] = ":memory:") -> None:
+        """
+        Create a persistent cache of extracted graph documents, stored with SQLite.
+
+        Entries are keyed by a hash of everything which affects the extraction (see
+        `KnowledgeSchemaExtractor`), so changing the document, schema, examples or
+        model results in a miss rather than a stale result.
+
+        Parameters:
+        - path: The SQLite database file. Defaults to an in-memory database.
+        """
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS extractions (
+                    key TEXT PRIMARY KEY,
+                    graph_json TEXT NOT NULL
+                )
+                """
+            )
+
+    def get(self, key: str, source: Document) -> Optional[GraphDocument]:
+        """
+        Return the cached graph document for `key`, or `None` if there is none.
+
+        Parameters:
+        - key: The key of the extraction.
+        - source: The document to use as the `source` of the returned graph document.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT graph_json FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+        return _deserialize(row[0], source) if row is not None else None
+
+    def put(self, key: str, document: GraphDocument) -> None:
+        """Cache the extracted `document` under `key`."""
+        data = _serialize(document)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO extractions (key, graph_json) VALUES (?, ?)",
+                (key, data),
+            )
+
+    def invalidate(self, keys: Iterable[str]) -> None:
+        """Remove the entries for `keys`, if present."""
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "DELETE FROM extractions WHERE key = ?", [(key,) for key in keys]
+            )
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM extractions")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
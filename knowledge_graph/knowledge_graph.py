@@ -1,14 +1,57 @@
+import asyncio
+import hashlib
 import json
-from itertools import repeat
-from typing import Any, Dict, Iterable, Optional, Sequence, Tuple, Union, cast
+import re
+import threading
+from collections import Counter, deque
+from functools import cached_property
+from itertools import zip_longest
+from os import PathLike
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
 
-from cassandra.cluster import ResponseFuture, Session
-from cassandra.query import BatchStatement
+from cassandra.cluster import PreparedStatement, ResponseFuture, Session
+from cassandra.concurrent import execute_concurrent_with_args
+from cassandra.metadata import IndexMetadata, TableMetadata
+from cassandra.query import BatchStatement, BatchType, SimpleStatement
 from cassio.config import check_resolve_keyspace, check_resolve_session
+from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 
-from .traverse import Node, Relation, atraverse, traverse
-from .utils import batched
+from .node_cache import NodePropertyCache
+from .path_query import (
+    PathQueryPlan,
+    PathQueryStatements,
+    execute_path_plan,
+    parse_path_pattern,
+    path_rows,
+    plan_path_query,
+)
+from .traverse import HubPolicy, Node, Relation, _await_rows, atraverse, traverse
+from .utils import batched, normalize_name
+
+if TYPE_CHECKING:
+    from .embedding_reduction import EmbeddingReducer
+    from .entity_linker import EntityLinker
+    from .snapshot import SnapshotFormat
+    from .vector_index import LocalVectorIndex
+
+
+_VECTOR_TYPE = re.compile(r"vector<\s*float\s*,\s*(\d+)\s*>", re.IGNORECASE)
 
 
 def _serialize_md_dict(md_dict: Dict[str, Any]) -> str:
@@ -20,13 +63,94 @@ def _deserialize_md_dict(md_string: str) -> Dict[str, Any]:
 
 
 def _parse_node(row) -> Node:
+    properties_json = getattr(row, "properties_json", None)
     return Node(
         name=row.name,
         type=row.type,
-        properties=_deserialize_md_dict(row.properties_json) if row.properties_json else dict(),
+        properties=_deserialize_md_dict(properties_json) if properties_json else dict(),
+    )
+
+
+def source_document_id(document: Document) -> str:
+    """Return the ID of a source document, which is a hash of its content."""
+    return hashlib.sha256(document.page_content.encode()).hexdigest()
+
+
+def _parse_source(row) -> Document:
+    return Document(
+        page_content=row.text,
+        metadata=_deserialize_md_dict(row.metadata_json) if row.metadata_json else {},
     )
 
 
+def _group_by_name(nodes: Iterable[Node]) -> List[Tuple[str, List[str]]]:
+    """Group node keys by name, which is the partition key of the node table."""
+    types_by_name: Dict[str, List[str]] = {}
+    for node in nodes:
+        types = types_by_name.setdefault(node.name, [])
+        if node.type not in types:
+            types.append(node.type)
+    return list(types_by_name.items())
+
+
+def _by_similarity(node_similarity: Tuple[Node, float]) -> float:
+    return node_similarity[1]
+
+
+class _NodeFetcher:
+    """
+    Fetch nodes one at a time as they are added, with bounded concurrency.
+
+    Nodes may be added from driver callbacks, so `add` never blocks.
+    """
+
+    def __init__(self, session: Session, query: PreparedStatement, max_concurrency: int):
+        self._session = session
+        self._query = query
+        self._max_concurrency = max_concurrency
+        self._condition = threading.Condition()
+        self._queue: Deque[Node] = deque()
+        self._in_flight = 0
+        self._rows: List[Any] = []
+        self._error: Optional[BaseException] = None
+
+    def add(self, node: Node) -> None:
+        with self._condition:
+            self._queue.append(node)
+            self._send()
+
+    def _send(self) -> None:
+        with self._condition:
+            while self._in_flight < self._max_concurrency and self._queue:
+                node = self._queue.popleft()
+                self._in_flight += 1
+                request = self._session.execute_async(self._query, (node.name, [node.type]))
+                request.add_callbacks(self._handle_rows, self._handle_error)
+
+    def _handle_rows(self, rows) -> None:
+        with self._condition:
+            self._rows.extend(rows)
+            self._in_flight -= 1
+            self._send()
+            self._condition.notify()
+
+    def _handle_error(self, error: BaseException) -> None:
+        with self._condition:
+            self._error = error
+            self._in_flight -= 1
+            self._condition.notify()
+
+    def result(self) -> List[Any]:
+        """Wait for all added nodes to be fetched, and return the rows."""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._error is not None or (self._in_flight == 0 and not self._queue)
+            )
+            if self._error is not None:
+                raise self._error
+            return self._rows
+
+
 class CassandraKnowledgeGraph:
     def __init__(
         self,
@@ -36,6 +160,12 @@ class CassandraKnowledgeGraph:
         session: Optional[Session] = None,
         keyspace: Optional[str] = None,
         apply_schema: bool = True,
+        track_degrees: bool = False,
+        text_embeddings_dim: Optional[int] = None,
+        node_cache: Optional[NodePropertyCache] = None,
+        vector_index: Optional["LocalVectorIndex"] = None,
+        embedding_reducer: Optional["EmbeddingReducer"] = None,
+        entity_linker: Optional["EntityLinker"] = None,
     ) -> None:
         """
         Create a Cassandra Knowledge Graph.
@@ -48,67 +178,363 @@ class CassandraKnowledgeGraph:
           session, which requires `cassio.init` has been called.
         - keyspace: The Cassandra keyspace to use. If not specified, uses the default `cassio`
           keyspace, which requires `cassio.init` has been called.
-        - apply_schema: If true, the node table and edge table are created.
+        - apply_schema: If true, the node table and edge table are created. Tables and
+          indexes which already exist in the cluster metadata are skipped.
+        - track_degrees: If true, per-node out-degrees and per-type node and edge counts
+          are maintained in `{edge_table}_degrees` and `{edge_table}_counts` as elements
+          are inserted. These are used for hub-aware traversal and for estimates.
+        - text_embeddings_dim: The dimension of `text_embeddings`. If not specified, it
+          is read from the existing node table or, if there is none, determined by
+          embedding a test string. If specified, it must match the existing node
+          table, if any.
+        - node_cache: If set, parsed node properties are cached here when nodes are
+          retrieved, and invalidated when nodes are inserted.
+        - vector_index: If set, nearest-node queries are answered from this local index
+          instead of Cassandra. Inserted nodes are added to the index. It should be
+          bootstrapped (or loaded) from the node table before use.
+        - embedding_reducer: If set, node and query embeddings are reduced (for example,
+          truncated or projected) to `embedding_reducer.dimension` before they are
+          stored or searched. This must be used consistently for a given node table,
+          and requires `text_embeddings`. The reduced dimension must match the
+          existing node table, if any.
+        - entity_linker: If set, the names of inserted nodes (and aliases) are added to
+          this linker. It should be bootstrapped from the graph before use.
+
+        In addition to the node and edge tables, `{node_table}_names` maps normalized
+        names (and aliases) to nodes, for use by `link_nodes`. If it doesn't exist
+        (such as for graphs created before it was introduced, with
+        `apply_schema=False`), names aren't written and are only linked exactly.
+        Call `rebuild_name_index` to create and backfill it from the node table.
+
+        Source documents are stored in `{node_table}_sources`, and the sources
+        mentioning each node and relation are indexed in `{node_table}_mentions` and
+        `{edge_table}_mentions`.
+
+        Statements are prepared the first time they are used, so construction doesn't
+        require any round trips when the schema exists and `text_embeddings_dim` is
+        known.
         """
 
         session = check_resolve_session(session)
         keyspace = check_resolve_keyspace(keyspace)
 
-        self._text_embeddings = text_embeddings
-        self._text_embeddings_dim = (
+        self._session = session
+        self._keyspace = keyspace
+
+        self._node_table = node_table
+        self._edge_table = edge_table
+        self._name_table = f"{node_table}_names"
+        self._degree_table = f"{edge_table}_degrees" if track_degrees else None
+        self._counts_table = f"{edge_table}_counts" if track_degrees else None
+        self._source_table = f"{node_table}_sources"
+        self._node_mention_table = f"{node_table}_mentions"
+        self._edge_mention_table = f"{edge_table}_mentions"
+        self._node_cache = node_cache
+        self._vector_index = vector_index
+        self._entity_linker = entity_linker
+
+        if embedding_reducer is not None:
+            if text_embeddings is None:
+                raise ValueError("embedding_reducer requires text_embeddings")
+            if text_embeddings_dim not in (None, embedding_reducer.dimension):
+                raise ValueError("text_embeddings_dim must match embedding_reducer.dimension")
+            from .embedding_reduction import ReducedEmbeddings
+
+            text_embeddings = ReducedEmbeddings(text_embeddings, embedding_reducer)
+            text_embeddings_dim = embedding_reducer.dimension
+
+        if text_embeddings is None:
             # Embedding vectors must have dimension:
             #  > 0 to be created at all.
             #  > 1 to support cosine distance.
             # So we default to 2.
-            len(text_embeddings.embed_query("test string")) if text_embeddings else 2
-        )
+            text_embeddings_dim = 2
+        else:
+            existing_dim = self._existing_embeddings_dim()
+            if text_embeddings_dim is None:
+                text_embeddings_dim = existing_dim or len(
+                    text_embeddings.embed_query("test string")
+                )
+            elif existing_dim not in (None, text_embeddings_dim):
+                raise ValueError(
+                    f"Embedding dimension {text_embeddings_dim} doesn't match the dimension"
+                    f" ({existing_dim}) of the existing `{node_table}` table"
+                )
 
-        self._session = session
-        self._keyspace = keyspace
+        self._text_embeddings = text_embeddings
+        self._text_embeddings_dim = text_embeddings_dim
 
-        self._node_table = node_table
-        self._edge_table = edge_table
+        # Queries for the nodes in a partition, keyed by the projected columns.
+        self._query_nodes: Dict[Tuple[str, ...], PreparedStatement] = {}
 
         if apply_schema:
             self._apply_schema()
+            self._has_name_table = True
 
-        self._insert_node = self._session.prepare(
-            f"""INSERT INTO {keyspace}.{node_table} (
+    @cached_property
+    def _insert_node(self) -> PreparedStatement:
+        return self._session.prepare(
+            f"""INSERT INTO {self._keyspace}.{self._node_table} (
                     name, type, text_embedding, properties_json
                 ) VALUES (?, ?, ?, ?)
             """
         )
 
-        self._insert_relationship = self._session.prepare(
+    @cached_property
+    def _insert_name(self) -> PreparedStatement:
+        return self._session.prepare(
+            f"""
+            INSERT INTO {self._keyspace}.{self._name_table} (
+                normalized_name, name, type
+            ) VALUES (?, ?, ?)
+            """
+        )
+
+    @cached_property
+    def _has_name_table(self) -> bool:
+        schema = self._existing_schema()
+        return schema is not None and self._name_table in schema[0]
+
+    @cached_property
+    def _query_names(self) -> PreparedStatement:
+        return self._session.prepare(
+            f"""
+            SELECT name, type
+            FROM {self._keyspace}.{self._name_table}
+            WHERE normalized_name = ?
+            """
+        )
+
+    @cached_property
+    def _query_nodes_by_name(self) -> PreparedStatement:
+        return self._session.prepare(
             f"""
-            INSERT INTO {keyspace}.{edge_table} (
+            SELECT name, type, properties_json
+            FROM {self._keyspace}.{self._node_table}
+            WHERE name = ?
+            """
+        )
+
+    @cached_property
+    def _insert_relationship(self) -> PreparedStatement:
+        return self._session.prepare(
+            f"""
+            INSERT INTO {self._keyspace}.{self._edge_table} (
                 source_name, source_type, target_name, target_type, edge_type
             ) VALUES (?, ?, ?, ?, ?)
             """
         )
 
-        self._query_relationship = self._session.prepare(
+    @cached_property
+    def _query_nodes_by_embedding(self) -> PreparedStatement:
+        return self._session.prepare(
             f"""
-            SELECT name, type, properties_json
-            FROM {keyspace}.{node_table}
-            WHERE name = ? AND type = ?
+            SELECT name, type, properties_json,
+                similarity_cosine(text_embedding, ?) AS similarity
+            FROM {self._keyspace}.{self._node_table}
+            ORDER BY text_embedding ANN OF ?
+            LIMIT ?
             """
         )
 
-        self._query_nodes_by_embedding = self._session.prepare(
+    @cached_property
+    def _query_nodes_by_embedding_and_type(self) -> PreparedStatement:
+        return self._session.prepare(
             f"""
-            SELECT name, type, properties_json
-            FROM {keyspace}.{node_table}
+            SELECT name, type, properties_json,
+                similarity_cosine(text_embedding, ?) AS similarity
+            FROM {self._keyspace}.{self._node_table}
+            WHERE type = ?
             ORDER BY text_embedding ANN OF ?
             LIMIT ?
             """
         )
 
+    @cached_property
+    def _increment_degree(self) -> PreparedStatement:
+        return self._session.prepare(
+            f"""
+            UPDATE {self._keyspace}.{self._degree_table}
+            SET count = count + ?
+            WHERE source_name = ? AND source_type = ? AND edge_type = ?
+            """
+        )
+
+    @cached_property
+    def _increment_count(self) -> PreparedStatement:
+        return self._session.prepare(
+            f"""
+            UPDATE {self._keyspace}.{self._counts_table}
+            SET count = count + ?
+            WHERE kind = ? AND key = ?
+            """
+        )
+
+    @cached_property
+    def _query_degree(self) -> PreparedStatement:
+        return self._session.prepare(
+            f"""
+            SELECT edge_type, count
+            FROM {self._keyspace}.{self._degree_table}
+            WHERE source_name = ? AND source_type = ?
+            """
+        )
+
+    @cached_property
+    def _query_counts(self) -> PreparedStatement:
+        return self._session.prepare(
+            f"""
+            SELECT key, count
+            FROM {self._keyspace}.{self._counts_table}
+            WHERE kind = ?
+            """
+        )
+
+    @cached_property
+    def _insert_source(self) -> PreparedStatement:
+        return self._session.prepare(
+            f"""
+            INSERT INTO {self._keyspace}.{self._source_table} (
+                source_id, text, metadata_json
+            ) VALUES (?, ?, ?)
+            """
+        )
+
+    @cached_property
+    def _insert_node_mention(self) -> PreparedStatement:
+        return self._session.prepare(
+            f"""
+            INSERT INTO {self._keyspace}.{self._node_mention_table} (
+                name, type, source_id
+            ) VALUES (?, ?, ?)
+            """
+        )
+
+    @cached_property
+    def _insert_edge_mention(self) -> PreparedStatement:
+        return self._session.prepare(
+            f"""
+            INSERT INTO {self._keyspace}.{self._edge_mention_table} (
+                source_name, source_type, target_name, target_type, edge_type, source_id
+            ) VALUES (?, ?, ?, ?, ?, ?)
+            """
+        )
+
+    @cached_property
+    def _query_source(self) -> PreparedStatement:
+        return self._session.prepare(
+            f"""
+            SELECT source_id, text, metadata_json
+            FROM {self._keyspace}.{self._source_table}
+            WHERE source_id = ?
+            """
+        )
+
+    @cached_property
+    def _query_node_mentions(self) -> PreparedStatement:
+        return self._session.prepare(
+            f"""
+            SELECT name, type, source_id
+            FROM {self._keyspace}.{self._node_mention_table}
+            WHERE name = ? AND type IN ?
+            """
+        )
+
+    @cached_property
+    def _query_edge_mentions(self) -> PreparedStatement:
+        return self._session.prepare(
+            f"""
+            SELECT source_name, source_type, target_name, target_type, edge_type, source_id
+            FROM {self._keyspace}.{self._edge_mention_table}
+            WHERE source_name = ? AND source_type = ?
+            """
+        )
+
+    @cached_property
+    def _path_query_statements(self) -> PathQueryStatements:
+        edge_columns = "source_name, source_type, target_name, target_type, edge_type"
+        return PathQueryStatements(
+            nodes_by_name=self._query_nodes_by_name,
+            nodes_by_type=self._session.prepare(
+                f"""
+                SELECT name, type
+                FROM {self._keyspace}.{self._node_table}
+                WHERE type = ?
+                """
+            ),
+            edges=self._session.prepare(
+                f"""
+                SELECT {edge_columns}
+                FROM {self._keyspace}.{self._edge_table}
+                """
+            ),
+            edges_by_type=self._session.prepare(
+                f"""
+                SELECT {edge_columns}
+                FROM {self._keyspace}.{self._edge_table}
+                WHERE edge_type = ?
+                """
+            ),
+            edges_from=self._session.prepare(
+                f"""
+                SELECT target_name, target_type, edge_type
+                FROM {self._keyspace}.{self._edge_table}
+                WHERE source_name = ? AND source_type = ?
+                """
+            ),
+            edges_from_by_type=self._session.prepare(
+                f"""
+                SELECT target_name, target_type, edge_type
+                FROM {self._keyspace}.{self._edge_table}
+                WHERE source_name = ? AND source_type = ? AND edge_type = ?
+                """
+            ),
+        )
+
+    def _existing_schema(
+        self,
+    ) -> Optional[Tuple[Dict[str, TableMetadata], Dict[str, IndexMetadata]]]:
+        keyspace = self._session.cluster.metadata.keyspaces.get(self._keyspace)
+        if keyspace is None:
+            return None
+        return (keyspace.tables, keyspace.indexes)
+
+    def _existing_embeddings_dim(self) -> Optional[int]:
+        schema = self._existing_schema()
+        table = schema[0].get(self._node_table) if schema is not None else None
+        column = table.columns.get("text_embedding") if table is not None else None
+        match = _VECTOR_TYPE.fullmatch(column.cql_type) if column is not None else None
+        return int(match.group(1)) if match is not None else None
+
+    @property
+    def _create_name_table(self) -> str:
+        # Partition by normalized name, to find nodes whose names differ only in case
+        # or whitespace.
+        return f"""
+            CREATE TABLE IF NOT EXISTS {self._keyspace}.{self._name_table} (
+                normalized_name TEXT,
+                name TEXT,
+                type TEXT,
+                PRIMARY KEY (normalized_name, name, type)
+            );
+            """
+
     def _apply_schema(self):
+        # Schema changes wait for agreement across the cluster even when they don't
+        # change anything, so only create the tables and indexes which are missing
+        # from the driver's schema metadata.
+        schema = self._existing_schema()
+        tables, indexes = schema if schema is not None else ({}, {})
+
+        def _create(name: str, statement: str) -> None:
+            if name not in tables and name not in indexes:
+                self._session.execute(statement)
+
         # Partition by `name` and cluster by `type`.
         # Each `(name, type)` pair is a unique node.
         # We can enumerate all `type` values for a given `name` to identify ambiguous terms.
-        self._session.execute(
+        _create(
+            self._node_table,
             f"""
             CREATE TABLE IF NOT EXISTS {self._keyspace}.{self._node_table} (
                 name TEXT,
@@ -117,10 +543,39 @@ class CassandraKnowledgeGraph:
                 text_embedding VECTOR<FLOAT, {self._text_embeddings_dim}>,
                 PRIMARY KEY (name, type)
             );
-            """
+            """,
         )
 
-        self._session.execute(
+        _create(self._name_table, self._create_name_table)
+
+        # Source documents, keyed by a hash of their content.
+        _create(
+            self._source_table,
+            f"""
+            CREATE TABLE IF NOT EXISTS {self._keyspace}.{self._source_table} (
+                source_id TEXT,
+                text TEXT,
+                metadata_json TEXT,
+                PRIMARY KEY (source_id)
+            );
+            """,
+        )
+
+        # The sources mentioning each node, partitioned like the node table.
+        _create(
+            self._node_mention_table,
+            f"""
+            CREATE TABLE IF NOT EXISTS {self._keyspace}.{self._node_mention_table} (
+                name TEXT,
+                type TEXT,
+                source_id TEXT,
+                PRIMARY KEY (name, type, source_id)
+            );
+            """,
+        )
+
+        _create(
+            self._edge_table,
             f"""
             CREATE TABLE IF NOT EXISTS {self._keyspace}.{self._edge_table} (
                 source_name TEXT,
@@ -130,69 +585,437 @@ class CassandraKnowledgeGraph:
                 edge_type TEXT,
                 PRIMARY KEY ((source_name, source_type), target_name, target_type, edge_type)
             );
-            """
+            """,
         )
 
-        self._session.execute(
+        # The sources mentioning each relation, partitioned like the edge table.
+        _create(
+            self._edge_mention_table,
+            f"""
+            CREATE TABLE IF NOT EXISTS {self._keyspace}.{self._edge_mention_table} (
+                source_name TEXT,
+                source_type TEXT,
+                target_name TEXT,
+                target_type TEXT,
+                edge_type TEXT,
+                source_id TEXT,
+                PRIMARY KEY (
+                    (source_name, source_type), target_name, target_type, edge_type, source_id
+                )
+            );
+            """,
+        )
+
+        _create(
+            f"{self._node_table}_text_embedding_index",
             f"""
             CREATE CUSTOM INDEX IF NOT EXISTS {self._node_table}_text_embedding_index
             ON {self._keyspace}.{self._node_table} (text_embedding)
             USING 'StorageAttachedIndex';
-            """
+            """,
         )
 
-        self._session.execute(
+        _create(
+            f"{self._edge_table}_type_index",
             f"""
             CREATE CUSTOM INDEX IF NOT EXISTS {self._edge_table}_type_index
             ON {self._keyspace}.{self._edge_table} (edge_type)
             USING 'StorageAttachedIndex';
-            """
+            """,
+        )
+
+        # Allows filtering nearest-neighbor queries by node type.
+        _create(
+            f"{self._node_table}_type_index",
+            f"""
+            CREATE CUSTOM INDEX IF NOT EXISTS {self._node_table}_type_index
+            ON {self._keyspace}.{self._node_table} (type)
+            USING 'StorageAttachedIndex';
+            """,
         )
 
-    def _send_query_nearest_node(self, node: str, k: int = 1) -> ResponseFuture:
-        return self._session.execute_async(
-            self._query_nodes_by_embedding,
+        if self._degree_table is not None:
+            # Out-degree of each source node, broken down by edge type.
+            _create(
+                self._degree_table,
+                f"""
+                CREATE TABLE IF NOT EXISTS {self._keyspace}.{self._degree_table} (
+                    source_name TEXT,
+                    source_type TEXT,
+                    edge_type TEXT,
+                    count COUNTER,
+                    PRIMARY KEY ((source_name, source_type), edge_type)
+                );
+                """,
+            )
+
+            # Number of nodes of each type (kind `node_type`) and edges of each type
+            # (kind `edge_type`).
+            _create(
+                self._counts_table,
+                f"""
+                CREATE TABLE IF NOT EXISTS {self._keyspace}.{self._counts_table} (
+                    kind TEXT,
+                    key TEXT,
+                    count COUNTER,
+                    PRIMARY KEY (kind, key)
+                );
+                """,
+            )
+
+    def _send_query_nearest_nodes(
+        self,
+        embeddings: Iterable[List[float]],
+        k: int,
+        node_types: Optional[Sequence[str]],
+    ) -> List[List[ResponseFuture]]:
+        """Send the nearest-neighbor queries, returning the futures for each embedding."""
+        if not node_types:
+            return [
+                [
+                    self._session.execute_async(
+                        self._query_nodes_by_embedding, (embedding, embedding, k)
+                    )
+                ]
+                for embedding in embeddings
+            ]
+
+        # Each type is queried separately, using the SAI index on `type`. The results
+        # for each embedding are merged to find the overall `k` nearest.
+        return [
+            [
+                self._session.execute_async(
+                    self._query_nodes_by_embedding_and_type,
+                    (embedding, node_type, embedding, k),
+                )
+                for node_type in node_types
+            ]
+            for embedding in embeddings
+        ]
+
+    def _nearest_with_scores(
+        self,
+        results: Iterable[Iterable[Tuple[Node, float]]],
+        k: int,
+        min_similarity: Optional[float],
+    ) -> List[Tuple[Node, float]]:
+        """Merge the nodes retrieved for each embedding into the overall nearest nodes."""
+        scores: Dict[Node, float] = {}
+        for candidates in results:
+            nearest = sorted(candidates, key=_by_similarity, reverse=True)[:k]
+            for node, similarity in nearest:
+                if min_similarity is not None and similarity < min_similarity:
+                    break
+                scores[node] = max(scores.get(node, similarity), similarity)
+
+        return sorted(scores.items(), key=_by_similarity, reverse=True)
+
+    def _nearest_from_rows(self, rows: Iterable[Any]) -> List[Tuple[Node, float]]:
+        return [(self._parse_node(row), row.similarity) for row in rows]
+
+    def query_nearest_nodes_with_scores(
+        self,
+        nodes: Iterable[str],
+        k: int = 1,
+        min_similarity: Optional[float] = None,
+        node_types: Optional[Sequence[str]] = None,
+    ) -> List[Tuple[Node, float]]:
+        """
+        For each node, return the nearest nodes in the table and their similarity.
+
+        All of the strings are embedded in a single request, after which the
+        nearest-neighbor queries are issued concurrently.
+
+        Parameters:
+        - nodes: The strings to search for in the list of nodes.
+        - k: The number of similar nodes to retrieve for each string.
+        - min_similarity: If set, nodes with a lower similarity are omitted. This is
+          the Cassandra `similarity_cosine`, which ranges from 0 to 1.
+        - node_types: If set, only nodes of these types are retrieved.
+
+        Returns:
+        The nearest nodes and their (highest) similarity, from most to least similar.
+        """
+        if self._text_embeddings is None:
+            raise ValueError("Unable to query for nearest nodes without embeddings")
+
+        nodes = list(nodes)
+        if not nodes:
+            return []
+
+        embeddings = self._text_embeddings.embed_documents(nodes)
+        if self._vector_index is not None:
+            return self._nearest_with_scores(
+                self._vector_index.search(embeddings, k, node_types), k, min_similarity
+            )
+
+        node_futures = self._send_query_nearest_nodes(embeddings, k, node_types)
+        return self._nearest_with_scores(
             (
-                self._text_embeddings.embed_query(node),
-                k,
+                self._nearest_from_rows(row for future in futures for row in future.result())
+                for futures in node_futures
             ),
+            k,
+            min_similarity,
         )
 
-    # TODO: Allow filtering by node predicates and/or minimum similarity.
-    def query_nearest_nodes(self, nodes: Iterable[str], k: int = 1) -> Iterable[Node]:
+    async def aquery_nearest_nodes_with_scores(
+        self,
+        nodes: Iterable[str],
+        k: int = 1,
+        min_similarity: Optional[float] = None,
+        node_types: Optional[Sequence[str]] = None,
+    ) -> List[Tuple[Node, float]]:
         """
-        For each node, return the nearest nodes in the table.
+        For each node, return the nearest nodes in the table and their similarity.
+
+        All of the strings are embedded in a single request, after which the
+        nearest-neighbor queries are issued concurrently.
 
         Parameters:
         - nodes: The strings to search for in the list of nodes.
         - k: The number of similar nodes to retrieve for each string.
+        - min_similarity: If set, nodes with a lower similarity are omitted. This is
+          the Cassandra `similarity_cosine`, which ranges from 0 to 1.
+        - node_types: If set, only nodes of these types are retrieved.
+
+        Returns:
+        The nearest nodes and their (highest) similarity, from most to least similar.
         """
         if self._text_embeddings is None:
             raise ValueError("Unable to query for nearest nodes without embeddings")
 
-        node_futures: Iterable[ResponseFuture] = [
-            self._send_query_nearest_node(n, k) for n in nodes
+        nodes = list(nodes)
+        if not nodes:
+            return []
+
+        embeddings = await self._text_embeddings.aembed_documents(nodes)
+        if self._vector_index is not None:
+            return self._nearest_with_scores(
+                self._vector_index.search(embeddings, k, node_types), k, min_similarity
+            )
+
+        node_futures = self._send_query_nearest_nodes(embeddings, k, node_types)
+        results = await asyncio.gather(
+            *[asyncio.gather(*map(_await_rows, futures)) for futures in node_futures]
+        )
+        return self._nearest_with_scores(
+            (
+                self._nearest_from_rows(row for rows in per_type for row in rows)
+                for per_type in results
+            ),
+            k,
+            min_similarity,
+        )
+
+    def query_nearest_nodes(
+        self,
+        nodes: Iterable[str],
+        k: int = 1,
+        min_similarity: Optional[float] = None,
+        node_types: Optional[Sequence[str]] = None,
+    ) -> Iterable[Node]:
+        """
+        For each node, return the nearest nodes in the table.
+
+        All of the strings are embedded in a single request, after which the
+        nearest-neighbor queries are issued concurrently.
+
+        Parameters:
+        - nodes: The strings to search for in the list of nodes.
+        - k: The number of similar nodes to retrieve for each string.
+        - min_similarity: If set, nodes with a lower similarity are omitted. This is
+          the Cassandra `similarity_cosine`, which ranges from 0 to 1.
+        - node_types: If set, only nodes of these types are retrieved.
+        """
+        return [
+            node
+            for node, _ in self.query_nearest_nodes_with_scores(
+                nodes, k=k, min_similarity=min_similarity, node_types=node_types
+            )
+        ]
+
+    async def aquery_nearest_nodes(
+        self,
+        nodes: Iterable[str],
+        k: int = 1,
+        min_similarity: Optional[float] = None,
+        node_types: Optional[Sequence[str]] = None,
+    ) -> Iterable[Node]:
+        """
+        For each node, return the nearest nodes in the table.
+
+        All of the strings are embedded in a single request, after which the
+        nearest-neighbor queries are issued concurrently.
+
+        Parameters:
+        - nodes: The strings to search for in the list of nodes.
+        - k: The number of similar nodes to retrieve for each string.
+        - min_similarity: If set, nodes with a lower similarity are omitted. This is
+          the Cassandra `similarity_cosine`, which ranges from 0 to 1.
+        - node_types: If set, only nodes of these types are retrieved.
+        """
+        return [
+            node
+            for node, _ in await self.aquery_nearest_nodes_with_scores(
+                nodes, k=k, min_similarity=min_similarity, node_types=node_types
+            )
         ]
 
-        nodes = {_parse_node(n) for node_future in node_futures for n in node_future.result()}
-        return list(nodes)
+    def _link_exact(
+        self, nodes: List[Union[str, Node]], exact: List[List[Any]], normalized: List[List[Any]]
+    ) -> Tuple[List[Node], List[Node], List[str]]:
+        """
+        Resolve the results of the exact and normalized lookups for each node.
+
+        Returns the nodes linked by exact name, the keys of nodes linked by normalized
+        name (which need to be retrieved), and the names which weren't linked.
+        """
+        linked: List[Node] = []
+        keys: List[Node] = []
+        missed: List[str] = []
+        # Without the name table, there are no normalized lookups.
+        for node, exact_rows, normalized_rows in zip_longest(
+            nodes, exact, normalized, fillvalue=[]
+        ):
+            node_type = node.type if isinstance(node, Node) else None
+            if exact_rows:
+                matches = [self._parse_node(row) for row in exact_rows]
+                linked.extend([n for n in matches if n.type == node_type] or matches)
+            elif normalized_rows:
+                matches = [Node(name=row.name, type=row.type) for row in normalized_rows]
+                keys.extend([n for n in matches if n.type == node_type] or matches)
+            else:
+                missed.append(node.name if isinstance(node, Node) else node)
+        return (linked, keys, missed)
+
+    def _send_link_queries(
+        self, nodes: List[Union[str, Node]]
+    ) -> Tuple[List[ResponseFuture], List[ResponseFuture]]:
+        names = [node.name if isinstance(node, Node) else node for node in nodes]
+        exact = [self._session.execute_async(self._query_nodes_by_name, (n,)) for n in names]
+        if not self._has_name_table:
+            return (exact, [])
+        normalized = [
+            self._session.execute_async(self._query_names, (normalize_name(n),)) for n in names
+        ]
+        return (exact, normalized)
+
+    def link_nodes(
+        self,
+        nodes: Iterable[Union[str, Node]],
+        k: int = 1,
+        min_similarity: Optional[float] = None,
+    ) -> List[Node]:
+        """
+        Link names (or extracted nodes) to nodes in the graph.
+
+        Each name is first looked up exactly, then after normalizing case and
+        whitespace. Only names which don't match either way are embedded and
+        looked up with `query_nearest_nodes`. When a `Node` is given, matches of
+        the same type are preferred, but matches of any type are returned if there
+        are none of the given type.
+
+        Parameters:
+        - nodes: The names or nodes to link.
+        - k: The number of similar nodes to retrieve for names which need to be
+          looked up by similarity.
+        - min_similarity: The minimum similarity of nodes linked by similarity.
+        """
+        nodes = list(nodes)
+        exact, normalized = self._send_link_queries(nodes)
+        linked, keys, missed = self._link_exact(
+            nodes,
+            [list(future.result()) for future in exact],
+            [list(future.result()) for future in normalized],
+        )
+
+        if keys:
+            linked.extend(self.fetch_nodes(keys))
+        if missed and self._text_embeddings is not None:
+            linked.extend(self.query_nearest_nodes(missed, k=k, min_similarity=min_similarity))
+        return list(dict.fromkeys(linked))
+
+    async def alink_nodes(
+        self,
+        nodes: Iterable[Union[str, Node]],
+        k: int = 1,
+        min_similarity: Optional[float] = None,
+    ) -> List[Node]:
+        """
+        Link names (or extracted nodes) to nodes in the graph.
+
+        Each name is first looked up exactly, then after normalizing case and
+        whitespace. Only names which don't match either way are embedded and
+        looked up with `aquery_nearest_nodes`. When a `Node` is given, matches of
+        the same type are preferred, but matches of any type are returned if there
+        are none of the given type.
+
+        Parameters:
+        - nodes: The names or nodes to link.
+        - k: The number of similar nodes to retrieve for names which need to be
+          looked up by similarity.
+        - min_similarity: The minimum similarity of nodes linked by similarity.
+        """
+        nodes = list(nodes)
+        exact, normalized = self._send_link_queries(nodes)
+        linked, keys, missed = self._link_exact(
+            nodes,
+            await asyncio.gather(*map(_await_rows, exact)),
+            await asyncio.gather(*map(_await_rows, normalized)),
+        )
+
+        if keys:
+            linked.extend(await self.afetch_nodes(keys))
+        if missed and self._text_embeddings is not None:
+            linked.extend(
+                await self.aquery_nearest_nodes(missed, k=k, min_similarity=min_similarity)
+            )
+        return list(dict.fromkeys(linked))
+
+    def _embed_nodes(self, nodes: Sequence[Node]) -> List[List[float]]:
+        """Compute the `text_embedding` to store for each of the given nodes."""
+        if not self._text_embeddings:
+            return [[0.0, 1.0] for _ in nodes]
+        if not nodes:
+            return []
+
+        from yaml import dump
+
+        return self._text_embeddings.embed_documents([dump(n) for n in nodes])
+
+    def insert_source(self, document: Document) -> str:
+        """
+        Store a source document, returning its ID (a hash of its content).
+
+        Documents with the same content are only stored once.
+        """
+        source_id = source_document_id(document)
+        self._session.execute(
+            self._insert_source,
+            (source_id, document.page_content, _serialize_md_dict(document.metadata)),
+        )
+        return source_id
 
     # TODO: Introduce `ainsert` for async insertions.
     def insert(
         self,
         elements: Iterable[Union[Node, Relation]],
+        source_id: Optional[str] = None,
     ) -> None:
+        """
+        Insert nodes and relations into the graph.
+
+        Parameters:
+        - elements: The nodes and relations to insert.
+        - source_id: If set, the ID of the source document (see `insert_source`) the
+          elements were extracted from. Each element is recorded as mentioned by the
+          source, in the same batch as the element itself.
+        """
         for batch in batched(elements, n=4):
-            from yaml import dump
-            text_embeddings = (
-                iter(
-                    self._text_embeddings.embed_documents(
-                        [dump(n) for n in batch if isinstance(n, Node)]
-                    )
-                )
-                if self._text_embeddings
-                else repeat([0.0, 1.0])
-            )
+            nodes = [n for n in batch if isinstance(n, Node)]
+            embeddings = self._embed_nodes(nodes)
+            text_embeddings = iter(embeddings)
 
             batch_statement = BatchStatement()
             for element in batch:
@@ -202,32 +1025,743 @@ class CassandraKnowledgeGraph:
                         self._insert_node,
                         (element.name, element.type, next(text_embeddings), properties_json),
                     )
+                    if self._has_name_table:
+                        batch_statement.add(
+                            self._insert_name,
+                            (normalize_name(element.name), element.name, element.type),
+                        )
+                    if source_id is not None:
+                        batch_statement.add(
+                            self._insert_node_mention, (element.name, element.type, source_id)
+                        )
                 elif isinstance(element, Relation):
-                    batch_statement.add(
-                        self._insert_relationship,
-                        (
-                            element.source.name,
-                            element.source.type,
-                            element.target.name,
-                            element.target.type,
-                            element.type,
-                        ),
+                    key = (
+                        element.source.name,
+                        element.source.type,
+                        element.target.name,
+                        element.target.type,
+                        element.type,
                     )
+                    batch_statement.add(self._insert_relationship, key)
+                    if source_id is not None:
+                        batch_statement.add(self._insert_edge_mention, (*key, source_id))
                 else:
                     raise ValueError(f"Unsupported element type: {element}")
 
             # TODO: Support concurrent execution of these statements.
             self._session.execute(batch_statement)
 
+            # Invalidate once written, so concurrent reads can't re-cache the old rows.
+            if self._node_cache is not None:
+                for node in nodes:
+                    self._node_cache.invalidate(node)
+            if self._degree_table is not None:
+                self._update_degrees(batch)
+            if self._vector_index is not None:
+                self._vector_index.add(nodes, embeddings)
+            if self._entity_linker is not None:
+                self._entity_linker.add_nodes(nodes)
+
+    def insert_mentions(
+        self,
+        elements: Iterable[Union[Node, Relation]],
+        source_id: str,
+        concurrency: int = 64,
+    ) -> None:
+        """
+        Record a source document as mentioning nodes and relations.
+
+        Unlike `insert` with a `source_id`, the elements themselves aren't written, so
+        this records the sources of elements which are (or will be) inserted once.
+
+        Parameters:
+        - elements: The mentioned nodes and relations.
+        - source_id: The ID of the source document (see `insert_source`).
+        - concurrency: The maximum number of concurrent writes.
+        """
+        node_mentions: List[Tuple[str, str, str]] = []
+        edge_mentions: List[Tuple[str, str, str, str, str, str]] = []
+        for element in dict.fromkeys(elements):
+            if isinstance(element, Node):
+                node_mentions.append((element.name, element.type, source_id))
+            elif isinstance(element, Relation):
+                edge_mentions.append(
+                    (
+                        element.source.name,
+                        element.source.type,
+                        element.target.name,
+                        element.target.type,
+                        element.type,
+                        source_id,
+                    )
+                )
+            else:
+                raise ValueError(f"Unsupported element type: {element}")
+
+        execute_concurrent_with_args(
+            self._session, self._insert_node_mention, node_mentions, concurrency=concurrency
+        )
+        execute_concurrent_with_args(
+            self._session, self._insert_edge_mention, edge_mentions, concurrency=concurrency
+        )
+
+    def insert_aliases(self, aliases: Mapping[Node, Node], concurrency: int = 64) -> None:
+        """
+        Record alternative names for nodes, so `link_nodes` resolves them.
+
+        Parameters:
+        - aliases: The canonical node for each alias. Only the alias name is used.
+        - concurrency: The maximum number of concurrent writes.
+        """
+        if not self._has_name_table:
+            raise ValueError(
+                f"Aliases require the `{self._name_table}` table. Call `rebuild_name_index`"
+                " to create it."
+            )
+        execute_concurrent_with_args(
+            self._session,
+            self._insert_name,
+            [
+                (normalize_name(alias.name), node.name, node.type)
+                for alias, node in aliases.items()
+            ],
+            concurrency=concurrency,
+        )
+        if self._entity_linker is not None:
+            self._entity_linker.add((alias.name, node) for alias, node in aliases.items())
+
+    def rebuild_name_index(self, concurrency: int = 64, batch_size: int = 5000) -> None:
+        """
+        Create the `{node_table}_names` table if needed, and backfill it from the nodes.
+
+        This is needed for graphs created before the table was introduced, so that
+        `link_nodes` (and `EntityLinker.bootstrap`) find their nodes by normalized
+        name. Existing aliases are preserved.
+
+        Parameters:
+        - concurrency: The maximum number of concurrent writes.
+        - batch_size: The number of nodes to read per page, and to write at a time.
+        """
+        self._session.execute(self._create_name_table)
+        self._has_name_table = True
+
+        # The scan is iterated on this thread, since fetching pages from the driver IO
+        # threads running the concurrent writes would deadlock.
+        names: List[Tuple[str, str, str]] = []
+        for row in self._session.execute(
+            SimpleStatement(
+                f"SELECT name, type FROM {self._keyspace}.{self._node_table}",
+                fetch_size=batch_size,
+            )
+        ):
+            names.append((normalize_name(row.name), row.name, row.type))
+            if len(names) >= batch_size:
+                execute_concurrent_with_args(
+                    self._session, self._insert_name, names, concurrency=concurrency
+                )
+                names.clear()
+        execute_concurrent_with_args(
+            self._session, self._insert_name, names, concurrency=concurrency
+        )
+
+    def _mention_args(
+        self, elements: Iterable[Union[Node, Relation]]
+    ) -> Tuple[List[Tuple[str, List[str]]], List[Tuple[str, str]], Set[Union[Node, Relation]]]:
+        """Return the arguments of the node and edge mention queries for `elements`."""
+        unique = set(elements)
+        nodes = [e for e in unique if isinstance(e, Node)]
+        edge_sources = {(e.source.name, e.source.type) for e in unique if isinstance(e, Relation)}
+        return (_group_by_name(nodes), list(edge_sources), unique)
+
+    def _mentions(
+        self,
+        elements: Set[Union[Node, Relation]],
+        node_rows: Iterable[Any],
+        edge_rows: Iterable[Any],
+    ) -> Dict[Union[Node, Relation], List[str]]:
+        mentions: Dict[Union[Node, Relation], List[str]] = {}
+        for row in node_rows:
+            mentions.setdefault(Node(row.name, row.type), []).append(row.source_id)
+        for row in edge_rows:
+            relation = Relation(
+                Node(row.source_name, row.source_type),
+                Node(row.target_name, row.target_type),
+                row.edge_type,
+            )
+            # Edge mentions are read by source partition, which may include other edges.
+            if relation in elements:
+                mentions.setdefault(relation, []).append(row.source_id)
+        return mentions
+
+    def supporting_sources(
+        self, elements: Iterable[Union[Node, Relation]], max_concurrency: int = 16
+    ) -> Dict[Union[Node, Relation], List[Document]]:
+        """
+        Retrieve the source documents mentioning each of the given nodes and relations.
+
+        The mentions are read with one concurrent query per node name and per relation
+        source, and then each distinct source document is read once. Elements which
+        aren't mentioned by any stored source are omitted from the result.
+
+        Parameters:
+        - elements: The nodes and relations (such as a traversed sub-graph) to retrieve
+          sources for.
+        - max_concurrency: The maximum number of concurrent queries.
+        """
+        node_args, edge_args, elements = self._mention_args(elements)
+        node_results = execute_concurrent_with_args(
+            self._session, self._query_node_mentions, node_args, concurrency=max_concurrency
+        )
+        edge_results = execute_concurrent_with_args(
+            self._session, self._query_edge_mentions, edge_args, concurrency=max_concurrency
+        )
+        mentions = self._mentions(
+            elements,
+            (row for _success, rows in node_results for row in rows),
+            (row for _success, rows in edge_results for row in rows),
+        )
+
+        source_ids = list({id for ids in mentions.values() for id in ids})
+        source_results = execute_concurrent_with_args(
+            self._session,
+            self._query_source,
+            [(id,) for id in source_ids],
+            concurrency=max_concurrency,
+        )
+        sources = {
+            row.source_id: _parse_source(row) for _success, rows in source_results for row in rows
+        }
+        return {
+            element: [sources[id] for id in ids if id in sources]
+            for element, ids in mentions.items()
+        }
+
+    async def asupporting_sources(
+        self, elements: Iterable[Union[Node, Relation]], max_concurrency: int = 16
+    ) -> Dict[Union[Node, Relation], List[Document]]:
+        """
+        Retrieve the source documents mentioning each of the given nodes and relations.
+
+        The mentions are read with one concurrent query per node name and per relation
+        source, and then each distinct source document is read once. Elements which
+        aren't mentioned by any stored source are omitted from the result.
+
+        Parameters:
+        - elements: The nodes and relations (such as a traversed sub-graph) to retrieve
+          sources for.
+        - max_concurrency: The maximum number of concurrent queries.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _fetch(query: PreparedStatement, args: Tuple[Any, ...]) -> List[Any]:
+            async with semaphore:
+                return await _await_rows(self._session.execute_async(query, args))
+
+        node_args, edge_args, elements = self._mention_args(elements)
+        node_rows, edge_rows = await asyncio.gather(
+            asyncio.gather(*[_fetch(self._query_node_mentions, args) for args in node_args]),
+            asyncio.gather(*[_fetch(self._query_edge_mentions, args) for args in edge_args]),
+        )
+        mentions = self._mentions(
+            elements,
+            (row for rows in node_rows for row in rows),
+            (row for rows in edge_rows for row in rows),
+        )
+
+        source_ids = list({id for ids in mentions.values() for id in ids})
+        source_rows = await asyncio.gather(
+            *[_fetch(self._query_source, (id,)) for id in source_ids]
+        )
+        sources = {row.source_id: _parse_source(row) for rows in source_rows for row in rows}
+        return {
+            element: [sources[id] for id in ids if id in sources]
+            for element, ids in mentions.items()
+        }
+
+    def _update_degrees(self, elements: Iterable[Union[Node, Relation]]) -> None:
+        """Increment the degree statistics for the given (inserted) elements."""
+        degrees: Counter[Tuple[str, str, str]] = Counter()
+        counts: Counter[Tuple[str, str]] = Counter()
+        for element in elements:
+            if isinstance(element, Node):
+                counts[("node_type", element.type)] += 1
+            elif isinstance(element, Relation):
+                degrees[(element.source.name, element.source.type, element.type)] += 1
+                counts[("edge_type", element.type)] += 1
+
+        # Counter updates may not be mixed with other statements in a batch.
+        batch_statement = BatchStatement(batch_type=BatchType.COUNTER)
+        for (source_name, source_type, edge_type), count in degrees.items():
+            batch_statement.add(
+                self._increment_degree, (count, source_name, source_type, edge_type)
+            )
+        for (kind, key), count in counts.items():
+            batch_statement.add(self._increment_count, (count, kind, key))
+        if len(batch_statement) > 0:
+            self._session.execute(batch_statement)
+
+    def _check_track_degrees(self) -> None:
+        if self._degree_table is None:
+            raise ValueError("Degree statistics require `track_degrees=True`.")
+
+    def recompute_degrees(self, concurrency: int = 64, batch_size: int = 5000) -> None:
+        """
+        Recompute the degree statistics by scanning the node and edge tables.
+
+        The statistics maintained by `insert` over-count elements that are
+        inserted more than once. This replaces them with exact values.
+
+        Parameters:
+        - concurrency: The maximum number of concurrent counter updates.
+        - batch_size: The number of rows to fetch per page, and the number of
+          counter updates to write at a time.
+        """
+        self._check_track_degrees()
+
+        self._session.execute(f"TRUNCATE {self._keyspace}.{self._degree_table}")
+        self._session.execute(f"TRUNCATE {self._keyspace}.{self._counts_table}")
+
+        counts: Counter[Tuple[str, str]] = Counter()
+        for row in self._session.execute(
+            SimpleStatement(
+                f"SELECT type FROM {self._keyspace}.{self._node_table}", fetch_size=batch_size
+            )
+        ):
+            counts[("node_type", row.type)] += 1
+
+        # The scan must be iterated on this thread, rather than passed lazily to
+        # `execute_concurrent_with_args`. Fetching the next page from a driver IO
+        # thread (where the concurrent executor advances its arguments) deadlocks.
+        def _write_degrees(degrees: List[Tuple[int, str, str, str]]) -> None:
+            execute_concurrent_with_args(
+                self._session, self._increment_degree, degrees, concurrency=concurrency
+            )
+            degrees.clear()
+
+        # Rows for each source are contiguous, since the source is the partition key.
+        # This lets us write the degrees of each source once its partition is read.
+        pending: List[Tuple[int, str, str, str]] = []
+        source = None
+        degrees: Counter[str] = Counter()
+        for row in self._session.execute(
+            SimpleStatement(
+                f"""
+                SELECT source_name, source_type, edge_type
+                FROM {self._keyspace}.{self._edge_table}
+                """,
+                fetch_size=batch_size,
+            )
+        ):
+            counts[("edge_type", row.edge_type)] += 1
+            if source != (row.source_name, row.source_type):
+                if source is not None:
+                    pending.extend((c, *source, t) for t, c in degrees.items())
+                    if len(pending) >= batch_size:
+                        _write_degrees(pending)
+                source = (row.source_name, row.source_type)
+                degrees.clear()
+            degrees[row.edge_type] += 1
+        if source is not None:
+            pending.extend((c, *source, t) for t, c in degrees.items())
+        _write_degrees(pending)
+
+        execute_concurrent_with_args(
+            self._session,
+            self._increment_count,
+            [(c, kind, key) for (kind, key), c in counts.items()],
+            concurrency=concurrency,
+        )
+
+    def node_degrees(
+        self, nodes: Iterable[Node], edge_types: Optional[Sequence[str]] = None
+    ) -> Dict[Node, int]:
+        """
+        Return the out-degree of each of the given nodes.
+
+        Requires `track_degrees=True`.
+
+        Parameters:
+        - nodes: The nodes to retrieve the out-degree of.
+        - edge_types: If specified, only edges of these types are counted.
+        """
+        self._check_track_degrees()
+
+        nodes = set(nodes)
+        node_futures = [
+            (n, self._session.execute_async(self._query_degree, (n.name, n.type))) for n in nodes
+        ]
+        return {
+            n: sum(
+                row.count
+                for row in future.result()
+                if edge_types is None or row.edge_type in edge_types
+            )
+            for n, future in node_futures
+        }
+
+    def _counts(self, kind: str) -> Dict[str, int]:
+        self._check_track_degrees()
+        return {row.key: row.count for row in self._session.execute(self._query_counts, (kind,))}
+
+    def edge_type_counts(self) -> Dict[str, int]:
+        """
+        Return the number of edges of each type.
+
+        Requires `track_degrees=True`.
+        """
+        return self._counts("edge_type")
+
+    def node_type_counts(self) -> Dict[str, int]:
+        """
+        Return the number of nodes of each type.
+
+        Requires `track_degrees=True`.
+        """
+        return self._counts("node_type")
+
+    def estimate_traversal(self, start: Node | Sequence[Node], steps: int = 3) -> int:
+        """
+        Estimate the number of relations `traverse` would return, without traversing.
+
+        The first step uses the exact degrees of the starting nodes. Later steps
+        assume each newly reached node has the average out-degree of the graph.
+
+        Requires `track_degrees=True`.
+
+        Parameters:
+        - start: The starting node or nodes.
+        - steps: The number of steps of edges to follow from a start node.
+        """
+        if isinstance(start, Node):
+            start = [start]
+        total_edges = sum(self.edge_type_counts().values())
+        total_nodes = sum(self.node_type_counts().values())
+        mean_degree = total_edges / total_nodes if total_nodes else 0.0
+
+        frontier = float(sum(self.node_degrees(start).values()))
+        estimate = frontier
+        for _ in range(1, steps):
+            frontier *= mean_degree
+            estimate += frontier
+            if estimate >= total_edges:
+                break
+        return min(int(estimate), total_edges)
+
+    def plan_path_query(self, pattern: str, params: Mapping[str, Any] = {}) -> PathQueryPlan:
+        """
+        Parse and plan a path pattern (see `parse_path_pattern`).
+
+        If `track_degrees=True`, the node and edge type counts are used to choose
+        the cheapest start for the first hop.
+
+        Parameters:
+        - pattern: The path pattern, such as `(Person)-[WORKS_AT]->(Org)`.
+        - params: The values of the query parameters in the pattern.
+        """
+        path = parse_path_pattern(pattern).bind(params)
+        if self._counts_table is None:
+            return plan_path_query(path)
+        return plan_path_query(path, self.node_type_counts(), self.edge_type_counts())
+
+    def query_paths(
+        self, pattern: str, params: Mapping[str, Any] = {}, max_concurrency: int = 16
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the paths in the graph matching a path pattern.
+
+        Paths are extended one hop at a time, reading the edges of every node on the
+        frontier concurrently and keeping only the edges and nodes matching the
+        pattern.
+
+        Parameters:
+        - pattern: The path pattern, such as `(Person)-[WORKS_AT]->(Org)`.
+        - params: The values of the query parameters in the pattern.
+        - max_concurrency: The maximum number of concurrent queries.
+
+        Returns:
+        A row for each matching path, mapping the key of each node (see
+        `PathPattern.keys`) to the `Node` and the key of each edge to its type.
+        """
+        plan = self.plan_path_query(pattern, params)
+        execution = execute_path_plan(plan, self._path_query_statements)
+        try:
+            statement, args = next(execution)
+            while True:
+                results = execute_concurrent_with_args(
+                    self._session, statement, args, concurrency=max_concurrency
+                )
+                statement, args = execution.send([list(rows) for _success, rows in results])
+        except StopIteration as done:
+            return path_rows(plan.pattern, done.value)
+
+    async def aquery_paths(
+        self, pattern: str, params: Mapping[str, Any] = {}, max_concurrency: int = 16
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the paths in the graph matching a path pattern.
+
+        Paths are extended one hop at a time, reading the edges of every node on the
+        frontier concurrently and keeping only the edges and nodes matching the
+        pattern.
+
+        Parameters:
+        - pattern: The path pattern, such as `(Person)-[WORKS_AT]->(Org)`.
+        - params: The values of the query parameters in the pattern.
+        - max_concurrency: The maximum number of concurrent queries.
+
+        Returns:
+        A row for each matching path, mapping the key of each node (see
+        `PathPattern.keys`) to the `Node` and the key of each edge to its type.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _fetch(query: PreparedStatement, args: Tuple[Any, ...]) -> List[Any]:
+            async with semaphore:
+                return await _await_rows(self._session.execute_async(query, args))
+
+        plan = self.plan_path_query(pattern, params)
+        execution = execute_path_plan(plan, self._path_query_statements)
+        try:
+            statement, args = next(execution)
+            while True:
+                results = await asyncio.gather(*[_fetch(statement, a) for a in args])
+                statement, args = execution.send(list(results))
+        except StopIteration as done:
+            return path_rows(plan.pattern, done.value)
+
+    def export_snapshot(
+        self,
+        directory: Union[str, PathLike],
+        format: "SnapshotFormat" = "parquet",
+        batch_size: int = 1000,
+    ) -> None:
+        """
+        Export the node and edge tables to a columnar snapshot.
+
+        Requires the `snapshot` extra. See `knowledge_graph.snapshot.export_snapshot`.
+
+        Parameters:
+        - directory: The directory to write the snapshot files to.
+        - format: Either `"parquet"` or `"arrow"` (Arrow IPC file format).
+        - batch_size: The number of rows per record batch.
+        """
+        from .snapshot import export_snapshot
+
+        export_snapshot(self, directory, format=format, batch_size=batch_size)
+
+    def import_snapshot(
+        self,
+        directory: Union[str, PathLike],
+        format: Optional["SnapshotFormat"] = None,
+        concurrency: int = 64,
+        reembed: bool = False,
+    ) -> None:
+        """
+        Bulk import a columnar snapshot created by `export_snapshot`.
+
+        Requires the `snapshot` extra. See `knowledge_graph.snapshot.import_snapshot`.
+
+        Parameters:
+        - directory: The directory containing the snapshot files.
+        - format: The format of the snapshot. Detected from the files if not specified.
+        - concurrency: The maximum number of concurrent writes.
+        - reembed: If true, recompute node embeddings even if present in the snapshot.
+        """
+        from .snapshot import import_snapshot
+
+        import_snapshot(self, directory, format=format, concurrency=concurrency, reembed=reembed)
+
+    def _node_query(self, columns: Tuple[str, ...]) -> PreparedStatement:
+        query = self._query_nodes.get(columns)
+        if query is None:
+            query = self._session.prepare(
+                f"""
+                SELECT {", ".join(columns)}
+                FROM {self._keyspace}.{self._node_table}
+                WHERE name = ? AND type IN ?
+                """
+            )
+            self._query_nodes[columns] = query
+        return query
+
+    def _node_columns(self, properties: bool, embeddings: bool) -> Tuple[str, ...]:
+        columns = ("name", "type")
+        if properties:
+            columns += ("properties_json",)
+        if embeddings:
+            columns += ("text_embedding",)
+        return columns
+
+    def _fetch_node_rows(
+        self, nodes: Iterable[Node], columns: Tuple[str, ...], max_concurrency: int
+    ) -> Iterable[Any]:
+        results = execute_concurrent_with_args(
+            self._session,
+            self._node_query(columns),
+            _group_by_name(nodes),
+            concurrency=max_concurrency,
+        )
+        return (row for _success, rows in results for row in rows)
+
+    async def _afetch_node_rows(
+        self, nodes: Iterable[Node], columns: Tuple[str, ...], max_concurrency: int
+    ) -> Iterable[Any]:
+        query = self._node_query(columns)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _fetch(name: str, types: List[str]) -> List[Any]:
+            async with semaphore:
+                return await _await_rows(self._session.execute_async(query, (name, types)))
+
+        results = await asyncio.gather(
+            *[_fetch(name, types) for name, types in _group_by_name(nodes)]
+        )
+        return (row for rows in results for row in rows)
+
+    def _parse_node(self, row) -> Node:
+        """Parse a node row, caching its properties if they were retrieved."""
+        node = _parse_node(row)
+        if self._node_cache is not None and hasattr(row, "properties_json"):
+            self._node_cache.put(node, row.properties_json)
+        return node
+
+    def _lookup_cached(self, nodes: Iterable[Node]) -> Tuple[List[Node], List[Node]]:
+        """Return the cached nodes (with properties) and the nodes which weren't cached."""
+        if self._node_cache is None:
+            return ([], list(nodes))
+
+        cached = []
+        uncached = []
+        for node in dict.fromkeys(nodes):
+            hit = self._node_cache.get(node)
+            if hit is None:
+                uncached.append(node)
+            else:
+                cached.append(hit)
+        return (cached, uncached)
+
+    def fetch_nodes(
+        self,
+        nodes: Iterable[Node],
+        properties: bool = True,
+        max_concurrency: int = 16,
+    ) -> List[Node]:
+        """
+        Retrieve the given nodes from the node table.
+
+        Nodes sharing a name (and hence a partition) are fetched in a single query.
+        Nodes which don't exist in the table are omitted from the result.
+
+        Parameters:
+        - nodes: The nodes to retrieve.
+        - properties: Whether to retrieve and parse the properties of each node.
+        - max_concurrency: The maximum number of concurrent queries.
+        """
+        cached: List[Node] = []
+        if properties:
+            cached, nodes = self._lookup_cached(nodes)
+
+        columns = self._node_columns(properties=properties, embeddings=False)
+        rows = self._fetch_node_rows(nodes, columns, max_concurrency)
+        return cached + [self._parse_node(row) for row in rows]
+
+    async def afetch_nodes(
+        self,
+        nodes: Iterable[Node],
+        properties: bool = True,
+        max_concurrency: int = 16,
+    ) -> List[Node]:
+        """
+        Retrieve the given nodes from the node table.
+
+        Nodes sharing a name (and hence a partition) are fetched in a single query.
+        Nodes which don't exist in the table are omitted from the result.
+
+        Parameters:
+        - nodes: The nodes to retrieve.
+        - properties: Whether to retrieve and parse the properties of each node.
+        - max_concurrency: The maximum number of concurrent queries.
+        """
+        cached: List[Node] = []
+        if properties:
+            cached, nodes = self._lookup_cached(nodes)
+
+        columns = self._node_columns(properties=properties, embeddings=False)
+        rows = await self._afetch_node_rows(nodes, columns, max_concurrency)
+        return cached + [self._parse_node(row) for row in rows]
+
+    def node_embeddings(
+        self, nodes: Iterable[Node], max_concurrency: int = 16
+    ) -> Dict[Node, List[float]]:
+        """
+        Retrieve the stored `text_embedding` of the given nodes.
+
+        Parameters:
+        - nodes: The nodes to retrieve embeddings for.
+        - max_concurrency: The maximum number of concurrent queries.
+        """
+        columns = self._node_columns(properties=False, embeddings=True)
+        return {
+            _parse_node(row): row.text_embedding
+            for row in self._fetch_node_rows(nodes, columns, max_concurrency)
+        }
+
+    async def anode_embeddings(
+        self, nodes: Iterable[Node], max_concurrency: int = 16
+    ) -> Dict[Node, List[float]]:
+        """
+        Retrieve the stored `text_embedding` of the given nodes.
+
+        Parameters:
+        - nodes: The nodes to retrieve embeddings for.
+        - max_concurrency: The maximum number of concurrent queries.
+        """
+        columns = self._node_columns(properties=False, embeddings=True)
+        rows = await self._afetch_node_rows(nodes, columns, max_concurrency)
+        return {_parse_node(row): row.text_embedding for row in rows}
+
     def subgraph(
         self,
         start: Node | Sequence[Node],
         edge_filters: Sequence[str] = (),
         steps: int = 3,
+        properties: bool = True,
+        max_concurrency: int = 16,
+        pipelined: bool = False,
     ) -> Tuple[Iterable[Node], Iterable[Relation]]:
         """
         Retrieve the sub-graph from the given starting nodes.
+
+        Parameters:
+        - start: The starting node or nodes.
+        - edge_filters: Filters to apply to the edges being traversed.
+        - steps: The number of steps of edges to follow from a start node.
+        - properties: Whether to retrieve the properties of each node.
+        - max_concurrency: The maximum number of concurrent queries retrieving nodes.
+        - pipelined: If true, each node is retrieved as soon as the traversal discovers
+          it, rather than after the traversal completes. This overlaps the traversal
+          and node retrieval, but fetches nodes one at a time rather than grouped by
+          partition.
         """
+        if pipelined:
+            columns = self._node_columns(properties=properties, embeddings=False)
+            fetcher = _NodeFetcher(self._session, self._node_query(columns), max_concurrency)
+            cached: List[Node] = []
+
+            def _on_node(node: Node) -> None:
+                hit = (
+                    self._node_cache.get(node)
+                    if properties and self._node_cache is not None
+                    else None
+                )
+                if hit is None:
+                    fetcher.add(node)
+                else:
+                    cached.append(hit)
+
+            edges = self.traverse(start, edge_filters, steps, on_node=_on_node)
+            return (cached + [self._parse_node(row) for row in fetcher.result()], edges)
+
         edges = self.traverse(start, edge_filters, steps)
 
         # Create the set of nodes.
@@ -238,12 +1772,68 @@ class CassandraKnowledgeGraph:
         # TODO: We really should have a NodeKey separate from Node. Otherwise, we end
         # up in a state where two nodes can be the "same" but with different properties,
         # etc.
+        nodes = self.fetch_nodes(nodes, properties=properties, max_concurrency=max_concurrency)
 
-        node_futures: Iterable[ResponseFuture] = [
-            self._session.execute_async(self._query_relationship, (n.name, n.type)) for n in nodes
-        ]
+        return (nodes, edges)
+
+    async def asubgraph(
+        self,
+        start: Node | Sequence[Node],
+        edge_filters: Sequence[str] = (),
+        steps: int = 3,
+        properties: bool = True,
+        max_concurrency: int = 16,
+        pipelined: bool = False,
+    ) -> Tuple[Iterable[Node], Iterable[Relation]]:
+        """
+        Retrieve the sub-graph from the given starting nodes.
 
-        nodes = [_parse_node(n) for future in node_futures for n in future.result()]
+        Parameters:
+        - start: The starting node or nodes.
+        - edge_filters: Filters to apply to the edges being traversed.
+        - steps: The number of steps of edges to follow from a start node.
+        - properties: Whether to retrieve the properties of each node.
+        - max_concurrency: The maximum number of concurrent queries retrieving nodes.
+        - pipelined: If true, each node is retrieved as soon as the traversal discovers
+          it, rather than after the traversal completes. This overlaps the traversal
+          and node retrieval, but fetches nodes one at a time rather than grouped by
+          partition.
+        """
+        if pipelined:
+            columns = self._node_columns(properties=properties, embeddings=False)
+            query = self._node_query(columns)
+            semaphore = asyncio.Semaphore(max_concurrency)
+            fetches: List[asyncio.Task[List[Any]]] = []
+            cached: List[Node] = []
+
+            async def _fetch(node: Node) -> List[Any]:
+                async with semaphore:
+                    return await _await_rows(
+                        self._session.execute_async(query, (node.name, [node.type]))
+                    )
+
+            def _on_node(node: Node) -> None:
+                hit = (
+                    self._node_cache.get(node)
+                    if properties and self._node_cache is not None
+                    else None
+                )
+                if hit is None:
+                    fetches.append(asyncio.create_task(_fetch(node)))
+                else:
+                    cached.append(hit)
+
+            edges = await self.atraverse(start, edge_filters, steps, on_node=_on_node)
+            results = await asyncio.gather(*fetches)
+            nodes = [self._parse_node(row) for rows in results for row in rows]
+            return (cached + nodes, edges)
+
+        edges = await self.atraverse(start, edge_filters, steps)
+
+        nodes = {n for e in edges for n in (e.source, e.target)}
+        nodes = await self.afetch_nodes(
+            nodes, properties=properties, max_concurrency=max_concurrency
+        )
 
         return (nodes, edges)
 
@@ -252,6 +1842,10 @@ class CassandraKnowledgeGraph:
         start: Node | Sequence[Node],
         edge_filters: Sequence[str] = (),
         steps: int = 3,
+        max_degree: Optional[int] = None,
+        hub_policy: HubPolicy = "skip",
+        on_node: Optional[Callable[[Node], None]] = None,
+        timeout: Optional[float] = None,
     ) -> Iterable[Relation]:
         """
         Traverse the graph from the given starting nodes and return the resulting sub-graph.
@@ -260,6 +1854,14 @@ class CassandraKnowledgeGraph:
         - start: The starting node or nodes.
         - edge_filters: Filters to apply to the edges being traversed.
         - steps: The number of steps of edges to follow from a start node.
+        - max_degree: If set, nodes reached with an out-degree greater than this are
+          treated as hubs. Requires `track_degrees=True`.
+        - hub_policy: Whether to `"skip"` the edges out of hubs or `"sample"` at most
+          `max_degree` of them.
+        - on_node: If set, called once for each node in the sub-graph as soon as it is
+          discovered. This is called on a driver IO thread, and must not block.
+        - timeout: If set, the maximum number of seconds to traverse for, after which
+          the relations found so far are returned.
 
         Returns:
         An iterable over relations in the traversed sub-graph.
@@ -276,6 +1878,11 @@ class CassandraKnowledgeGraph:
             steps=steps,
             session=self._session,
             keyspace=self._keyspace,
+            degree_table=self._degree_table,
+            max_degree=max_degree,
+            hub_policy=hub_policy,
+            on_node=on_node,
+            timeout=timeout,
         )
 
     async def atraverse(
@@ -283,6 +1890,10 @@ class CassandraKnowledgeGraph:
         start: Node | Sequence[Node],
         edge_filters: Sequence[str] = (),
         steps: int = 3,
+        max_degree: Optional[int] = None,
+        hub_policy: HubPolicy = "skip",
+        on_node: Optional[Callable[[Node], None]] = None,
+        timeout: Optional[float] = None,
     ) -> Iterable[Relation]:
         """
         Traverse the graph from the given starting nodes and return the resulting sub-graph.
@@ -291,6 +1902,15 @@ class CassandraKnowledgeGraph:
         - start: The starting node or nodes.
         - edge_filters: Filters to apply to the edges being traversed.
         - steps: The number of steps of edges to follow from a start node.
+        - max_degree: If set, nodes reached with an out-degree greater than this are
+          treated as hubs. Requires `track_degrees=True`.
+        - hub_policy: Whether to `"skip"` the edges out of hubs or `"sample"` at most
+          `max_degree` of them.
+        - on_node: If set, called once for each node in the sub-graph as soon as it is
+          discovered. This is called on the event loop running the traversal (so it
+          may create tasks), and must not block.
+        - timeout: If set, the maximum number of seconds to traverse for, after which
+          the relations found so far are returned.
 
         Returns:
         An iterable over relations in the traversed sub-graph.
@@ -307,4 +1927,9 @@ class CassandraKnowledgeGraph:
             steps=steps,
             session=self._session,
             keyspace=self._keyspace,
+            degree_table=self._degree_table,
+            max_degree=max_degree,
+            hub_policy=hub_policy,
+            on_node=on_node,
+            timeout=timeout,
         )
@@ -1,7 +1,21 @@
+import re
 from pathlib import Path
-from typing import Dict, List, Self, Sequence, Union
-
-from langchain_community.graphs.graph_document import GraphDocument
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Self,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from langchain_community.graphs.graph_document import GraphDocument, Relationship
+from langchain_community.graphs.graph_document import Node as LangChainNode
 from langchain_core.pydantic_v1 import BaseModel
 
 from knowledge_graph.traverse import Node, Relation
@@ -72,41 +86,259 @@ class KnowledgeSchema(BaseModel):
         return to_yaml_str(self)
 
 
-class KnowledgeSchemaValidator:
-    def __init__(self, schema: KnowledgeSchema) -> None:
-        self._schema = schema
+def _normalize_type(type: str) -> str:
+    return re.sub(r"[\s_-]+", "", type).casefold()
+
+
+class KnowledgeSchemaIndex:
+    def __init__(
+        self,
+        schema: KnowledgeSchema,
+        node_type_aliases: Mapping[str, str] = {},
+        edge_type_aliases: Mapping[str, str] = {},
+    ) -> None:
+        """
+        Compile `schema` into hashed sets for constant-time lookups.
+
+        Parameters:
+        - schema: The knowledge schema to index.
+        - node_type_aliases: Additional names which should resolve to a node type.
+        - edge_type_aliases: Additional names which should resolve to an edge type.
+        """
+        self.node_types: FrozenSet[str] = frozenset(node.type for node in schema.nodes)
+        self.edge_types: FrozenSet[str] = frozenset(r.edge_type for r in schema.relationships)
+
+        # The allowed `(edge_type, source_type, target_type)` triples.
+        self.triples: FrozenSet[Tuple[str, str, str]] = frozenset(
+            (r.edge_type, source_type, target_type)
+            for r in schema.relationships
+            for source_type in r.source_types
+            for target_type in r.target_types
+        )
+
+        self._node_types = {_normalize_type(t): t for t in self.node_types}
+        self._node_types.update((_normalize_type(a), t) for a, t in node_type_aliases.items())
+        self._edge_types = {_normalize_type(t): t for t in self.edge_types}
+        self._edge_types.update((_normalize_type(a), t) for a, t in edge_type_aliases.items())
+
+    def allows_node(self, node_type: str) -> bool:
+        return node_type in self.node_types
+
+    def allows_relationship(self, edge_type: str, source_type: str, target_type: str) -> bool:
+        return (edge_type, source_type, target_type) in self.triples
+
+    def resolve_node_type(self, node_type: str) -> Optional[str]:
+        """
+        Return the schema node type `node_type` refers to, or `None`.
 
-        self._nodes = {node.type: node for node in schema.nodes}
+        Types are matched exactly, or to a schema type or alias ignoring case,
+        whitespace, underscores and hyphens.
+        """
+        if node_type in self.node_types:
+            return node_type
+        return self._node_types.get(_normalize_type(node_type))
 
-        self._relationships: Dict[str, List[RelationshipSchema]] = {}
-        for r in schema.relationships:
-            self._relationships.setdefault(r.edge_type, []).append(r)
+    def resolve_edge_type(self, edge_type: str) -> Optional[str]:
+        """Return the schema edge type `edge_type` refers to, or `None`."""
+        if edge_type in self.edge_types:
+            return edge_type
+        return self._edge_types.get(_normalize_type(edge_type))
 
-            # TODO: Validate the relationship.
-            # source/target type should exist in nodes, edge_type should exist in edges
 
-    def validate_graph_document(self, document: GraphDocument):
-        e = ValueError("Invalid graph document for schema")
-        for node_type in {node.type for node in document.nodes}:
-            if node_type not in self._nodes:
-                e.add_note(f"No node type '{node_type}")
+class KnowledgeSchemaValidator:
+    def __init__(self, schema: Union[KnowledgeSchema, KnowledgeSchemaIndex]) -> None:
+        """
+        Create a validator for graph documents.
+
+        Parameters:
+        - schema: The knowledge schema (or compiled index) to validate against.
+        """
+        if isinstance(schema, KnowledgeSchema):
+            schema = KnowledgeSchemaIndex(schema)
+        self._index = schema
+
+    def errors(self, document: GraphDocument) -> List[str]:
+        """Return a description of each element of `document` not allowed by the schema."""
+        index = self._index
+        errors = [
+            f"No node type '{node_type}'"
+            for node_type in {node.type for node in document.nodes}
+            if not index.allows_node(node_type)
+        ]
         for r in document.relationships:
-            relationships = self._relationships.get(r.edge_type, None)
-            if relationships is None:
-                e.add_note(f"No edge type '{r.edge_type}")
-            else:
-                relationship = next(
-                    (
-                        candidate
-                        for candidate in relationships
-                        if r.source_type in candidate.source_types
-                        if r.target_type in candidate.target_types
-                    )
+            if r.type not in index.edge_types:
+                errors.append(f"No edge type '{r.type}'")
+            elif not index.allows_relationship(r.type, r.source.type, r.target.type):
+                errors.append(
+                    f"No relationship allows ({r.source.id} [{r.source.type}]"
+                    f" -> {r.type} -> {r.target.id} [{r.target.type}])"
                 )
-                if relationship is None:
-                    e.add_note(
-                        f"No relationship allows ({r.source_id} -> {r.type} -> {r.target.type})"
-                    )
+        return errors
+
+    def validate_graph_document(self, document: GraphDocument) -> None:
+        """Raise a `ValueError` (with a note per error) if `document` isn't allowed."""
+        errors = self.errors(document)
+        if errors:
+            e = ValueError("Invalid graph document for schema")
+            for error in errors:
+                e.add_note(error)
+            raise e
 
-        if e.__notes__:
+    def validate_graph_documents(self, documents: Iterable[GraphDocument]) -> None:
+        """Raise a `ValueError` (with a note per error) if any document isn't allowed."""
+        e = ValueError("Invalid graph documents for schema")
+        for idx, document in enumerate(documents):
+            for error in self.errors(document):
+                e.add_note(f"Document {idx}: {error}")
+        if getattr(e, "__notes__", None):
             raise e
+
+    def _repair_node(self, node: LangChainNode, repair: bool) -> Optional[LangChainNode]:
+        if self._index.allows_node(node.type):
+            return node
+        node_type = self._index.resolve_node_type(node.type) if repair else None
+        if node_type is None:
+            return None
+        return LangChainNode(id=node.id, type=node_type, properties=node.properties)
+
+    def _repair_relationship(
+        self, relationship: Relationship, repair: bool
+    ) -> Optional[Relationship]:
+        source = self._repair_node(relationship.source, repair)
+        target = self._repair_node(relationship.target, repair)
+        if source is None or target is None:
+            return None
+
+        edge_type = relationship.type
+        if repair and edge_type not in self._index.edge_types:
+            edge_type = self._index.resolve_edge_type(edge_type) or edge_type
+
+        if self._index.allows_relationship(edge_type, source.type, target.type):
+            pass
+        elif repair and self._index.allows_relationship(edge_type, target.type, source.type):
+            # The LLM sometimes extracts a relationship in the wrong direction.
+            source, target = target, source
+        else:
+            return None
+
+        if (source, target, edge_type) == (
+            relationship.source,
+            relationship.target,
+            relationship.type,
+        ):
+            return relationship
+        return Relationship(
+            source=source, target=target, type=edge_type, properties=relationship.properties
+        )
+
+    def filter_graph_document(
+        self, document: GraphDocument, repair: bool = True
+    ) -> GraphDocument:
+        """
+        Return `document` without the elements which aren't allowed by the schema.
+
+        Parameters:
+        - document: The graph document to filter.
+        - repair: If true, elements whose types differ from a schema type only in
+          case, whitespace or punctuation (or which are aliases) are remapped to the
+          schema type, and relationships which are only allowed in the opposite
+          direction are reversed, rather than being dropped.
+        """
+        # Repairing may map distinct nodes to the same `(id, type)`, so de-duplicate.
+        nodes: Dict[Tuple[str, str], LangChainNode] = {}
+        for node in document.nodes:
+            repaired = self._repair_node(node, repair)
+            if repaired is not None:
+                nodes.setdefault((repaired.id, repaired.type), repaired)
+        relationships = [
+            repaired
+            for repaired in (
+                self._repair_relationship(relationship, repair)
+                for relationship in document.relationships
+            )
+            if repaired is not None
+        ]
+        return GraphDocument(
+            nodes=list(nodes.values()), relationships=relationships, source=document.source
+        )
+
+    def filter_graph_documents(
+        self, documents: Iterable[GraphDocument], repair: bool = True
+    ) -> List[GraphDocument]:
+        """Filter (and optionally repair) each of `documents`. See `filter_graph_document`."""
+        return [self.filter_graph_document(document, repair) for document in documents]
+
+
+def _normalized_types(types: Iterable[str]) -> Set[str]:
+    return {_normalize_type(t) for t in types}
+
+
+def _merge_relationship(
+    merged: List[RelationshipSchema], relationship: RelationshipSchema
+) -> None:
+    """Merge `relationship` into the relationships with the same edge type."""
+    sources = _normalized_types(relationship.source_types)
+    targets = _normalized_types(relationship.target_types)
+    for existing in merged:
+        # (S1 x T) + (S2 x T) = (S1 + S2) x T, so this allows no other pairs.
+        if _normalized_types(existing.target_types) == targets:
+            existing.source_types.extend(relationship.source_types)
+        elif _normalized_types(existing.source_types) == sources:
+            existing.target_types.extend(relationship.target_types)
+        else:
+            continue
+        if not existing.description:
+            existing.description = relationship.description
+        return
+
+    # Edge types are spelled as in the first relationship with the edge type.
+    edge_type = merged[0].edge_type if merged else relationship.edge_type
+    merged.append(
+        relationship.copy(
+            update={
+                "edge_type": edge_type,
+                "source_types": list(relationship.source_types),
+                "target_types": list(relationship.target_types),
+            }
+        )
+    )
+
+
+def merge_schemas(schemas: Iterable[KnowledgeSchema]) -> KnowledgeSchema:
+    """
+    Merge `schemas` into a single schema.
+
+    Node and edge types which differ only in case, whitespace, underscores or
+    hyphens are unified, keeping the first spelling (and the first non-empty
+    description). Relationships with the same edge type are unified when they have
+    the same source types or the same target types, allowing the union of the other.
+    Other relationships with the same edge type are kept separate, so the merged
+    schema only allows the source and target type pairs allowed by an input.
+
+    Parameters:
+    - schemas: The schemas to merge, in order of precedence.
+    """
+    nodes: Dict[str, NodeSchema] = {}
+    relationships: Dict[str, List[RelationshipSchema]] = {}
+    for schema in schemas:
+        for node in schema.nodes:
+            existing = nodes.setdefault(_normalize_type(node.type), node.copy())
+            if not existing.description:
+                existing.description = node.description
+        for relationship in schema.relationships:
+            _merge_relationship(
+                relationships.setdefault(_normalize_type(relationship.edge_type), []),
+                relationship,
+            )
+
+    # Unify node types once all schemas have been seen, since a relationship may
+    # mention a node type before the schema declaring it.
+    def _node_types(types: List[str]) -> List[str]:
+        unified = (nodes.get(_normalize_type(t)) for t in types)
+        return list(dict.fromkeys(n.type if n else t for n, t in zip(unified, types)))
+
+    merged_relationships = [r for merged in relationships.values() for r in merged]
+    for merged in merged_relationships:
+        merged.source_types = _node_types(merged.source_types)
+        merged.target_types = _node_types(merged.target_types)
+    return KnowledgeSchema(nodes=list(nodes.values()), relationships=merged_relationships)
@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from .traverse import Node
+
+
+class NodeCacheStats(NamedTuple):
+    hits: int
+    """The number of lookups which found an entry."""
+
+    misses: int
+    """The number of lookups which didn't find an (unexpired) entry."""
+
+    entries: int
+    """The number of entries currently in the cache."""
+
+    memory_bytes: int
+    """Approximate size of the cached names, types and serialized properties."""
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class _Entry(NamedTuple):
+    properties: Dict[str, Any]
+    size: int
+    expires_at: Optional[float]
+
+
+class NodePropertyCache:
+    def __init__(self, max_entries: int = 10_000, ttl: Optional[float] = None) -> None:
+        """
+        Create a bounded LRU cache of parsed node properties, keyed by `(name, type)`.
+
+        Parameters:
+        - max_entries: The maximum number of nodes to cache. The least recently used
+          entries are evicted first.
+        - ttl: If set, the number of seconds after which an entry expires.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least one")
+
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Tuple[str, str], _Entry] = OrderedDict()
+        self._memory_bytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, node: Node) -> Optional[Node]:
+        """Return the cached node (with properties), or `None` if it isn't cached."""
+        key = (node.name, node.type)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at is not None:
+                if entry.expires_at <= time.monotonic():
+                    self._remove(key)
+                    entry = None
+
+            if entry is None:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return Node(name=node.name, type=node.type, properties=dict(entry.properties))
+
+    def put(self, node: Node, properties_json: Optional[str] = None) -> None:
+        """
+        Cache the properties of `node`.
+
+        Parameters:
+        - node: The node (with parsed properties) to cache.
+        - properties_json: The serialized properties, used to estimate memory use.
+        """
+        key = (node.name, node.type)
+        size = len(node.name) + len(node.type) + len(properties_json or "")
+        expires_at = time.monotonic() + self._ttl if self._ttl is not None else None
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = _Entry(dict(node.properties), size, expires_at)
+            self._memory_bytes += size
+            while len(self._entries) > self._max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, node: Node) -> None:
+        """Remove `node` from the cache, if present."""
+        with self._lock:
+            self._remove((node.name, node.type))
+
+    def clear(self) -> None:
+        """Remove all entries from the cache. Statistics are preserved."""
+        with self._lock:
+            self._entries.clear()
+            self._memory_bytes = 0
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry.size
+
+    def stats(self) -> NodeCacheStats:
+        """Return the hit and memory statistics of the cache."""
+        with self._lock:
+            return NodeCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                entries=len(self._entries),
+                memory_bytes=self._memory_bytes,
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,318 @@
+import json
+import re
+from typing import (
+    Any,
+    Dict,
+    Generator,
+    List,
+    Literal,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .traverse import Node
+
+PathStart = Literal["nodes", "edges"]
+
+# A matched path: nodes alternating with the types of the edges between them.
+Path = Tuple[Union[Node, str], ...]
+
+_TYPES = r"\?|\w+(?:\s*\|\s*\w+)*"
+_ALIAS = r"(?:(?P<alias>\w+)\s*:\s*)?"
+_NODE = re.compile(
+    rf"\(\s*{_ALIAS}(?P<types>{_TYPES})\s*"
+    r"(?:(?P<name>\"(?:[^\"\\]|\\.)*\")|\$(?P<parameter>\w+))?\s*\)"
+)
+_EDGE = re.compile(rf"-\[\s*{_ALIAS}(?P<types>{_TYPES})\s*\]->")
+_WHITESPACE = re.compile(r"\s*")
+
+
+class NodePattern(NamedTuple):
+    types: Optional[Tuple[str, ...]] = None
+    """The types a matching node may have, or `None` to match any type."""
+
+    name: Optional[str] = None
+    """The name a matching node must have, if any."""
+
+    parameter: Optional[str] = None
+    """The query parameter containing the name, if any."""
+
+    alias: Optional[str] = None
+    """The key of the node in result rows, if any."""
+
+    def matches(self, node: Node) -> bool:
+        return (self.types is None or node.type in self.types) and (
+            self.name is None or node.name == self.name
+        )
+
+
+class EdgePattern(NamedTuple):
+    types: Optional[Tuple[str, ...]] = None
+    """The types a matching edge may have, or `None` to match any type."""
+
+    alias: Optional[str] = None
+    """The key of the edge type in result rows, if any."""
+
+    def matches(self, edge_type: str) -> bool:
+        return self.types is None or edge_type in self.types
+
+
+class PathPattern(NamedTuple):
+    nodes: Tuple[NodePattern, ...]
+    edges: Tuple[EdgePattern, ...]
+
+    def keys(self) -> List[str]:
+        """
+        Return the keys of the nodes and edges of matched paths in result rows.
+
+        Nodes and edges are keyed by their alias, or else by `n<index>` and
+        `e<index>`.
+        """
+        keys: List[str] = []
+        for idx, node in enumerate(self.nodes):
+            if idx > 0:
+                edge = self.edges[idx - 1]
+                keys.append(edge.alias or f"e{idx - 1}")
+            keys.append(node.alias or f"n{idx}")
+        return keys
+
+    def bind(self, params: Mapping[str, Any]) -> "PathPattern":
+        """Return the pattern with the names of nodes read from `params`."""
+        nodes = []
+        for node in self.nodes:
+            if node.parameter is not None:
+                if node.parameter not in params:
+                    raise ValueError(f"Missing value for query parameter `${node.parameter}`")
+                node = node._replace(name=str(params[node.parameter]))
+            nodes.append(node)
+        return self._replace(nodes=tuple(nodes))
+
+
+def _types(match: "re.Match[str]") -> Optional[Tuple[str, ...]]:
+    types = match["types"]
+    return None if types == "?" else tuple(t.strip() for t in types.split("|"))
+
+
+def _syntax_error(pattern: str, pos: int, expected: str) -> ValueError:
+    return ValueError(f"Expected {expected} at position {pos} of path pattern {pattern!r}")
+
+
+def parse_path_pattern(pattern: str) -> PathPattern:
+    """
+    Parse a path pattern, such as `(Person)-[WORKS_AT]->(Org)-[LOCATED_IN]->(?)`.
+
+    A path alternates nodes and (outgoing) edges, starting and ending with a node.
+
+    - Nodes are written `(Type)`, `(TypeA|TypeB)` or `(?)` for any type. The type
+      may be followed by a name, as a JSON string (`(Person "Marie Curie")`) or a
+      query parameter (`(Person $name)`).
+    - Edges are written `-[TYPE]->`, `-[TYPE_A|TYPE_B]->` or `-[?]->` for any type.
+    - Nodes and edges may be given an alias, which is their key in result rows, by
+      prefixing the type with `alias:`, such as `(p:Person)`.
+    """
+    nodes: List[NodePattern] = []
+    edges: List[EdgePattern] = []
+    pos = _WHITESPACE.match(pattern).end()  # type: ignore[union-attr]
+    while True:
+        node = _NODE.match(pattern, pos)
+        if node is None:
+            raise _syntax_error(pattern, pos, "a node such as `(Person)`")
+        name = json.loads(node["name"]) if node["name"] is not None else None
+        nodes.append(NodePattern(_types(node), name, node["parameter"], node["alias"]))
+        pos = _WHITESPACE.match(pattern, node.end()).end()  # type: ignore[union-attr]
+        if pos == len(pattern):
+            break
+
+        edge = _EDGE.match(pattern, pos)
+        if edge is None:
+            raise _syntax_error(pattern, pos, "an edge such as `-[WORKS_AT]->`")
+        edges.append(EdgePattern(_types(edge), edge["alias"]))
+        pos = _WHITESPACE.match(pattern, edge.end()).end()  # type: ignore[union-attr]
+
+    if not edges:
+        raise ValueError(f"Path pattern {pattern!r} must contain at least one edge")
+    path = PathPattern(tuple(nodes), tuple(edges))
+    keys = path.keys()
+    if len(set(keys)) != len(keys):
+        raise ValueError(f"Path pattern {pattern!r} has duplicate aliases")
+    return path
+
+
+class PathQueryPlan(NamedTuple):
+    pattern: PathPattern
+    """The (bound) pattern to match."""
+
+    start: PathStart
+    """
+    How the first hop is read. With `"nodes"`, the nodes matching the first node
+    pattern are looked up and their edge partitions read. With `"edges"`, the
+    edges matching the first edge pattern are read from the edge type index.
+    """
+
+    estimated_cost: Optional[int]
+    """The estimated partitions or rows read by the first hop, if known."""
+
+
+def _count(types: Optional[Sequence[str]], counts: Optional[Mapping[str, int]]) -> Optional[int]:
+    if counts is None:
+        return None
+    if types is None:
+        return sum(counts.values())
+    return sum(counts.get(t, 0) for t in types)
+
+
+def plan_path_query(
+    pattern: PathPattern,
+    node_type_counts: Optional[Mapping[str, int]] = None,
+    edge_type_counts: Optional[Mapping[str, int]] = None,
+) -> PathQueryPlan:
+    """
+    Plan the execution of a path pattern.
+
+    Edges are only stored in the partition of their source, so paths are always
+    extended forwards. The planner chooses where the first hop starts: from the
+    nodes matching the first node pattern, or from the edges matching the first
+    edge pattern. A named first node is always cheapest. Otherwise, the cheaper of
+    the number of nodes and edges of the given types is used, if statistics are
+    available, and the edge type index is preferred if not.
+
+    Parameters:
+    - pattern: The pattern to plan, with its parameters bound.
+    - node_type_counts: The number of nodes of each type, if known.
+    - edge_type_counts: The number of edges of each type, if known.
+    """
+    for node in pattern.nodes:
+        if node.parameter is not None and node.name is None:
+            raise ValueError(f"Missing value for query parameter `${node.parameter}`")
+
+    first, edge = pattern.nodes[0], pattern.edges[0]
+    if first.name is not None:
+        return PathQueryPlan(pattern, "nodes", len(first.types) if first.types else 1)
+
+    edge_cost = _count(edge.types, edge_type_counts)
+    if first.types is None:
+        # Nodes can only be looked up by name or type.
+        return PathQueryPlan(pattern, "edges", edge_cost)
+
+    node_cost = _count(first.types, node_type_counts)
+    if node_cost is None or edge_cost is None:
+        start: PathStart = "edges" if edge.types is not None else "nodes"
+        return PathQueryPlan(pattern, start, None)
+    if node_cost <= edge_cost:
+        return PathQueryPlan(pattern, "nodes", node_cost)
+    return PathQueryPlan(pattern, "edges", edge_cost)
+
+
+class PathQueryStatements(NamedTuple):
+    """The prepared statements used to execute path queries."""
+
+    nodes_by_name: Any
+    """`SELECT name, type ... WHERE name = ?`"""
+
+    nodes_by_type: Any
+    """`SELECT name, type ... WHERE type = ?`"""
+
+    edges: Any
+    """`SELECT source_name, source_type, target_name, target_type, edge_type ...`"""
+
+    edges_by_type: Any
+    """As `edges`, with `WHERE edge_type = ?`."""
+
+    edges_from: Any
+    """`SELECT target_name, target_type, edge_type ... WHERE source_name = ? ...`"""
+
+    edges_from_by_type: Any
+    """As `edges_from`, with `AND edge_type = ?`."""
+
+
+def _last_node(path: Path) -> Node:
+    node = path[-1]
+    assert isinstance(node, Node)
+    return node
+
+
+# A batch of queries: a statement and the arguments of each concurrent execution.
+PathQueryBatch = Tuple[Any, List[Tuple[Any, ...]]]
+
+
+def execute_path_plan(
+    plan: PathQueryPlan, statements: PathQueryStatements
+) -> Generator[PathQueryBatch, List[List[Any]], List[Path]]:
+    """
+    Execute `plan`, independently of how queries are executed.
+
+    This yields a batch of queries for each hop, and must be sent the rows of each
+    query in the batch (in order). The node and edge patterns are applied to the
+    rows of each hop, so only matching paths are extended. It returns the matched
+    paths.
+    """
+    pattern = plan.pattern
+    first = pattern.nodes[0]
+    paths: List[Path]
+    if plan.start == "edges":
+        edge, target = pattern.edges[0], pattern.nodes[1]
+        if edge.types is None:
+            results = yield (statements.edges, [()])
+        else:
+            results = yield (statements.edges_by_type, [(t,) for t in edge.types])
+        paths = []
+        for rows in results:
+            for row in rows:
+                path = (
+                    Node(row.source_name, row.source_type),
+                    row.edge_type,
+                    Node(row.target_name, row.target_type),
+                )
+                if first.matches(path[0]) and edge.matches(path[1]) and target.matches(path[2]):
+                    paths.append(path)
+        hops = 1
+    else:
+        if first.name is not None and first.types is not None:
+            # The nodes needn't be looked up, since only their edges are read.
+            nodes = [Node(first.name, t) for t in first.types]
+        else:
+            if first.name is not None:
+                results = yield (statements.nodes_by_name, [(first.name,)])
+            else:
+                assert first.types is not None
+                results = yield (statements.nodes_by_type, [(t,) for t in first.types])
+            nodes = [Node(row.name, row.type) for rows in results for row in rows]
+        paths = [(node,) for node in dict.fromkeys(nodes) if first.matches(node)]
+        hops = 0
+
+    for hop in range(hops, len(pattern.edges)):
+        if not paths:
+            break
+        edge, target = pattern.edges[hop], pattern.nodes[hop + 1]
+        frontier = list(dict.fromkeys(_last_node(path) for path in paths))
+        if edge.types is not None and len(edge.types) == 1:
+            results = yield (
+                statements.edges_from_by_type,
+                [(n.name, n.type, edge.types[0]) for n in frontier],
+            )
+        else:
+            results = yield (statements.edges_from, [(n.name, n.type) for n in frontier])
+
+        steps: Dict[Node, List[Tuple[str, Node]]] = {}
+        for source, rows in zip(frontier, results):
+            matched = steps.setdefault(source, [])
+            for row in rows:
+                node = Node(row.target_name, row.target_type)
+                if edge.matches(row.edge_type) and target.matches(node):
+                    matched.append((row.edge_type, node))
+        paths = [path + step for path in paths for step in steps[_last_node(path)]]
+    return paths
+
+
+def _sort_key(path: Path) -> List[Tuple[str, ...]]:
+    return [(e.name, e.type) if isinstance(e, Node) else (e,) for e in path]
+
+
+def path_rows(pattern: PathPattern, paths: Sequence[Path]) -> List[Dict[str, Any]]:
+    """Return the rows of the matched paths, in a deterministic order."""
+    keys = pattern.keys()
+    return [dict(zip(keys, path)) for path in sorted(paths, key=_sort_key)]
@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import time
+from typing import List, Optional, Tuple, Type
+
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable, RunnableLambda
+
+
+class _Bucket:
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.available = per_minute
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Reserve `amount` and return how long to wait before using it."""
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+        self.available -= amount
+        return max(0.0, -self.available / self.rate)
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ) -> None:
+        """
+        Limit the rate of LLM requests and (estimated) prompt tokens.
+
+        Each limit is a token bucket that starts full and refills continuously, so
+        short bursts up to the per-minute quota are allowed. A single instance may be
+        shared between threads, event loops and extractors using the same quota.
+
+        Parameters:
+        - requests_per_minute: The maximum number of requests per minute, if any.
+        - tokens_per_minute: The maximum number of prompt tokens per minute, if any.
+        """
+        self._requests = _Bucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = _Bucket(tokens_per_minute) if tokens_per_minute else None
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            delay = 0.0
+            if self._requests is not None:
+                delay = max(delay, self._requests.reserve(1, now))
+            if self._tokens is not None:
+                delay = max(delay, self._tokens.reserve(tokens, now))
+            return delay
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Block until a request using `tokens` prompt tokens may be sent."""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def aacquire(self, tokens: int = 0) -> None:
+        """Wait until a request using `tokens` prompt tokens may be sent."""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def as_runnable(self) -> Runnable[PromptValue, PromptValue]:
+        """
+        Return a runnable which passes prompts through once they may be sent.
+
+        This should be placed immediately before the LLM, and inside any retries, so
+        that each attempt is counted against the limits.
+        """
+
+        def _acquire(prompt: PromptValue) -> PromptValue:
+            self.acquire(estimate_tokens(prompt.to_string()))
+            return prompt
+
+        async def _aacquire(prompt: PromptValue) -> PromptValue:
+            await self.aacquire(estimate_tokens(prompt.to_string()))
+            return prompt
+
+        return RunnableLambda(_acquire, afunc=_aacquire, name="RateLimiter")
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of tokens in `text` (about four characters each)."""
+    return (len(text) + 3) // 4
+
+
+def rate_limit_errors() -> Tuple[Type[BaseException], ...]:
+    """Return the rate limit exceptions of the installed LLM client libraries."""
+    errors: List[Type[BaseException]] = []
+    try:
+        from openai import RateLimitError
+
+        errors.append(RateLimitError)
+    except ImportError:
+        pass
+    return tuple(errors)
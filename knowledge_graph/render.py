@@ -1,9 +1,39 @@
-from typing import Iterable, Union
+from collections import Counter, deque
+from os import PathLike
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    TextIO,
+    Tuple,
+    Union,
+)
 
-import graphviz
 from langchain_community.graphs.graph_document import GraphDocument, Node
 
 from knowledge_graph.knowledge_schema import KnowledgeSchema
+from knowledge_graph.traverse import Node as GraphNode
+from knowledge_graph.traverse import Relation
+
+if TYPE_CHECKING:
+    import graphviz
+
+GraphElements = Union[GraphDocument, Iterable[GraphDocument], Iterable[Relation]]
+"""Graph documents, or relations such as the result of `traverse`."""
+
+
+def _digraph() -> "graphviz.Digraph":
+    try:
+        import graphviz
+    except ImportError as e:
+        raise ImportError(
+            "Could not import graphviz. Please install it with `pip install graphviz`."
+        ) from e
+    return graphviz.Digraph()
 
 
 def _node_label(node: Node) -> str:
@@ -22,37 +52,199 @@ def print_graph_documents(graph_documents: Union[GraphDocument, Iterable[GraphDo
             print(f"{_node_label(source)} -> {_node_label(target)}: {type}")
 
 
-def render_graph_documents(
-    graph_documents: Union[GraphDocument, Iterable[GraphDocument]],
-) -> graphviz.Digraph:
-    if isinstance(graph_documents, GraphDocument):
-        graph_documents = [GraphDocument]
+def _quote(text: str) -> str:
+    escaped = text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
+
+
+def _elements(graph: GraphElements) -> Iterator[Union[GraphNode, Relation]]:
+    def _node(node: Node) -> GraphNode:
+        return GraphNode(name=str(node.id), type=node.type)
+
+    if isinstance(graph, GraphDocument):
+        graph = [graph]
+    for element in graph:
+        if isinstance(element, GraphDocument):
+            for node in element.nodes:
+                yield _node(node)
+            for r in element.relationships:
+                yield Relation(source=_node(r.source), target=_node(r.target), type=r.type)
+        elif isinstance(element, Relation):
+            yield element
+        else:
+            raise ValueError(f"Unsupported element type: {element}")
+
+
+def _k_hop(
+    elements: Iterable[Union[GraphNode, Relation]], focus: Iterable[GraphNode], hops: int
+) -> List[Union[GraphNode, Relation]]:
+    """Return the elements within `hops` edges (in either direction) of `focus`."""
+    elements = list(elements)
+    neighbors: Dict[GraphNode, Set[GraphNode]] = {}
+    for r in elements:
+        if isinstance(r, Relation):
+            neighbors.setdefault(r.source, set()).add(r.target)
+            neighbors.setdefault(r.target, set()).add(r.source)
+
+    distances = {node: 0 for node in focus}
+    queue = deque(distances)
+    while queue:
+        node = queue.popleft()
+        if distances[node] < hops:
+            for neighbor in neighbors.get(node, ()):
+                if neighbor not in distances:
+                    distances[neighbor] = distances[node] + 1
+                    queue.append(neighbor)
+
+    def _in_ball(e: Union[GraphNode, Relation]) -> bool:
+        if isinstance(e, Relation):
+            return e.source in distances and e.target in distances
+        return e in distances
+
+    return [e for e in elements if _in_ball(e)]
+
+
+def _cap_degree(
+    elements: Iterable[Union[GraphNode, Relation]], max_degree: int
+) -> Iterator[Union[GraphNode, Relation]]:
+    """Drop relations which would give either endpoint more than `max_degree` edges."""
+    degrees: Counter[GraphNode] = Counter()
+    for e in elements:
+        if isinstance(e, Relation):
+            if degrees[e.source] >= max_degree or degrees[e.target] >= max_degree:
+                continue
+            degrees[e.source] += 1
+            degrees[e.target] += 1
+        yield e
 
-    dot = graphviz.Digraph()
 
-    nodes = {}
+def _dot_statements(elements: Iterable[Union[GraphNode, Relation]]) -> Iterator[str]:
+    node_ids: Dict[GraphNode, str] = {}
 
-    def _node_id(node: Node) -> int:
-        node_key = (node.id, node.type)
-        if node_id := nodes.get(node_key, None):
-            return node_id
+    def _node_id(node: GraphNode) -> Iterator[str]:
+        if node not in node_ids:
+            node_ids[node] = str(len(node_ids))
+            yield f"{node_ids[node]} [label={_quote(f'{node.name} [{node.type}]')}]"
+
+    for e in elements:
+        if isinstance(e, Relation):
+            yield from _node_id(e.source)
+            yield from _node_id(e.target)
+            yield f"{node_ids[e.source]} -> {node_ids[e.target]} [label={_quote(e.type)}]"
         else:
-            node_id = f"{len(nodes)}"
-            nodes[node_key] = node_id
-            dot.node(node_id, label=_node_label(node))
-            return node_id
+            yield from _node_id(e)
+
+
+def _collapsed_dot_statements(elements: Iterable[Union[GraphNode, Relation]]) -> Iterator[str]:
+    nodes: Set[GraphNode] = set()
+    edges: Counter[Tuple[str, str, str]] = Counter()
+    for e in elements:
+        if isinstance(e, Relation):
+            nodes.update((e.source, e.target))
+            edges[(e.source.type, e.type, e.target.type)] += 1
+        else:
+            nodes.add(e)
+
+    for node_type, count in sorted(Counter(node.type for node in nodes).items()):
+        yield f"{_quote(node_type)} [label={_quote(f'{node_type} ({count})')}]"
+    for (source_type, edge_type, target_type), count in sorted(edges.items()):
+        label = _quote(f"{edge_type} ({count})")
+        yield f"{_quote(source_type)} -> {_quote(target_type)} [label={label}]"
+
+
+def _dot_body(
+    graph: GraphElements,
+    collapse_types: bool,
+    max_degree: Optional[int],
+    focus: Optional[Iterable[GraphNode]],
+    hops: int,
+) -> Iterator[str]:
+    elements: Iterable[Union[GraphNode, Relation]] = _elements(graph)
+    if focus is not None:
+        elements = _k_hop(elements, focus, hops)
+    if max_degree is not None:
+        elements = _cap_degree(elements, max_degree)
+    if collapse_types:
+        return _collapsed_dot_statements(elements)
+    return _dot_statements(elements)
+
+
+def iter_dot(
+    graph: GraphElements,
+    collapse_types: bool = False,
+    max_degree: Optional[int] = None,
+    focus: Optional[Iterable[GraphNode]] = None,
+    hops: int = 1,
+) -> Iterator[str]:
+    """
+    Generate the lines of a DOT (graphviz) description of `graph`.
 
-    for graph_document in graph_documents:
-        for node in graph_document.nodes:
-            _node_id(node)
-        for r in graph_document.relationships:
-            dot.edge(_node_id(r.source), _node_id(r.target), r.type)
+    Lines are generated as the elements are read, without creating graphviz objects,
+    so this scales to large graphs. Only `focus` requires reading all of the
+    elements before generating any lines.
+
+    Parameters:
+    - graph: The graph documents or relations (such as from `traverse`) to render.
+    - collapse_types: If true, render one node per node type and one edge per
+      `(source type, edge type, target type)`, labeled with their counts.
+    - max_degree: If set, relations which would give either of their nodes more than
+      this many edges are dropped, in the order they are read.
+    - focus: If set, only the nodes within `hops` edges (in either direction) of
+      these nodes, and the relations between them, are rendered.
+    - hops: The number of edges to follow from the `focus` nodes.
+    """
+    yield "digraph {"
+    for statement in _dot_body(graph, collapse_types, max_degree, focus, hops):
+        yield f"\t{statement}"
+    yield "}"
+
+
+def write_dot(
+    graph: GraphElements,
+    file: Union[str, PathLike, TextIO],
+    collapse_types: bool = False,
+    max_degree: Optional[int] = None,
+    focus: Optional[Iterable[GraphNode]] = None,
+    hops: int = 1,
+) -> None:
+    """
+    Write a DOT (graphviz) description of `graph` to `file`, as it is generated.
+
+    See `iter_dot` for the parameters. `file` may be a path or a text file.
+    """
+    if isinstance(file, (str, PathLike)):
+        with open(file, "w") as f:
+            write_dot(graph, f, collapse_types, max_degree, focus, hops)
+        return
+
+    for line in iter_dot(graph, collapse_types, max_degree, focus, hops):
+        file.write(line)
+        file.write("\n")
+
+
+def render_graph_documents(
+    graph_documents: GraphElements,
+    collapse_types: bool = False,
+    max_degree: Optional[int] = None,
+    focus: Optional[Iterable[GraphNode]] = None,
+    hops: int = 1,
+) -> "graphviz.Digraph":
+    """
+    Render graph documents, or relations (such as from `traverse`), with graphviz.
 
+    See `iter_dot` for the parameters. For very large graphs, use `write_dot` and
+    render the file with the `dot` command instead.
+    """
+    dot = _digraph()
+    dot.body.extend(
+        f"\t{statement}\n"
+        for statement in _dot_body(graph_documents, collapse_types, max_degree, focus, hops)
+    )
     return dot
 
 
-def render_knowledge_schema(knowledge_schema: KnowledgeSchema) -> graphviz.Digraph:
-    dot = graphviz.Digraph()
+def render_knowledge_schema(knowledge_schema: KnowledgeSchema) -> "graphviz.Digraph":
+    dot = _digraph()
 
     for node in knowledge_schema.nodes:
         dot.node(node.type, tooltip=node.description)
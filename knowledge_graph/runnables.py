@@ -1,13 +1,16 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 from langchain_core.language_models import BaseChatModel
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.pydantic_v1 import BaseModel, Field
-from langchain_core.runnables import Runnable, RunnableLambda, RunnablePassthrough
-from langchain_experimental.graph_transformers.llm import optional_enum_field
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langchain_core.runnables.config import get_config_list
 
+from .entity_cache import EntityCache
+from .entity_linker import EntityLinker
 from .traverse import Node
+from .utils import normalize_name
 
 QUERY_ENTITY_EXTRACT_PROMPT = (
     "A question is provided below. Given the question, extract up to 5 "
@@ -25,23 +28,31 @@ def extract_entities(
     llm: BaseChatModel,
     keyword_extraction_prompt: str = QUERY_ENTITY_EXTRACT_PROMPT,
     node_types: Optional[List[str]] = None,
+    cache: Optional[EntityCache] = None,
 ) -> Runnable:
     """
     Return a keyword-extraction runnable.
 
     This will expect a dictionary containing the `"question"` to extract keywords from.
 
+    When batching, identical questions (ignoring case and whitespace) are only sent
+    to the LLM once.
+
     Parameters:
     - llm: The LLM to use for extracting entities.
     - node_types: List of node types to extract.
     - keyword_extraction_prompt: The prompt to use for requesting entities.
       This should include the `{question}` being asked as well as the `{format_instructions}`
       which describe how to produce the output.
+    - cache: If set, the entities extracted from each question are cached here, and
+      questions found in the cache aren't sent to the LLM.
     """
     prompt = ChatPromptTemplate.from_messages([keyword_extraction_prompt])
     assert "question" in prompt.input_variables
     assert "format_instructions" in prompt.input_variables
 
+    from langchain_experimental.graph_transformers.llm import optional_enum_field
+
     class SimpleNode(BaseModel):
         """Represents a node in a graph with associated properties."""
 
@@ -54,12 +65,126 @@ def extract_entities(
         nodes: List[SimpleNode]
 
     output_parser = JsonOutputParser(pydantic_object=SimpleNodeList)
-    return (
-        RunnablePassthrough.assign(
-            format_instructions=lambda _: output_parser.get_format_instructions(),
-        )
-        | ChatPromptTemplate.from_messages([keyword_extraction_prompt])
+    chain = (
+        prompt.partial(format_instructions=output_parser.get_format_instructions())
         | llm
         | output_parser
         | RunnableLambda(lambda node_list: [Node(n["id"], n["type"]) for n in node_list["nodes"]])
     )
+    return _DedupingEntityExtractor(chain, cache)
+
+
+def link_entities(
+    linker: EntityLinker,
+    fallback: Optional[Runnable[Dict[str, Any], List[Node]]] = None,
+) -> Runnable[Dict[str, Any], List[Node]]:
+    """
+    Return a runnable which links the nodes named in a question without an LLM.
+
+    Like `extract_entities`, this expects a dictionary containing the `"question"`.
+
+    Parameters:
+    - linker: The linker over the node names (and aliases) of the graph.
+    - fallback: If set, the runnable (such as `extract_entities`) to use for questions
+      which don't mention any known node.
+    """
+
+    def _link(input: Dict[str, Any], config: RunnableConfig) -> List[Node]:
+        nodes = linker.link(input["question"])
+        if not nodes and fallback is not None:
+            return fallback.invoke(input, config)
+        return nodes
+
+    async def _alink(input: Dict[str, Any], config: RunnableConfig) -> List[Node]:
+        nodes = linker.link(input["question"])
+        if not nodes and fallback is not None:
+            return await fallback.ainvoke(input, config)
+        return nodes
+
+    return RunnableLambda(_link, afunc=_alink, name="EntityLinker")
+
+
+class _DedupingEntityExtractor(Runnable[Dict[str, Any], List[Node]]):
+    def __init__(self, chain: Runnable[Dict[str, Any], List[Node]], cache: Optional[EntityCache]):
+        self._chain = chain
+        self._cache = cache
+
+    def _plan(
+        self, inputs: Sequence[Dict[str, Any]]
+    ) -> Tuple[List[Optional[List[Node]]], Dict[str, List[int]]]:
+        """Return the cached results, and the indices of the inputs for each uncached key."""
+        questions = [input["question"] for input in inputs]
+        if self._cache is not None:
+            results = self._cache.lookup(questions)
+        else:
+            results = [None] * len(inputs)
+
+        uncached: Dict[str, List[int]] = {}
+        for idx, question in enumerate(questions):
+            if results[idx] is None:
+                uncached.setdefault(normalize_name(question), []).append(idx)
+        return results, uncached
+
+    def _fill(
+        self,
+        inputs: Sequence[Dict[str, Any]],
+        results: List[Any],
+        uncached: Dict[str, List[int]],
+        extracted: List[Union[List[Node], Exception]],
+    ) -> List[Any]:
+        for indices, entities in zip(uncached.values(), extracted):
+            if self._cache is not None and not isinstance(entities, Exception):
+                self._cache.put(inputs[indices[0]]["question"], entities)
+            for idx in indices:
+                results[idx] = entities if isinstance(entities, Exception) else list(entities)
+        return results
+
+    def invoke(
+        self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> List[Node]:
+        return self.batch([input], config, **kwargs)[0]
+
+    async def ainvoke(
+        self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> List[Node]:
+        return (await self.abatch([input], config, **kwargs))[0]
+
+    def batch(
+        self,
+        inputs: List[Dict[str, Any]],
+        config: Optional[Union[RunnableConfig, List[RunnableConfig]]] = None,
+        *,
+        return_exceptions: bool = False,
+        **kwargs: Any,
+    ) -> List[Any]:
+        results, uncached = self._plan(inputs)
+        if not uncached:
+            return results
+        configs = get_config_list(config, len(inputs))
+        extracted = self._chain.batch(
+            [inputs[indices[0]] for indices in uncached.values()],
+            [configs[indices[0]] for indices in uncached.values()],
+            return_exceptions=return_exceptions,
+            **kwargs,
+        )
+        return self._fill(inputs, results, uncached, extracted)
+
+    async def abatch(
+        self,
+        inputs: List[Dict[str, Any]],
+        config: Optional[Union[RunnableConfig, List[RunnableConfig]]] = None,
+        *,
+        return_exceptions: bool = False,
+        **kwargs: Any,
+    ) -> List[Any]:
+        results, uncached = self._plan(inputs)
+        if not uncached:
+            return results
+        configs = get_config_list(config, len(inputs))
+        extracted = await self._chain.abatch(
+            [inputs[indices[0]] for indices in uncached.values()],
+            [configs[indices[0]] for indices in uncached.values()],
+            return_exceptions=return_exceptions,
+            **kwargs,
+        )
+        return self._fill(inputs, results, uncached, extracted)
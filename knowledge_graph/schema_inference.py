@@ -1,6 +1,8 @@
-from typing import Sequence, cast
+import random
+from typing import Dict, List, Optional, Sequence, cast
 
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import (
     ChatPromptTemplate,
@@ -8,15 +10,89 @@ from langchain_core.prompts import (
     SystemMessagePromptTemplate,
 )
 
-from knowledge_graph.knowledge_schema import KnowledgeSchema
+from knowledge_graph.knowledge_schema import KnowledgeSchema, merge_schemas
 from knowledge_graph.templates import load_template
 
 
+def sample_documents(
+    documents: Sequence[Document],
+    sample_size: int,
+    text_embeddings: Optional[Embeddings] = None,
+    iterations: int = 10,
+    seed: int = 0,
+) -> List[Document]:
+    """
+    Select up to `sample_size` documents representative of `documents`.
+
+    If `text_embeddings` is set, the documents are clustered with (cosine) k-means
+    on their embeddings and the document closest to each cluster centroid is
+    selected, so that each distinct topic of the corpus is represented. Otherwise,
+    a uniform random sample is selected.
+
+    Parameters:
+    - documents: The documents to sample from.
+    - sample_size: The maximum number of documents to select.
+    - text_embeddings: The embeddings to cluster the documents with, if any.
+    - iterations: The number of k-means iterations.
+    - seed: The seed for the random initialization (or sample).
+    """
+    if sample_size < 1:
+        raise ValueError("sample_size must be at least one")
+    if len(documents) <= sample_size:
+        return list(documents)
+    if text_embeddings is None:
+        indices = random.Random(seed).sample(range(len(documents)), sample_size)
+        return [documents[idx] for idx in sorted(indices)]
+
+    import numpy as np
+
+    vectors = np.asarray(
+        text_embeddings.embed_documents([doc.page_content for doc in documents]),
+        dtype=np.float32,
+    )
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.where(norms == 0, 1, norms)
+
+    # Initialize with farthest-point seeding, so small but distinct topics get
+    # their own cluster.
+    first = np.random.default_rng(seed).integers(len(vectors))
+    centroids = np.empty((sample_size, vectors.shape[1]), dtype=np.float32)
+    centroids[0] = vectors[first]
+    similarities = vectors @ vectors[first]
+    for cluster in range(1, sample_size):
+        centroids[cluster] = vectors[np.argmin(similarities)]
+        similarities = np.maximum(similarities, vectors @ centroids[cluster])
+
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for cluster in range(sample_size):
+            members = vectors[assignments == cluster]
+            if len(members) > 0:
+                # Re-normalize (spherical k-means), since assignment and selection use
+                # dot products, which would otherwise favor larger or tighter clusters.
+                centroid = members.mean(axis=0)
+                norm = np.linalg.norm(centroid)
+                centroids[cluster] = centroid / norm if norm > 0 else centroid
+
+    # The document closest to each centroid, ignoring clusters that collapsed
+    # onto the same document.
+    closest = np.argmax(centroids @ vectors.T, axis=1)
+    return [documents[idx] for idx in sorted(set(closest.tolist()))]
+
+
 class KnowledgeSchemaInferer:
-    def __init__(self, llm: BaseChatModel) -> None:
-        prompt = load_template(
-            "schema_inference.md",
-        )
+    def __init__(self, llm: BaseChatModel, max_concurrency: int = 8) -> None:
+        """
+        Create an inferer of knowledge schemas from documents.
+
+        Parameters:
+        - llm: The LLM to infer schemas with.
+        - max_concurrency: The maximum number of concurrent LLM requests.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least one")
+        self.max_concurrency = max_concurrency
+
         prompt = ChatPromptTemplate.from_messages(
             [
                 SystemMessagePromptTemplate(prompt=load_template("schema_inference.md")),
@@ -28,5 +104,46 @@ class KnowledgeSchemaInferer:
         self._chain = prompt | structured_llm
 
     def infer_schemas_from(self, documents: Sequence[Document]) -> Sequence[KnowledgeSchema]:
-        responses = self._chain.batch([{"input": doc.page_content} for doc in documents])
+        responses = self._chain.batch(
+            [{"input": doc.page_content} for doc in documents],
+            config={"max_concurrency": self.max_concurrency},
+        )
         return cast(Sequence[KnowledgeSchema], responses)
+
+    def infer_schema(
+        self,
+        documents: Sequence[Document],
+        sample_size: int = 32,
+        text_embeddings: Optional[Embeddings] = None,
+    ) -> KnowledgeSchema:
+        """
+        Infer a single knowledge schema for a corpus of `documents`.
+
+        A representative sample of the documents (see `sample_documents`) is sent to
+        the LLM, and the inferred schemas are merged (see `merge_schemas`) into one.
+        Schemas are merged as they complete, in the order of the sampled documents so
+        that the result doesn't depend on timing.
+
+        Parameters:
+        - documents: The corpus to infer a schema for.
+        - sample_size: The maximum number of documents (and LLM requests) to use.
+        - text_embeddings: The embeddings used to select representative documents.
+          If not set, the documents are sampled uniformly.
+        """
+        sample = sample_documents(documents, sample_size, text_embeddings)
+
+        schema = KnowledgeSchema(nodes=[], relationships=[])
+        completed: Dict[int, Optional[KnowledgeSchema]] = {}
+        next_idx = 0
+        for idx, response in self._chain.batch_as_completed(
+            [{"input": doc.page_content} for doc in sample],
+            config={"max_concurrency": self.max_concurrency},
+        ):
+            completed[idx] = cast(Optional[KnowledgeSchema], response)
+            while next_idx in completed:
+                inferred = completed.pop(next_idx)
+                # Responses which couldn't be parsed are skipped.
+                if inferred is not None:
+                    schema = merge_schemas([schema, inferred])
+                next_idx += 1
+        return schema
@@ -0,0 +1,194 @@
+from collections import deque
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from .rate_limit import estimate_tokens
+from .traverse import Node, Relation
+
+_UNREACHABLE = float("inf")
+
+
+def _hops(relations: Sequence[Relation], start: Optional[Iterable[Node]]) -> Dict[Node, float]:
+    """Return the distance of each source node from the nearest start node."""
+    if start is None:
+        # Without explicit starting points, start from the nodes nothing points to.
+        targets = {r.target for r in relations}
+        start = [r.source for r in relations if r.source not in targets]
+        if not start:
+            start = [r.source for r in relations]
+
+    outgoing: Dict[Node, List[Node]] = {}
+    for r in relations:
+        outgoing.setdefault(r.source, []).append(r.target)
+
+    distances: Dict[Node, float] = {node: 0 for node in start}
+    queue = deque(distances)
+    while queue:
+        node = queue.popleft()
+        for target in outgoing.get(node, ()):
+            if target not in distances:
+                distances[target] = distances[node] + 1
+                queue.append(target)
+    return distances
+
+
+def _format_node(node: Node, described: Set[Node]) -> str:
+    # The type of a node is only included the first time it is mentioned.
+    if node in described:
+        return node.name
+    described.add(node)
+    return f"{node.name} ({node.type})"
+
+
+class SubgraphSerializer:
+    def __init__(
+        self,
+        token_budget: int = 1000,
+        edge_type_priority: Sequence[str] = (),
+        text_embeddings: Optional[Embeddings] = None,
+    ) -> None:
+        """
+        Create a serializer of relations into a token-budgeted prompt context.
+
+        Relations are ranked by the hop distance of their source from the starting
+        nodes, then by the priority of their edge type and then (if `text_embeddings`
+        is set and a question is given) by the similarity of the relation to the
+        question. They are written one per line, in order, until the next line would
+        exceed the budget.
+
+        Parameters:
+        - token_budget: The maximum number of (estimated) tokens to emit.
+        - edge_type_priority: Edge types to rank first, in order of priority. Other
+          edge types are ranked after these.
+        - text_embeddings: The embeddings used to rank relations by similarity to the
+          question, if any.
+        """
+        if token_budget < 0:
+            raise ValueError("token_budget must not be negative")
+        self._token_budget = token_budget
+        self._edge_type_priority = {t: idx for idx, t in enumerate(edge_type_priority)}
+        self._text_embeddings = text_embeddings
+
+    def _similarities(self, relations: Sequence[Relation], question: str) -> List[float]:
+        import numpy as np
+
+        assert self._text_embeddings is not None
+        texts = [f"{r.source.name} {r.type} {r.target.name}" for r in relations]
+        vectors = np.asarray(self._text_embeddings.embed_documents(texts), dtype=float)
+        query = np.asarray(self._text_embeddings.embed_query(question), dtype=float)
+        norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+        return list((vectors @ query) / np.where(norms == 0, 1, norms))
+
+    def rank(
+        self,
+        relations: Iterable[Relation],
+        start: Optional[Iterable[Node]] = None,
+        question: Optional[str] = None,
+    ) -> List[Relation]:
+        """
+        Return `relations` in the order they should be included.
+
+        Parameters:
+        - relations: The relations to rank, such as the result of `traverse`.
+        - start: The nodes the relations were traversed from. If not specified, the
+          nodes without incoming relations are used.
+        - question: The question to rank relations by similarity to, if any.
+        """
+        relations = list(dict.fromkeys(relations))
+        hops = _hops(relations, start)
+        unlisted = len(self._edge_type_priority)
+        if question is not None and self._text_embeddings is not None and relations:
+            similarities = self._similarities(relations, question)
+        else:
+            similarities = [0.0] * len(relations)
+
+        def _key(ranked: Tuple[Relation, float]) -> Tuple[Any, ...]:
+            r, similarity = ranked
+            return (
+                hops.get(r.source, _UNREACHABLE),
+                self._edge_type_priority.get(r.type, unlisted),
+                -similarity,
+                # Break ties deterministically, since traversals return sets.
+                r.source.name,
+                r.type,
+                r.target.name,
+            )
+
+        return [r for r, _ in sorted(zip(relations, similarities), key=_key)]
+
+    def iter_lines(
+        self,
+        relations: Iterable[Relation],
+        start: Optional[Iterable[Node]] = None,
+        question: Optional[str] = None,
+    ) -> Iterator[str]:
+        """
+        Yield the serialized lines of the highest ranked relations, within the budget.
+
+        Parameters are as for `rank`.
+        """
+        remaining = self._token_budget
+        described: Set[Node] = set()
+        for r in self.rank(relations, start, question):
+            # Format from a copy, so a line which doesn't fit doesn't mark its nodes
+            # as described.
+            line_described = set(described)
+            line = (
+                f"{_format_node(r.source, line_described)} -{r.type}->"
+                f" {_format_node(r.target, line_described)}"
+            )
+            tokens = estimate_tokens(line) + 1  # The newline.
+            if tokens > remaining:
+                return
+            remaining -= tokens
+            described = line_described
+            yield line
+
+    def serialize(
+        self,
+        relations: Iterable[Relation],
+        start: Optional[Iterable[Node]] = None,
+        question: Optional[str] = None,
+    ) -> str:
+        """
+        Serialize the highest ranked relations which fit in the budget.
+
+        Each relation is written on a line as `source -TYPE-> target`, with the type
+        of each node following its first mention, such as
+        `Marie Curie (Person) -WON-> Nobel Prize (Award)`.
+
+        Parameters are as for `rank`.
+        """
+        return "\n".join(self.iter_lines(relations, start, question))
+
+    def as_runnable(self) -> Runnable[Union[Iterable[Relation], Mapping[str, Any]], str]:
+        """
+        Return a runnable serializing relations.
+
+        This can follow `CassandraGraphStore.as_runnable`. The input is either the
+        relations, or a dictionary containing the `"relations"` and optionally the
+        `"start"` nodes and the `"question"`.
+        """
+
+        def _serialize(input: Union[Iterable[Relation], Mapping[str, Any]]) -> str:
+            if isinstance(input, Mapping):
+                return self.serialize(
+                    input["relations"], input.get("start"), input.get("question")
+                )
+            return self.serialize(input)
+
+        return RunnableLambda(_serialize, name="SubgraphSerializer")
@@ -0,0 +1,286 @@
+from os import PathLike, makedirs, path
+from typing import TYPE_CHECKING, Any, Iterator, List, Literal, Optional, Sequence, Union
+
+from cassandra.concurrent import execute_concurrent_with_args
+from cassandra.query import SimpleStatement
+
+from .traverse import Node
+from .utils import normalize_name
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+    from .knowledge_graph import CassandraKnowledgeGraph
+
+SnapshotFormat = Literal["parquet", "arrow"]
+
+_EXTENSIONS = {"parquet": "parquet", "arrow": "arrow"}
+_EMBEDDING_DIM_KEY = b"text_embedding_dim"
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "Could not import pyarrow, which snapshots require. Please install the"
+            " `snapshot` extra with `pip install knowledge-graph[snapshot]`."
+        ) from e
+    return pyarrow
+
+
+def _snapshot_file(directory: Union[str, PathLike], table: str, format: SnapshotFormat) -> str:
+    if format not in _EXTENSIONS:
+        raise ValueError(f"Unsupported snapshot format: {format}")
+    return path.join(directory, f"{table}.{_EXTENSIONS[format]}")
+
+
+def _detect_format(directory: Union[str, PathLike]) -> SnapshotFormat:
+    for format in _EXTENSIONS:
+        if path.exists(_snapshot_file(directory, "nodes", format)):
+            return format
+    raise ValueError(f"No snapshot found in '{directory}'")
+
+
+def _node_schema(dim: int) -> "pa.Schema":
+    pa = _import_pyarrow()
+    return pa.schema(
+        [
+            pa.field("name", pa.string(), nullable=False),
+            pa.field("type", pa.string(), nullable=False),
+            pa.field("properties_json", pa.string()),
+            pa.field("text_embedding", pa.list_(pa.float32(), dim)),
+        ],
+        metadata={_EMBEDDING_DIM_KEY: str(dim).encode()},
+    )
+
+
+def _edge_schema() -> "pa.Schema":
+    pa = _import_pyarrow()
+    return pa.schema(
+        [
+            pa.field("source_name", pa.string(), nullable=False),
+            pa.field("source_type", pa.string(), nullable=False),
+            pa.field("target_name", pa.string(), nullable=False),
+            pa.field("target_type", pa.string(), nullable=False),
+            pa.field("edge_type", pa.string(), nullable=False),
+        ]
+    )
+
+
+class _Writer:
+    """Write record batches to either a Parquet or Arrow IPC file."""
+
+    def __init__(self, file: str, schema: "pa.Schema", format: SnapshotFormat) -> None:
+        pa = _import_pyarrow()
+        if format == "parquet":
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(file, schema)
+        else:
+            self._writer = pa.ipc.new_file(file, schema)
+        self._schema = schema
+
+    def write(self, columns: List[List[Any]]) -> None:
+        pa = _import_pyarrow()
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, self._schema)],
+            schema=self._schema,
+        )
+        self._writer.write_batch(batch)
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def _iter_batches(file: str, format: SnapshotFormat) -> Iterator["pa.RecordBatch"]:
+    pa = _import_pyarrow()
+    if format == "parquet":
+        import pyarrow.parquet as pq
+
+        yield from pq.ParquetFile(file).iter_batches()
+    else:
+        with pa.memory_map(file, "r") as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i)
+
+
+def _export_table(
+    graph: "CassandraKnowledgeGraph",
+    query: str,
+    file: str,
+    schema: "pa.Schema",
+    format: SnapshotFormat,
+    batch_size: int,
+) -> int:
+    writer = _Writer(file, schema, format)
+    count = 0
+    try:
+        columns: List[List[Any]] = [[] for _ in schema]
+        rows = graph._session.execute(SimpleStatement(query, fetch_size=batch_size))
+        for row in rows:
+            for column, value in zip(columns, row):
+                column.append(value)
+            count += 1
+            if len(columns[0]) >= batch_size:
+                writer.write(columns)
+                columns = [[] for _ in schema]
+        if columns[0] or count == 0:
+            writer.write(columns)
+    finally:
+        writer.close()
+    return count
+
+
+def export_snapshot(
+    graph: "CassandraKnowledgeGraph",
+    directory: Union[str, PathLike],
+    format: SnapshotFormat = "parquet",
+    batch_size: int = 1000,
+) -> None:
+    """
+    Export the node and edge tables of `graph` to columnar files in `directory`.
+
+    Parameters:
+    - graph: The knowledge graph to export.
+    - directory: The directory to write `nodes` and `edges` files to.
+    - format: Either `"parquet"` or `"arrow"` (Arrow IPC file format).
+    - batch_size: The number of rows to fetch per page and write per record batch.
+    """
+    makedirs(directory, exist_ok=True)
+
+    _export_table(
+        graph,
+        f"""
+        SELECT name, type, properties_json, text_embedding
+        FROM {graph._keyspace}.{graph._node_table}
+        """,
+        _snapshot_file(directory, "nodes", format),
+        _node_schema(graph._text_embeddings_dim),
+        format,
+        batch_size,
+    )
+    _export_table(
+        graph,
+        f"""
+        SELECT source_name, source_type, target_name, target_type, edge_type
+        FROM {graph._keyspace}.{graph._edge_table}
+        """,
+        _snapshot_file(directory, "edges", format),
+        _edge_schema(),
+        format,
+        batch_size,
+    )
+
+
+def _node_rows(
+    graph: "CassandraKnowledgeGraph", batch: "pa.RecordBatch", reembed: bool
+) -> Sequence[Sequence[Any]]:
+    data = batch.to_pydict()
+    names = data["name"]
+    types = data["type"]
+    properties = data.get("properties_json", [None] * len(names))
+
+    embeddings: List[Optional[List[float]]] = [None] * len(names)
+    dim = (batch.schema.metadata or {}).get(_EMBEDDING_DIM_KEY)
+    if not reembed and dim is not None and int(dim) == graph._text_embeddings_dim:
+        embeddings = data.get("text_embedding", embeddings)
+
+    # Only embed the nodes which didn't have a usable vector in the snapshot.
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if missing:
+        from .knowledge_graph import _deserialize_md_dict
+
+        computed = graph._embed_nodes(
+            [
+                Node(
+                    name=names[i],
+                    type=types[i],
+                    properties=_deserialize_md_dict(properties[i]) if properties[i] else dict(),
+                )
+                for i in missing
+            ]
+        )
+        for i, embedding in zip(missing, computed):
+            embeddings[i] = embedding
+
+    return list(zip(names, types, embeddings, properties))
+
+
+def import_snapshot(
+    graph: "CassandraKnowledgeGraph",
+    directory: Union[str, PathLike],
+    format: Optional[SnapshotFormat] = None,
+    concurrency: int = 64,
+    reembed: bool = False,
+) -> None:
+    """
+    Bulk import a snapshot written by `export_snapshot` into `graph`.
+
+    Record batches are streamed from the files and written using concurrent,
+    unbatched (and therefore unlogged) inserts. The names of imported nodes are
+    added to the graph's entity linker, if any, and the degree statistics (if
+    tracked) are recomputed once the import is complete.
+
+    Parameters:
+    - graph: The knowledge graph to import into.
+    - directory: The directory containing the snapshot.
+    - format: The format of the snapshot. If not specified, it is detected from the
+      files in `directory`.
+    - concurrency: The maximum number of concurrent writes.
+    - reembed: If true, node embeddings are recomputed even if they are present in
+      the snapshot. Embeddings are always recomputed if the dimension in the snapshot
+      doesn't match the graph.
+    """
+    format = format or _detect_format(directory)
+
+    for batch in _iter_batches(_snapshot_file(directory, "nodes", format), format):
+        rows = _node_rows(graph, batch, reembed)
+        execute_concurrent_with_args(
+            graph._session, graph._insert_node, rows, concurrency=concurrency
+        )
+        # Imported nodes don't go through `insert`, so invalidate any cached properties
+        # once written (so concurrent reads can't re-cache the old rows).
+        if graph._node_cache is not None:
+            for name, type, _, _ in rows:
+                graph._node_cache.invalidate(Node(name=name, type=type))
+        if graph._has_name_table:
+            execute_concurrent_with_args(
+                graph._session,
+                graph._insert_name,
+                [(normalize_name(name), name, type) for name, type, _, _ in rows],
+                concurrency=concurrency,
+            )
+        if graph._vector_index is not None:
+            graph._vector_index.add(
+                [Node(name=name, type=type) for name, type, _, _ in rows],
+                [embedding for _, _, embedding, _ in rows],
+                [properties_json for _, _, _, properties_json in rows],
+            )
+        if graph._entity_linker is not None:
+            graph._entity_linker.add_nodes(
+                Node(name=name, type=type) for name, type, _, _ in rows
+            )
+
+    for batch in _iter_batches(_snapshot_file(directory, "edges", format), format):
+        data = batch.to_pydict()
+        execute_concurrent_with_args(
+            graph._session,
+            graph._insert_relationship,
+            list(
+                zip(
+                    data["source_name"],
+                    data["source_type"],
+                    data["target_name"],
+                    data["target_type"],
+                    data["edge_type"],
+                )
+            ),
+            concurrency=concurrency,
+        )
+
+    # Recomputing (rather than incrementing per batch) keeps the statistics exact
+    # when importing elements which are already in the graph.
+    if graph._degree_table is not None:
+        graph.recompute_degrees(concurrency=concurrency)
@@ -1,9 +1,21 @@
 import asyncio
 import threading
-from typing import Any, Dict, Iterable, NamedTuple, Optional, Sequence
-
-from cassandra.cluster import PreparedStatement, ResponseFuture, Session
-from cassio.config import check_resolve_keyspace, check_resolve_session
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    from cassandra.cluster import PreparedStatement, ResponseFuture, Session
 
 
 class Node(NamedTuple):
@@ -49,9 +61,10 @@ def _prepare_edge_query(
     edge_target_type: str,
     edge_type: str,
     edge_filters: Sequence[str],
-    session: Session,
+    session: "Session",
     keyspace: str,
-) -> PreparedStatement:
+    limit: bool = False,
+) -> "PreparedStatement":
     """Return the query for the edges from a given source."""
     query = f"""
         SELECT
@@ -64,10 +77,77 @@ def _prepare_edge_query(
         WHERE {edge_source_name} = ?
         AND {edge_source_type} = ?"""
     if edge_filters:
-        query = "\n        AND ".join([query] + edge_filters)
+        query = "\n        AND ".join([query] + list(edge_filters))
+    if limit:
+        query = f"{query}\n        LIMIT ?"
     return session.prepare(query)
 
 
+def _prepare_degree_query(
+    degree_table: str, session: "Session", keyspace: str
+) -> "PreparedStatement":
+    """Return the query for the per-edge-type out-degrees of a given source."""
+    return session.prepare(
+        f"""
+        SELECT edge_type, count
+        FROM {keyspace}.{degree_table}
+        WHERE source_name = ?
+        AND source_type = ?
+        """
+    )
+
+
+def _parse_degree(rows) -> int:
+    return sum(row.count for row in rows)
+
+
+def _set_result(future: asyncio.Future, result: Any) -> None:
+    # The future may have been cancelled (such as by a timeout) while the driver
+    # was completing the request.
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future: asyncio.Future, error: BaseException) -> None:
+    if not future.done():
+        future.set_exception(error)
+
+
+def _resolve_threadsafe(
+    future: asyncio.Future, setter: Callable[[asyncio.Future, Any], None], value: Any
+) -> None:
+    """Complete `future` (from a driver thread) with `setter`, unless it was abandoned."""
+    loop = future.get_loop()
+    if not loop.is_closed():
+        loop.call_soon_threadsafe(setter, future, value)
+
+
+async def _await_rows(response_future: "ResponseFuture") -> List[Any]:
+    """Wait for all pages of `response_future` and return the rows."""
+    loop = asyncio.get_running_loop()
+    page_future = loop.create_future()
+
+    # Callbacks are invoked for each page, so they're only registered once.
+    def _handle_page(page):
+        _resolve_threadsafe(page_future, _set_result, page)
+
+    def _handle_error(error):
+        _resolve_threadsafe(page_future, _set_exception, error)
+
+    response_future.add_callbacks(_handle_page, _handle_error)
+
+    rows: List[Any] = []
+    while True:
+        rows.extend(await page_future)
+        if not response_future.has_more_pages:
+            return rows
+        page_future = loop.create_future()
+        response_future.start_fetching_next_page()
+
+
+HubPolicy = Literal["skip", "sample"]
+
+
 def traverse(
     start: Node | Sequence[Node],
     edge_table: str,
@@ -78,8 +158,13 @@ def traverse(
     edge_type: str = "edge_type",
     edge_filters: Sequence[str] = (),
     steps: int = 3,
-    session: Optional[Session] = None,
+    session: Optional["Session"] = None,
     keyspace: Optional[str] = None,
+    degree_table: Optional[str] = None,
+    max_degree: Optional[int] = None,
+    hub_policy: HubPolicy = "skip",
+    on_node: Optional[Callable[[Node], None]] = None,
+    timeout: Optional[float] = None,
 ) -> Iterable[Relation]:
     """
     Traverse the graph from the given starting nodes and return the resulting sub-graph.
@@ -98,6 +183,19 @@ def traverse(
       it will use th default cassio session.
     - keyspace: The keyspace to use for the query. If not specified, it will
       use the default cassio keyspace.
+    - degree_table: The table containing per-node out-degrees. Required if
+      `max_degree` is set.
+    - max_degree: If set, nodes (other than the starting nodes) with an out-degree
+      greater than this are treated as hubs, according to `hub_policy`. Each
+      frontier is also visited in order of increasing degree.
+    - hub_policy: How to treat hubs. `"skip"` doesn't follow any edges out of a hub,
+      while `"sample"` follows at most `max_degree` of them.
+    - on_node: If set, this is called once for each node in the traversed sub-graph
+      as soon as it is discovered, while the traversal is still running. It is
+      called on a driver IO thread, and must not block.
+    - timeout: If set, the maximum number of seconds to traverse for. When it is
+      reached, no further queries are sent and the relations found so far are
+      returned.
 
     Returns:
     An iterable over relations in the traversed sub-graph.
@@ -105,12 +203,18 @@ def traverse(
     if len(start) == 0:
         return []
 
+    from cassio.config import check_resolve_keyspace, check_resolve_session
+
     session = check_resolve_session(session)
     keyspace = check_resolve_keyspace(keyspace)
 
+    if max_degree is not None and degree_table is None:
+        raise ValueError("Limiting the degree of traversed nodes requires a `degree_table`.")
+
     pending = set()
     distances = {}
     results = set()
+    discovered = set()
     query = _prepare_edge_query(
         edge_table=edge_table,
         edge_source_name=edge_source_name,
@@ -122,28 +226,54 @@ def traverse(
         session=session,
         keyspace=keyspace,
     )
+    degree_query = None
+    sampled_query = None
+    if max_degree is not None:
+        degree_query = _prepare_degree_query(degree_table, session, keyspace)
+        if hub_policy == "sample":
+            sampled_query = _prepare_edge_query(
+                edge_table=edge_table,
+                edge_source_name=edge_source_name,
+                edge_source_type=edge_source_type,
+                edge_target_name=edge_target_name,
+                edge_target_type=edge_target_type,
+                edge_type=edge_type,
+                edge_filters=edge_filters,
+                session=session,
+                keyspace=keyspace,
+                limit=True,
+            )
 
     condition = threading.Condition()
     error = None
+    stopped = False
 
-    def handle_result(rows, source_distance: int, request: ResponseFuture):
-        relations = map(_parse_relation, rows)
+    def complete(request: "ResponseFuture") -> None:
         with condition:
+            pending.discard(request)
+            if len(pending) == 0:
+                condition.notify()
+
+    def handle_result(rows, source_distance: int, request: "ResponseFuture"):
+        relations = list(map(_parse_relation, rows))
+        with condition:
+            if on_node is not None:
+                for node in (n for r in relations for n in (r.source, r.target)):
+                    if node not in discovered:
+                        discovered.add(node)
+                        on_node(node)
+
+            results.update(relations)
             if source_distance < steps:
-                for r in relations:
-                    results.add(r)
-                    fetch_relationships(source_distance + 1, r.target)
-            else:
-                results.update(relations)
+                fetch_frontier(
+                    source_distance + 1,
+                    [r.target for r in relations if visit(source_distance + 1, r.target)],
+                )
 
-        if request.has_more_pages:
+        if request.has_more_pages and not stopped:
             request.start_fetching_next_page()
         else:
-            with condition:
-                if request._req_id in pending:
-                    pending.remove(request._req_id)
-                if len(pending) == 0:
-                    condition.notify()
+            complete(request)
 
     def handle_error(e):
         nonlocal error
@@ -151,36 +281,78 @@ def traverse(
             error = e
             condition.notify()
 
-    def fetch_relationships(distance: int, source: Node) -> None:
-        """
-        Fetch relationships from node `source` is found at `distance`.
-
-        This will retrieve the edges from `source`, and visit the resulting
-        nodes at distance `distance + 1`.
-        """
+    def send_edge_query(distance: int, source: Node, limit: Optional[int] = None) -> None:
         with condition:
-            old_distance = distances.get(source)
-            if old_distance is not None and old_distance <= distance:
-                # Already discovered at that distance.
+            if stopped:
                 return
-
-            distances[source] = distance
-
-            request: ResponseFuture = session.execute_async(query, (source.name, source.type))
-            pending.add(request._req_id)
+            if limit is None:
+                request = session.execute_async(query, (source.name, source.type))
+            else:
+                request = session.execute_async(sampled_query, (source.name, source.type, limit))
+            pending.add(request)
             request.add_callbacks(
                 handle_result,
                 handle_error,
                 callback_kwargs={"source_distance": distance, "request": request},
             )
 
+    def visit(distance: int, source: Node) -> bool:
+        """Record `source` as found at `distance`, returning whether that is closest."""
+        old_distance = distances.get(source)
+        if old_distance is not None and old_distance <= distance:
+            # Already discovered at that distance.
+            return False
+        distances[source] = distance
+        return True
+
+    def fetch_frontier(distance: int, sources: List[Node]) -> None:
+        """
+        Fetch relationships from the nodes `sources` found at `distance`.
+
+        This will retrieve the edges from each source, and visit the resulting
+        nodes at distance `distance + 1`. As in `atraverse`, if hubs are limited the
+        degree of each source is looked up first, and the sources are fetched in
+        order of increasing degree.
+        """
+        with condition:
+            if stopped or not sources:
+                return
+            if degree_query is None or distance == 1:
+                for source in sources:
+                    send_edge_query(distance, source)
+                return
+
+            degrees: List[Tuple[Node, int]] = []
+
+            def handle_degree(rows, source: Node, request: "ResponseFuture"):
+                with condition:
+                    degrees.append((source, _parse_degree(rows)))
+                    if len(degrees) == len(sources):
+                        for node, degree in sorted(degrees, key=_by_degree):
+                            if degree <= max_degree:
+                                send_edge_query(distance, node)
+                            elif sampled_query is not None:
+                                send_edge_query(distance, node, limit=max_degree)
+                complete(request)
+
+            for source in sources:
+                request = session.execute_async(degree_query, (source.name, source.type))
+                pending.add(request)
+                request.add_callbacks(
+                    handle_degree,
+                    handle_error,
+                    callback_kwargs={"source": source, "request": request},
+                )
+
     with condition:
         if isinstance(start, Node):
             start = [start]
-        for source in start:
-            fetch_relationships(1, source)
+        fetch_frontier(1, [source for source in start if visit(1, source)])
 
-        condition.wait()
+        if not condition.wait_for(lambda: not pending or error is not None, timeout):
+            # Ignore the responses to queries which are still running.
+            stopped = True
+            return set(results)
 
         if error is not None:
             raise error
@@ -188,8 +360,18 @@ def traverse(
             return results
 
 
+class _FrontierPlan(NamedTuple):
+    depth: int
+    sources: List[Tuple[Node, Optional[int]]]
+    """The sources to fetch, with the maximum number of edges to fetch from each."""
+
+
+def _by_degree(source_and_degree: Tuple[Node, int]) -> int:
+    return source_and_degree[1]
+
+
 class AsyncPagedQuery(object):
-    def __init__(self, depth: int, response_future: ResponseFuture):
+    def __init__(self, depth: int, response_future: "ResponseFuture"):
         self.loop = asyncio.get_running_loop()
         self.depth = depth
         self.response_future = response_future
@@ -197,10 +379,10 @@ class AsyncPagedQuery(object):
         self.response_future.add_callbacks(self._handle_page, self._handle_error)
 
     def _handle_page(self, rows):
-        self.loop.call_soon_threadsafe(self.current_page_future.set_result, rows)
+        _resolve_threadsafe(self.current_page_future, _set_result, rows)
 
     def _handle_error(self, error):
-        self.loop.call_soon_threadsafe(self.current_page_future.set_exception, error)
+        _resolve_threadsafe(self.current_page_future, _set_exception, error)
 
     async def next(self):
         page = [_parse_relation(r) for r in await self.current_page_future]
@@ -223,8 +405,13 @@ async def atraverse(
     edge_type: str = "edge_type",
     edge_filters: Sequence[str] = [],
     steps: int = 3,
-    session: Optional[Session] = None,
+    session: Optional["Session"] = None,
     keyspace: Optional[str] = None,
+    degree_table: Optional[str] = None,
+    max_degree: Optional[int] = None,
+    hub_policy: HubPolicy = "skip",
+    on_node: Optional[Callable[[Node], None]] = None,
+    timeout: Optional[float] = None,
 ) -> Iterable[Relation]:
     """
     Async traversal of the graph from the given starting nodes and return the resulting sub-graph.
@@ -246,14 +433,32 @@ async def atraverse(
       it will use th default cassio session.
     - keyspace: The keyspace to use for the query. If not specified, it will
       use the default cassio keyspace.
+    - degree_table: The table containing per-node out-degrees. Required if
+      `max_degree` is set.
+    - max_degree: If set, nodes (other than the starting nodes) with an out-degree
+      greater than this are treated as hubs, according to `hub_policy`. Each
+      frontier is also visited in order of increasing degree.
+    - hub_policy: How to treat hubs. `"skip"` doesn't follow any edges out of a hub,
+      while `"sample"` follows at most `max_degree` of them.
+    - on_node: If set, this is called once for each node in the traversed sub-graph
+      as soon as it is discovered, while the traversal is still running. It is
+      called on the event loop running the traversal, and must not block.
+    - timeout: If set, the maximum number of seconds to traverse for. When it is
+      reached, no further queries are sent and the relations found so far are
+      returned.
 
     Returns:
     An iterable over relations in the traversed sub-graph.
     """
 
+    from cassio.config import check_resolve_keyspace, check_resolve_session
+
     session = check_resolve_session(session)
     keyspace = check_resolve_keyspace(keyspace)
 
+    if max_degree is not None and degree_table is None:
+        raise ValueError("Limiting the degree of traversed nodes requires a `degree_table`.")
+
     # Prepare the query.
     #
     # We reprepare this for each traversal since each call may have different
@@ -272,45 +477,102 @@ async def atraverse(
         keyspace=keyspace,
     )
 
-    def fetch_relation(tg: asyncio.TaskGroup, depth: int, source: Node) -> AsyncPagedQuery:
-        paged_query = AsyncPagedQuery(
-            depth, session.execute_async(query, (source.name, source.type))
-        )
+    degree_query = None
+    sampled_query = None
+    if max_degree is not None:
+        degree_query = _prepare_degree_query(degree_table, session, keyspace)
+        if hub_policy == "sample":
+            sampled_query = _prepare_edge_query(
+                edge_table=edge_table,
+                edge_source_name=edge_source_name,
+                edge_source_type=edge_source_type,
+                edge_target_name=edge_target_name,
+                edge_target_type=edge_target_type,
+                edge_type=edge_type,
+                edge_filters=edge_filters,
+                session=session,
+                keyspace=keyspace,
+                limit=True,
+            )
+
+    def fetch_relation(
+        tg: asyncio.TaskGroup, depth: int, source: Node, limit: Optional[int] = None
+    ) -> AsyncPagedQuery:
+        if limit is None:
+            response_future = session.execute_async(query, (source.name, source.type))
+        else:
+            response_future = session.execute_async(
+                sampled_query, (source.name, source.type, limit)
+            )
+        paged_query = AsyncPagedQuery(depth, response_future)
         return tg.create_task(paged_query.next())
 
-    results = set()
-    async with asyncio.TaskGroup() as tg:
-        if isinstance(start, Node):
-            start = [start]
+    async def plan_frontier(depth: int, sources: Iterable[Node]) -> _FrontierPlan:
+        """Look up the degree of each source, and decide which edges to fetch."""
+        sources = list(sources)
+        degrees = await asyncio.gather(
+            *[_await_rows(session.execute_async(degree_query, (s.name, s.type))) for s in sources]
+        )
+        planned = []
+        for source, degree in sorted(zip(sources, map(_parse_degree, degrees)), key=_by_degree):
+            if degree <= max_degree:
+                planned.append((source, None))
+            elif sampled_query is not None:
+                planned.append((source, max_degree))
+        return _FrontierPlan(depth, planned)
+
+    if isinstance(start, Node):
+        start = [start]
 
-        discovered = {t: 0 for t in start}
-        pending = {fetch_relation(tg, 1, source) for source in start}
-
-        while pending:
-            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
-            for future in done:
-                depth, relations, more = future.result()
-                for relation in relations:
-                    results.add(relation)
-
-                # Schedule the future for more results from the same query.
-                if more is not None:
-                    pending.add(tg.create_task(more.next()))
-
-                # Schedule futures for the next step.
-                if depth < steps:
-                    # We've found a path of length `depth` to each of the targets.
-                    # We need to update `discovered` to include the shortest path.
-                    # And build `to_visit` to be all of the targets for which this is
-                    # the new shortest path.
-                    to_visit = set()
-                    for r in relations:
-                        previous = discovered.get(r.target, steps + 1)
-                        if depth < previous:
-                            discovered[r.target] = depth
-                            to_visit.add(r.target)
-
-                    for source in to_visit:
-                        pending.add(fetch_relation(tg, depth + 1, source))
+    results = set()
+    nodes = set()
+    try:
+        async with asyncio.timeout(timeout), asyncio.TaskGroup() as tg:
+            discovered = {t: 0 for t in start}
+            pending = {fetch_relation(tg, 1, source) for source in start}
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if isinstance(result, _FrontierPlan):
+                        for source, limit in result.sources:
+                            pending.add(fetch_relation(tg, result.depth, source, limit))
+                        continue
+
+                    depth, relations, more = result
+                    for relation in relations:
+                        if on_node is not None:
+                            for node in (relation.source, relation.target):
+                                if node not in nodes:
+                                    nodes.add(node)
+                                    on_node(node)
+                        results.add(relation)
+
+                    # Schedule the future for more results from the same query.
+                    if more is not None:
+                        pending.add(tg.create_task(more.next()))
+
+                    # Schedule futures for the next step.
+                    if depth < steps:
+                        # We've found a path of length `depth` to each of the targets.
+                        # We need to update `discovered` to include the shortest path.
+                        # And build `to_visit` to be all of the targets for which this is
+                        # the new shortest path.
+                        to_visit = set()
+                        for r in relations:
+                            previous = discovered.get(r.target, steps + 1)
+                            if depth < previous:
+                                discovered[r.target] = depth
+                                to_visit.add(r.target)
+
+                        if degree_query is not None and to_visit:
+                            pending.add(tg.create_task(plan_frontier(depth + 1, to_visit)))
+                        else:
+                            for source in to_visit:
+                                pending.add(fetch_relation(tg, depth + 1, source))
+    except TimeoutError:
+        # Tasks still running were cancelled, so return the relations found so far.
+        pass
 
     return results
@@ -1,3 +1,5 @@
+import unicodedata
+
 try:
     # Try importing the function from itertools (Python 3.12+)
     from itertools import batched
@@ -16,3 +18,13 @@ except ImportError:
         it = iter(iterable)
         while batch := tuple(islice(it, n)):
             yield batch
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a node name for case and whitespace insensitive lookups.
+
+    This applies Unicode NFKC normalization, case folding and collapses runs
+    of whitespace into a single space.
+    """
+    return " ".join(unicodedata.normalize("NFKC", name).casefold().split())
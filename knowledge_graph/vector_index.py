@@ -0,0 +1,330 @@
+import json
+import threading
+from os import PathLike, makedirs, path
+from typing import TYPE_CHECKING, Dict, List, Literal, Optional, Sequence, Tuple, Union
+
+from cassandra.query import SimpleStatement
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError(
+        "Could not import numpy, which the local vector index requires. Please install"
+        " the `ann` extra with `pip install knowledge-graph[ann]`."
+    ) from e
+
+from .embedding_reduction import _normalize
+from .traverse import Node
+
+if TYPE_CHECKING:
+    from .knowledge_graph import CassandraKnowledgeGraph
+
+IndexBackend = Literal["auto", "brute_force", "hnsw"]
+
+_VECTORS_FILE = "vectors.npy"
+_METADATA_FILE = "nodes.json"
+
+
+class LocalVectorIndex:
+    def __init__(
+        self,
+        dimension: int,
+        backend: IndexBackend = "auto",
+        hnsw_threshold: int = 50_000,
+        hnsw_ef: int = 64,
+    ) -> None:
+        """
+        Create an in-process nearest-neighbor index over node embeddings.
+
+        This mirrors the `text_embedding` column of the node table, so that
+        `CassandraKnowledgeGraph.query_nearest_nodes` can be answered locally.
+        Similarities are reported on the same scale as Cassandra's
+        `similarity_cosine`, from 0 to 1.
+
+        Parameters:
+        - dimension: The dimension of the embeddings.
+        - backend: `"brute_force"` searches the full matrix of embeddings with NumPy.
+          `"hnsw"` uses an HNSW graph index, which requires `hnswlib`. `"auto"` uses
+          HNSW once the index contains `hnsw_threshold` nodes, if `hnswlib` is
+          installed, and brute force otherwise.
+        - hnsw_threshold: The number of nodes at which `"auto"` switches to HNSW.
+        - hnsw_ef: The size of the candidate list used by HNSW searches.
+        """
+        self._dimension = dimension
+        self._backend = backend
+        self._hnsw_threshold = hnsw_threshold
+        self._hnsw_ef = hnsw_ef
+
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((0, dimension), dtype=np.float32)
+        self._size = 0
+        self._keys: List[Tuple[str, str]] = []
+        self._properties: List[Optional[str]] = []
+        self._rows: Dict[Tuple[str, str], int] = {}
+        self._types: Dict[str, int] = {}
+        self._type_ids = np.zeros(0, dtype=np.int32)
+        self._hnsw = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._vectors)
+        if size <= capacity and self._vectors.flags.writeable:
+            return
+
+        capacity = max(size, capacity * 2, 1024)
+        vectors = np.zeros((capacity, self._dimension), dtype=np.float32)
+        vectors[: self._size] = self._vectors[: self._size]
+        self._vectors = vectors
+        type_ids = np.zeros(capacity, dtype=np.int32)
+        type_ids[: self._size] = self._type_ids[: self._size]
+        self._type_ids = type_ids
+
+    def _use_hnsw(self) -> bool:
+        if self._backend == "brute_force":
+            return False
+        if self._backend == "auto" and self._size < self._hnsw_threshold:
+            return False
+
+        try:
+            import hnswlib  # noqa: F401
+        except ImportError as e:
+            if self._backend == "hnsw":
+                raise ImportError(
+                    "Could not import hnswlib. Please install the `ann` extra with"
+                    " `pip install knowledge-graph[ann]`."
+                ) from e
+            return False
+        return True
+
+    def _build_hnsw(self):
+        import hnswlib
+
+        index = hnswlib.Index(space="ip", dim=self._dimension)
+        index.init_index(max_elements=max(2 * self._size, 1024))
+        if self._size:
+            index.add_items(self._vectors[: self._size], np.arange(self._size))
+        return index
+
+    def add(
+        self,
+        nodes: Sequence[Node],
+        embeddings: Sequence[Sequence[float]],
+        properties_json: Optional[Sequence[Optional[str]]] = None,
+    ) -> None:
+        """
+        Add (or replace) the embeddings of the given nodes.
+
+        Parameters:
+        - nodes: The nodes to add.
+        - embeddings: The embedding of each node.
+        - properties_json: The serialized properties of each node. If not specified,
+          the properties are serialized from the nodes.
+        """
+        if not nodes:
+            return
+        if properties_json is None:
+            properties_json = [
+                json.dumps(n.properties, separators=(",", ":"), sort_keys=True) for n in nodes
+            ]
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+
+        with self._lock:
+            self._reserve(self._size + len(nodes))
+            rows = []
+            for node, vector, properties in zip(nodes, vectors, properties_json):
+                key = (node.name, node.type)
+                row = self._rows.get(key)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._rows[key] = row
+                    self._keys.append(key)
+                    self._properties.append(properties)
+                else:
+                    self._properties[row] = properties
+                self._vectors[row] = vector
+                self._type_ids[row] = self._types.setdefault(node.type, len(self._types))
+                rows.append(row)
+
+            if self._hnsw is not None:
+                if self._size > self._hnsw.get_max_elements():
+                    self._hnsw.resize_index(2 * self._size)
+                self._hnsw.add_items(self._vectors[rows], np.asarray(rows))
+
+    def _node(self, row: int) -> Node:
+        name, type = self._keys[row]
+        properties = self._properties[row]
+        return Node(name=name, type=type, properties=json.loads(properties) if properties else {})
+
+    def search(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        k: int = 1,
+        node_types: Optional[Sequence[str]] = None,
+    ) -> List[List[Tuple[Node, float]]]:
+        """
+        Return the `k` nearest nodes to each embedding, with their similarity.
+
+        Parameters:
+        - embeddings: The embeddings to search for.
+        - k: The number of nodes to return for each embedding.
+        - node_types: If set, only nodes of these types are returned.
+        """
+        queries = _normalize(np.asarray(embeddings, dtype=np.float32))
+        with self._lock:
+            if self._size == 0:
+                return [[] for _ in queries]
+
+            allowed = None
+            if node_types is not None:
+                allowed = np.isin(
+                    self._type_ids[: self._size],
+                    [self._types[t] for t in node_types if t in self._types],
+                )
+
+            if self._use_hnsw():
+                if self._hnsw is None:
+                    self._hnsw = self._build_hnsw()
+                rows, scores = self._search_hnsw(queries, k, allowed)
+            else:
+                self._hnsw = None
+                rows, scores = self._search_brute_force(queries, k, allowed)
+
+            return [
+                [
+                    (self._node(row), (1.0 + float(score)) / 2.0)
+                    for row, score in zip(query_rows, query_scores)
+                ]
+                for query_rows, query_scores in zip(rows, scores)
+            ]
+
+    def _search_brute_force(
+        self, queries: np.ndarray, k: int, allowed: Optional[np.ndarray]
+    ) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        similarities = queries @ self._vectors[: self._size].T
+        if allowed is not None:
+            similarities[:, ~allowed] = -np.inf
+
+        k = min(k, self._size)
+        top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        rows, scores = [], []
+        for query_similarities, query_top in zip(similarities, top):
+            order = query_top[np.argsort(-query_similarities[query_top])]
+            order = order[np.isfinite(query_similarities[order])]
+            rows.append(order)
+            scores.append(query_similarities[order])
+        return (rows, scores)
+
+    def _search_hnsw(
+        self, queries: np.ndarray, k: int, allowed: Optional[np.ndarray]
+    ) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        if allowed is not None:
+            k = min(k, int(allowed.sum()))
+            if k == 0:
+                return ([np.zeros(0, dtype=np.int64)] * len(queries),) * 2
+            self._hnsw.set_ef(max(self._hnsw_ef, k))
+            labels, distances = self._hnsw.knn_query(
+                queries, k=k, filter=lambda label: bool(allowed[label])
+            )
+        else:
+            k = min(k, self._size)
+            self._hnsw.set_ef(max(self._hnsw_ef, k))
+            labels, distances = self._hnsw.knn_query(queries, k=k)
+        # The `ip` space reports `1 - dot product` as the distance.
+        return (list(labels), list(1.0 - distances))
+
+    def bootstrap(self, graph: "CassandraKnowledgeGraph", batch_size: int = 1000) -> None:
+        """
+        Load all of the node embeddings from the node table of `graph`.
+
+        Parameters:
+        - graph: The graph to load the nodes from.
+        - batch_size: The number of rows to fetch per page.
+        """
+        rows = graph._session.execute(
+            SimpleStatement(
+                f"""
+                SELECT name, type, properties_json, text_embedding
+                FROM {graph._keyspace}.{graph._node_table}
+                """,
+                fetch_size=batch_size,
+            )
+        )
+
+        nodes: List[Node] = []
+        embeddings: List[List[float]] = []
+        properties: List[Optional[str]] = []
+        for row in rows:
+            if row.text_embedding is None:
+                continue
+            nodes.append(Node(name=row.name, type=row.type))
+            embeddings.append(row.text_embedding)
+            properties.append(row.properties_json)
+            if len(nodes) >= batch_size:
+                self.add(nodes, embeddings, properties)
+                nodes, embeddings, properties = [], [], []
+        self.add(nodes, embeddings, properties)
+
+    def save(self, directory: Union[str, PathLike]) -> None:
+        """
+        Save the index to `directory`, so it can be memory-mapped by `load`.
+
+        The HNSW graph (if any) isn't saved, and is rebuilt when it is next needed.
+        """
+        makedirs(directory, exist_ok=True)
+        with self._lock:
+            np.save(path.join(directory, _VECTORS_FILE), self._vectors[: self._size])
+            types = sorted(self._types, key=self._types.__getitem__)
+            metadata = {
+                "dimension": self._dimension,
+                "types": types,
+                "nodes": [
+                    [name, type, properties]
+                    for (name, type), properties in zip(self._keys, self._properties)
+                ],
+            }
+        with open(path.join(directory, _METADATA_FILE), "w") as file:
+            json.dump(metadata, file, separators=(",", ":"))
+
+    @classmethod
+    def load(
+        cls,
+        directory: Union[str, PathLike],
+        backend: IndexBackend = "auto",
+        hnsw_threshold: int = 50_000,
+        hnsw_ef: int = 64,
+    ) -> "LocalVectorIndex":
+        """
+        Load an index saved with `save`.
+
+        The embeddings are memory-mapped rather than read into memory. They are
+        copied into memory the first time the index is modified.
+
+        Parameters:
+        - directory: The directory containing the saved index.
+        - backend: See `LocalVectorIndex`.
+        - hnsw_threshold: See `LocalVectorIndex`.
+        - hnsw_ef: See `LocalVectorIndex`.
+        """
+        with open(path.join(directory, _METADATA_FILE)) as file:
+            metadata = json.load(file)
+
+        index = cls(
+            metadata["dimension"],
+            backend=backend,
+            hnsw_threshold=hnsw_threshold,
+            hnsw_ef=hnsw_ef,
+        )
+        index._vectors = np.load(path.join(directory, _VECTORS_FILE), mmap_mode="r")
+        index._types = {type: id for id, type in enumerate(metadata["types"])}
+        for name, type, properties in metadata["nodes"]:
+            index._rows[(name, type)] = len(index._keys)
+            index._keys.append((name, type))
+            index._properties.append(properties)
+        index._size = len(index._keys)
+        index._type_ids = np.asarray(
+            [index._types[type] for _, type in index._keys], dtype=np.int32
+        )
+        return index
@@ -92,8 +92,18 @@ class DataFixture:
         self.graph_store.add_graph_documents(documents)
 
     def drop(self):
-        self.session.execute(f"DROP TABLE IF EXISTS {self.keyspace}.{self.node_table};")
-        self.session.execute(f"DROP TABLE IF EXISTS {self.keyspace}.{self.edge_table};")
+        tables = [
+            self.node_table,
+            f"{self.node_table}_names",
+            f"{self.node_table}_sources",
+            f"{self.node_table}_mentions",
+            self.edge_table,
+            f"{self.edge_table}_mentions",
+            f"{self.edge_table}_degrees",
+            f"{self.edge_table}_counts",
+        ]
+        for table in tables:
+            self.session.execute(f"DROP TABLE IF EXISTS {self.keyspace}.{table};")
 
 
 @pytest.fixture(scope="session")
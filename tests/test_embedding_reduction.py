@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+from typing import List
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from knowledge_graph.embedding_reduction import (
+    ProjectionReducer,
+    ReducedEmbeddings,
+    TruncatingReducer,
+)
+from knowledge_graph.knowledge_graph import CassandraKnowledgeGraph
+
+
+class _FixedEmbeddings(Embeddings):
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return [float(len(text)), 1.0, 2.0, 3.0]
+
+
+def test_truncating_reducer():
+    reducer = TruncatingReducer(2)
+    assert reducer.dimension == 2
+
+    reduced = reducer.reduce([[3.0, 4.0, 12.0], [0.0, 0.0, 1.0]])
+    assert np.allclose(reduced, [[0.6, 0.8], [0.0, 0.0]])
+
+    with pytest.raises(ValueError):
+        TruncatingReducer(1)
+
+
+def test_projection_reducer(tmp_path):
+    rng = np.random.default_rng(0)
+    # Points which vary (almost) entirely within a 2-dimensional subspace.
+    basis = rng.normal(size=(2, 8))
+    sample = rng.normal(size=(100, 2)) @ basis + 0.01 * rng.normal(size=(100, 8))
+
+    reducer = ProjectionReducer.fit(sample, 2)
+    assert reducer.dimension == 2
+
+    reduced = np.asarray(reducer.reduce(sample[:5]))
+    assert reduced.shape == (5, 2)
+    assert np.allclose(np.linalg.norm(reduced, axis=1), 1.0, atol=1e-5)
+
+    reducer.save(tmp_path / "projection.npz")
+    loaded = ProjectionReducer.load(tmp_path / "projection.npz")
+    assert np.allclose(loaded.reduce(sample[:5]), reduced)
+
+    with pytest.raises(ValueError):
+        ProjectionReducer.fit(sample, 9)
+
+
+async def test_reduced_embeddings():
+    embeddings = ReducedEmbeddings(_FixedEmbeddings(), TruncatingReducer(2))
+
+    assert len(embeddings.embed_query("hello")) == 2
+    assert np.allclose(embeddings.embed_documents(["a", "bb"])[1], np.array([2.0, 1.0]) / 5**0.5)
+    assert embeddings.embed_documents([]) == []
+    assert len(await embeddings.aembed_query("hello")) == 2
+    assert len(await embeddings.aembed_documents(["a", "bb"])) == 2
+
+
+def test_reducer_validated_by_graph():
+    # A session whose schema metadata has a node table with 3-dimensional embeddings.
+    table = SimpleNamespace(
+        columns={"text_embedding": SimpleNamespace(cql_type="vector<float, 3>")}
+    )
+    keyspace = SimpleNamespace(tables={"entities": table}, indexes={})
+    session = SimpleNamespace(
+        cluster=SimpleNamespace(metadata=SimpleNamespace(keyspaces={"ks": keyspace}))
+    )
+
+    def _graph(**kwargs) -> CassandraKnowledgeGraph:
+        return CassandraKnowledgeGraph(
+            session=session, keyspace="ks", apply_schema=False, **kwargs
+        )
+
+    with pytest.raises(ValueError, match="requires text_embeddings"):
+        _graph(embedding_reducer=TruncatingReducer(3))
+    with pytest.raises(ValueError, match="dimension"):
+        _graph(text_embeddings=_FixedEmbeddings(), embedding_reducer=TruncatingReducer(2))
+    graph = _graph(text_embeddings=_FixedEmbeddings(), embedding_reducer=TruncatingReducer(3))
+    assert graph._text_embeddings_dim == 3
@@ -0,0 +1,61 @@
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+from knowledge_graph.entity_cache import EntityCache
+from knowledge_graph.traverse import Node
+
+MARIE_CURIE = Node("Marie Curie", "Person")
+
+
+class _QuestionEmbeddings(Embeddings):
+    def __init__(self, vectors: Dict[str, List[float]]) -> None:
+        self.vectors = vectors
+        self.embedded: List[str] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.embedded.extend(texts)
+        return [self.vectors[text] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def test_entity_cache_exact() -> None:
+    cache = EntityCache()
+    assert cache.get("Who is Marie Curie?") is None
+
+    cache.put("Who is Marie Curie?", [MARIE_CURIE])
+    assert cache.get("who is  MARIE CURIE?") == [MARIE_CURIE]
+    assert cache.lookup(["Who is Marie Curie?", "Who is Pierre Curie?"]) == [
+        [MARIE_CURIE],
+        None,
+    ]
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (2, 2, 1)
+
+    cache.invalidate("Who is Marie Curie?")
+    assert cache.get("Who is Marie Curie?") is None
+
+
+def test_entity_cache_similar() -> None:
+    embeddings = _QuestionEmbeddings(
+        {
+            "who is marie curie?": [1.0, 0.0],
+            "who was marie curie?": [0.99, 0.1],
+            "who is pierre curie?": [0.5, 0.5],
+        }
+    )
+    cache = EntityCache(text_embeddings=embeddings, min_similarity=0.95)
+
+    assert cache.get("Who is Marie Curie?") is None
+    cache.put("Who is Marie Curie?", [MARIE_CURIE])
+    # The embedding computed for the miss is reused.
+    assert embeddings.embedded == ["who is marie curie?"]
+
+    assert cache.lookup(["Who was Marie Curie?", "Who is Pierre Curie?"]) == [
+        [MARIE_CURIE],
+        None,
+    ]
+    assert embeddings.embedded[1:] == ["who was marie curie?", "who is pierre curie?"]
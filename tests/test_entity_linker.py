@@ -0,0 +1,61 @@
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from knowledge_graph.entity_linker import EntityLinker
+from knowledge_graph.runnables import extract_entities, link_entities
+from knowledge_graph.traverse import Node
+
+MARIE_CURIE = Node("Marie Curie", "Person")
+PIERRE_CURIE = Node("Pierre Curie", "Person")
+PARIS = Node("Paris", "City")
+UNIVERSITY_OF_PARIS = Node("University of Paris", "Institution")
+
+
+def test_link() -> None:
+    linker = EntityLinker()
+    linker.add_nodes([MARIE_CURIE, PIERRE_CURIE, PARIS, UNIVERSITY_OF_PARIS, Node("Mar", "X")])
+
+    # Overlapping mentions prefer the longest, and only whole words match.
+    assert linker.link("Did MARIE  CURIE teach at the University of Paris? In Paris!") == [
+        MARIE_CURIE,
+        UNIVERSITY_OF_PARIS,
+        PARIS,
+    ]
+    assert linker.link("Parisian curies") == []
+
+    # Names added later are matched.
+    linker.add([("M. Curie", MARIE_CURIE), ("Curie", PIERRE_CURIE), ("Pi", PIERRE_CURIE)])
+    assert linker.link("What did m. curie discover?") == [MARIE_CURIE]
+    assert linker.link("Curie") == [PIERRE_CURIE]
+    assert linker.link("pi") == []
+
+
+def test_add_incrementally() -> None:
+    names = [f"name {i}" for i in range(100)]
+    linker = EntityLinker()
+    for name in names:
+        linker.add([(name, Node(name, "X"))])
+    linker.add([("Name 0", Node("Name 0", "Y"))])
+
+    # Automata are merged as names are added, so few need to be scanned.
+    assert len(linker._levels) <= 7
+    assert len(linker) == 100
+    assert linker.link("name 3 and name 42, name 0") == [
+        Node("name 3", "X"),
+        Node("name 42", "X"),
+        Node("name 0", "X"),
+        Node("Name 0", "Y"),
+    ]
+
+
+def test_link_entities_fallback() -> None:
+    linker = EntityLinker()
+    linker.add_nodes([MARIE_CURIE])
+    llm = FakeListChatModel(responses=['{"nodes": [{"id": "Nobel Prize", "type": "Award"}]}'] * 2)
+    linked = link_entities(linker, fallback=extract_entities(llm))
+
+    assert linked.invoke({"question": "Who was Marie Curie?"}) == [MARIE_CURIE]
+    assert llm.i == 0
+    assert linked.invoke({"question": "Who won the Nobel Prize?"}) == [
+        Node("Nobel Prize", "Award")
+    ]
+    assert llm.i == 1
@@ -0,0 +1,97 @@
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+from knowledge_graph.entity_resolution import EntityResolver
+from knowledge_graph.traverse import Node, Relation
+
+
+class _NameEmbeddings(Embeddings):
+    def __init__(self, vectors: Dict[str, List[float]]) -> None:
+        self.vectors = vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.vectors[text] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.vectors[text]
+
+
+EMBEDDINGS = _NameEmbeddings(
+    {
+        "Marie Curie": [1.0, 0.0, 0.1],
+        "Marie Skłodowska Curie": [1.0, 0.05, 0.1],
+        "M. Curie": [1.0, 0.1, 0.1],
+        # Similar, but not a compatible name.
+        "Pierre Curie": [1.0, 0.1, 0.15],
+        "marie curie": [0.0, 1.0, 0.0],
+        # Compatible with (and similar to) both Marie and Pierre Curie.
+        "Curie": [1.0, 0.05, 0.12],
+    }
+)
+
+MARIE = Node("Marie Curie", "Person")
+MARIE_FULL = Node("Marie Skłodowska Curie", "Person", {"born": 1867})
+M_CURIE = Node("M. Curie", "Person", {"nationality": "Polish"})
+PIERRE = Node("Pierre Curie", "Person")
+NOBEL_PRIZE = Node("Nobel Prize", "Award")
+
+
+def test_resolve_by_normalized_name():
+    resolution = EntityResolver().resolve(
+        [
+            MARIE,
+            Node("marie  curie", "Person"),
+            Node("Marie Curie", "Award"),
+            Relation(Node("marie curie", "Person"), NOBEL_PRIZE, "WON"),
+        ]
+    )
+
+    assert resolution.elements == [
+        MARIE,
+        Node("Marie Curie", "Award"),
+        Relation(MARIE, NOBEL_PRIZE, "WON"),
+    ]
+    assert resolution.aliases == {
+        Node("marie  curie", "Person"): MARIE,
+        Node("marie curie", "Person"): MARIE,
+    }
+
+
+def test_resolve_by_similarity():
+    resolution = EntityResolver(text_embeddings=EMBEDDINGS).resolve(
+        [
+            MARIE,
+            MARIE_FULL,
+            M_CURIE,
+            PIERRE,
+            NOBEL_PRIZE,
+            Relation(M_CURIE, NOBEL_PRIZE, "WON"),
+            Relation(MARIE, NOBEL_PRIZE, "WON"),
+            Relation(MARIE, PIERRE, "MARRIED_TO"),
+        ]
+    )
+
+    assert resolution.elements == [
+        MARIE_FULL,
+        PIERRE,
+        NOBEL_PRIZE,
+        Relation(MARIE_FULL, NOBEL_PRIZE, "WON"),
+        Relation(MARIE_FULL, PIERRE, "MARRIED_TO"),
+    ]
+    assert resolution.elements[0].properties == {"born": 1867, "nationality": "Polish"}
+    assert set(resolution.aliases) == {MARIE, M_CURIE}
+    assert all(node == MARIE_FULL for node in resolution.aliases.values())
+
+
+def test_resolve_ambiguous_abbreviation():
+    curie = Node("Curie", "Person")
+    resolution = EntityResolver(text_embeddings=EMBEDDINGS).resolve([MARIE, PIERRE, curie])
+
+    # The short name is merged into (at most) one of the names, which stay distinct.
+    assert MARIE in resolution.elements
+    assert PIERRE in resolution.elements
+    assert MARIE not in resolution.aliases
+    assert PIERRE not in resolution.aliases
+    assert len(resolution.elements) == 2
+    assert set(resolution.aliases) == {curie}
@@ -1,15 +1,20 @@
 from os import path
+from types import SimpleNamespace
+from typing import Any
 
 import pytest
 from langchain_community.graphs.graph_document import Node, Relationship
 from langchain_core.documents import Document
 from langchain_core.language_models import BaseChatModel
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.runnables import Runnable, RunnableLambda
 from precisely import assert_that, contains_exactly
 
 from knowledge_graph.extraction import (
     KnowledgeSchema,
     KnowledgeSchemaExtractor,
 )
+from knowledge_graph.extraction_cache import ExtractionCache
 
 
 @pytest.fixture(scope="session")
@@ -77,3 +82,91 @@ def test_extraction(extractor: KnowledgeSchemaExtractor):
             Relationship(source=pierre_curie, target=marie_curie, type="MARRIED_TO"),
         ),
     )
+
+
+async def test_aextraction(extractor: KnowledgeSchemaExtractor):
+    documents = [Document(page_content=MARIE_CURIE_SOURCE), Document(page_content="")]
+    results = await extractor.aextract(documents)
+
+    assert [result.source for result in results] == documents
+    assert Node(id="Marie Curie", type="Person") in results[0].nodes
+
+
+def test_iter_extraction(extractor: KnowledgeSchemaExtractor):
+    documents = [Document(page_content=MARIE_CURIE_SOURCE), Document(page_content="")]
+    results = list(extractor.iter_extract(iter(documents)))
+
+    assert_that([result.source for result in results], contains_exactly(*documents))
+
+
+def test_cached_extraction(llm: BaseChatModel):
+    schema = KnowledgeSchema.from_file(
+        path.join(path.dirname(__file__), "marie_curie_schema.yaml")
+    )
+    cache = ExtractionCache()
+    extractor = KnowledgeSchemaExtractor(llm=llm, schema=schema, cache=cache)
+
+    document = Document(page_content=MARIE_CURIE_SOURCE)
+    (extracted,) = extractor.extract([document])
+    assert len(cache) == 1
+
+    (cached,) = extractor.extract([document])
+    assert cached.nodes == extracted.nodes
+    assert cached.relationships == extracted.relationships
+
+
+def test_packed_extraction(llm: BaseChatModel):
+    schema = KnowledgeSchema.from_file(
+        path.join(path.dirname(__file__), "marie_curie_schema.yaml")
+    )
+    extractor = KnowledgeSchemaExtractor(llm=llm, schema=schema, packing_token_budget=1000)
+
+    documents = [
+        Document(page_content=MARIE_CURIE_SOURCE),
+        Document(page_content="Pierre Curie was a French physicist."),
+    ]
+    results = extractor.extract(documents)
+
+    assert [result.source for result in results] == documents
+    assert Node(id="Marie Curie", type="Person") in results[0].nodes
+    assert Node(id="Pierre Curie", type="Person") in results[1].nodes
+    assert Node(id="Marie Curie", type="Person") not in results[1].nodes
+
+
+class _GraphChatModel(FakeListChatModel):
+    """A fake chat model whose structured output is always `graph`."""
+
+    graph: Any
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Runnable:
+        return RunnableLambda(lambda _: self.graph)
+
+
+def test_cache_shared_by_strict_and_repairing_extractors():
+    schema = KnowledgeSchema.from_file(
+        path.join(path.dirname(__file__), "marie_curie_schema.yaml")
+    )
+    llm = _GraphChatModel(
+        responses=[],
+        graph=SimpleNamespace(
+            nodes=[
+                SimpleNamespace(id="Marie Curie", type="Person", properties=None),
+                SimpleNamespace(id="Radium", type="Element", properties=None),
+            ],
+            relationships=[],
+        ),
+    )
+    cache = ExtractionCache()
+    document = Document(page_content="Marie Curie discovered radium.")
+
+    (repaired,) = KnowledgeSchemaExtractor(llm, schema, repair=True, cache=cache).extract(
+        [document]
+    )
+    assert repaired.nodes == [Node(id="Marie Curie", type="Person")]
+
+    # Neither the repaired document nor the lenient one is returned to a strict extractor.
+    (lenient,) = KnowledgeSchemaExtractor(llm, schema, cache=cache).extract([document])
+    assert Node(id="Radium", type="Element") in lenient.nodes
+    with pytest.raises(ValueError):
+        KnowledgeSchemaExtractor(llm, schema, strict=True, cache=cache).extract([document])
+    assert len(cache) == 2
@@ -0,0 +1,44 @@
+from langchain_community.graphs.graph_document import GraphDocument, Node, Relationship
+from langchain_core.documents import Document
+
+from knowledge_graph.extraction_cache import ExtractionCache, extraction_key
+
+MARIE_CURIE = Node(id="Marie Curie", type="Person", properties={"born": 1867})
+NOBEL_PRIZE = Node(id="Nobel Prize", type="Award")
+
+
+def _graph_document(source: Document) -> GraphDocument:
+    return GraphDocument(
+        nodes=[MARIE_CURIE, NOBEL_PRIZE],
+        relationships=[Relationship(source=MARIE_CURIE, target=NOBEL_PRIZE, type="RECEIVED")],
+        source=source,
+    )
+
+
+def test_extraction_key():
+    assert extraction_key("a", "b") == extraction_key("a", "b")
+    assert extraction_key("a", "b") != extraction_key("a", "c")
+    assert extraction_key("ab", "c") != extraction_key("a", "bc")
+
+
+def test_round_trip(tmp_path):
+    source = Document(page_content="Marie Curie won the Nobel Prize.")
+    path = tmp_path / "extractions.db"
+
+    cache = ExtractionCache(path)
+    assert cache.get("key", source) is None
+    cache.put("key", _graph_document(source))
+    cache.close()
+
+    # The entries persist across instances.
+    cache = ExtractionCache(path)
+    assert len(cache) == 1
+    cached = cache.get("key", source)
+    assert cached is not None
+    assert cached.nodes == [MARIE_CURIE, NOBEL_PRIZE]
+    assert cached.nodes[0].properties == {"born": 1867}
+    assert cached.relationships == _graph_document(source).relationships
+    assert cached.source == source
+
+    cache.invalidate(["key"])
+    assert cache.get("key", source) is None
@@ -0,0 +1,69 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = [
+    "cassandra",
+    "cassio",
+    "graphviz",
+    "langchain_community",
+    "langchain_experimental",
+    "numpy",
+]
+
+
+def _import_in_subprocess(statement: str) -> dict:
+    # Measure in a fresh interpreter, since this process has already imported everything.
+    script = f"""
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+print(json.dumps({{"elapsed": elapsed, "loaded": loaded}}))
+"""
+    output = subprocess.check_output([sys.executable, "-c", script], text=True)
+    return json.loads(output)
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import knowledge_graph",
+        "from knowledge_graph import Node, Relation",
+        "from knowledge_graph.traverse import Node, Relation",
+    ],
+)
+def test_import_is_lightweight(statement: str) -> None:
+    result = _import_in_subprocess(statement)
+    assert result["loaded"] == []
+
+    # Reported (with `-s`) rather than asserted, since wall-clock time depends on the
+    # machine. Checking the loaded modules catches regressions deterministically.
+    print(f"{statement} took {result['elapsed']:.3f}s")
+
+
+def test_lazy_attributes() -> None:
+    result = _import_in_subprocess("from knowledge_graph import CassandraGraphStore")
+    assert "cassandra" in result["loaded"]
+
+    import knowledge_graph
+
+    with pytest.raises(AttributeError):
+        knowledge_graph.does_not_exist  # noqa: B018
+
+
+def test_missing_extras(monkeypatch: pytest.MonkeyPatch) -> None:
+    from knowledge_graph.snapshot import _import_pyarrow
+    from knowledge_graph.vector_index import LocalVectorIndex
+
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    monkeypatch.setitem(sys.modules, "hnswlib", None)
+
+    # The error names the extra providing the missing package.
+    with pytest.raises(ImportError, match=r"knowledge-graph\[snapshot\]"):
+        _import_pyarrow()
+    with pytest.raises(ImportError, match=r"knowledge-graph\[ann\]"):
+        LocalVectorIndex(dimension=2, backend="hnsw")._use_hnsw()
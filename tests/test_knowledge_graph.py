@@ -1,10 +1,24 @@
 import secrets
+import time
+from typing import Any, List, Set
+
 import pytest
 from precisely import assert_that, contains_exactly
 
 from cassandra.cluster import Session
+from langchain_community.graphs.graph_document import GraphDocument, Relationship
+from langchain_community.graphs.graph_document import Node as LangChainNode
+from langchain_core.documents import Document
+from langchain_core.embeddings import FakeEmbeddings
+from langchain_core.runnables import RunnableLambda
+from knowledge_graph.cassandra_graph_store import CassandraGraphStore
+from knowledge_graph.entity_linker import EntityLinker
+from knowledge_graph.entity_resolution import EntityResolver
 from knowledge_graph.knowledge_graph import CassandraKnowledgeGraph
+from knowledge_graph.node_cache import NodePropertyCache
+from knowledge_graph.runnables import link_entities
 from knowledge_graph.traverse import Node, Relation
+from knowledge_graph.vector_index import LocalVectorIndex
 
 from .conftest import DataFixture
 
@@ -22,6 +36,46 @@ def test_no_embeddings(db_session: Session, db_keyspace: str) -> None:
     )
     graph.insert([Node(name="a", type="b")])
 
+def test_existing_embedding_dimension(db_session: Session, db_keyspace: str) -> None:
+    uid = secrets.token_hex(8)
+    node_table = f"entities_{uid}"
+    edge_table = f"relationships_{uid}"
+
+    class _UnusedEmbeddings(FakeEmbeddings):
+        def embed_query(self, text: str) -> List[float]:
+            raise AssertionError("the dimension should not be probed")
+
+    graph = CassandraKnowledgeGraph(
+        node_table=node_table,
+        edge_table=edge_table,
+        text_embeddings=FakeEmbeddings(size=3),
+        text_embeddings_dim=3,
+        session=db_session,
+        keyspace=db_keyspace,
+    )
+    graph.insert([Node(name="a", type="b")])
+
+    # The dimension is read from the existing node table.
+    graph = CassandraKnowledgeGraph(
+        node_table=node_table,
+        edge_table=edge_table,
+        text_embeddings=_UnusedEmbeddings(size=3),
+        session=db_session,
+        keyspace=db_keyspace,
+    )
+    assert graph._text_embeddings_dim == 3
+
+    # An explicit dimension is validated against the existing node table.
+    with pytest.raises(ValueError, match="dimension"):
+        CassandraKnowledgeGraph(
+            node_table=node_table,
+            edge_table=edge_table,
+            text_embeddings=FakeEmbeddings(size=4),
+            text_embeddings_dim=4,
+            session=db_session,
+            keyspace=db_keyspace,
+        )
+
 def test_traverse_marie_curie(marie_curie: DataFixture) -> None:
     (result_nodes, result_edges) = marie_curie.graph_store.graph.subgraph(
         start=Node("Marie Curie", "Person"),
@@ -66,6 +120,129 @@ def test_traverse_marie_curie(marie_curie: DataFixture) -> None:
     assert_that(result_nodes, contains_exactly(*expected_nodes))
 
 
+async def test_asubgraph_marie_curie(marie_curie: DataFixture) -> None:
+    graph = marie_curie.graph_store.graph
+    (expected_nodes, expected_edges) = graph.subgraph(start=Node("Marie Curie", "Person"))
+    (result_nodes, result_edges) = await graph.asubgraph(
+        start=Node("Marie Curie", "Person"), max_concurrency=2
+    )
+    assert_that(result_edges, contains_exactly(*expected_edges))
+    assert_that(result_nodes, contains_exactly(*expected_nodes))
+
+
+async def test_pipelined_subgraph_marie_curie(marie_curie: DataFixture) -> None:
+    graph = marie_curie.graph_store.graph
+    (expected_nodes, expected_edges) = graph.subgraph(start=Node("Marie Curie", "Person"))
+
+    (result_nodes, result_edges) = graph.subgraph(
+        start=Node("Marie Curie", "Person"), pipelined=True, max_concurrency=2
+    )
+    assert_that(result_edges, contains_exactly(*expected_edges))
+    assert_that(result_nodes, contains_exactly(*expected_nodes))
+
+    (result_nodes, result_edges) = await graph.asubgraph(
+        start=Node("Marie Curie", "Person"), pipelined=True, max_concurrency=2
+    )
+    assert_that(result_edges, contains_exactly(*expected_edges))
+    assert_that(result_nodes, contains_exactly(*expected_nodes))
+
+def test_subgraph_node_cache(db_session: Session, db_keyspace: str) -> None:
+    uid = secrets.token_hex(8)
+    cache = NodePropertyCache()
+    graph = CassandraKnowledgeGraph(
+        node_table=f"entities_{uid}",
+        edge_table=f"relationships_{uid}",
+        text_embeddings=None,
+        session=db_session,
+        keyspace=db_keyspace,
+        node_cache=cache,
+    )
+    a = Node("a", "T", {"version": 1})
+    b = Node("b", "T")
+    graph.insert([a, b, Relation(a, b, "LINKS")])
+
+    (nodes, _) = graph.subgraph(start=a)
+    assert (cache.stats().hits, cache.stats().misses) == (0, 2)
+    (nodes, _) = graph.subgraph(start=a, pipelined=True)
+    assert (cache.stats().hits, cache.stats().misses) == (2, 2)
+    assert [n.properties for n in nodes if n.name == "a"] == [{"version": 1}]
+
+    # Writes invalidate the cached properties.
+    graph.insert([Node("a", "T", {"version": 2})])
+    (nodes, _) = graph.subgraph(start=a)
+    assert [n.properties for n in nodes if n.name == "a"] == [{"version": 2}]
+
+def test_node_cache_invalidated_after_write(db_session: Session, db_keyspace: str) -> None:
+    uid = secrets.token_hex(8)
+    graph = CassandraKnowledgeGraph(
+        node_table=f"entities_{uid}",
+        edge_table=f"relationships_{uid}",
+        text_embeddings=None,
+        session=db_session,
+        keyspace=db_keyspace,
+        node_cache=NodePropertyCache(),
+    )
+    a = Node("a", "T", {"version": 1})
+    graph.insert([a])
+
+    class _ConcurrentReadSession:
+        """Reads (and caches) the node just before each write, as a concurrent reader."""
+
+        def __getattr__(self, name: str) -> Any:
+            return getattr(db_session, name)
+
+        def execute(self, statement: Any, *args: Any, **kwargs: Any) -> Any:
+            graph.fetch_nodes([a])
+            return db_session.execute(statement, *args, **kwargs)
+
+    graph._session = _ConcurrentReadSession()  # type: ignore[assignment]
+    graph.insert([Node("a", "T", {"version": 2})])
+    graph._session = db_session
+
+    assert [n.properties for n in graph.fetch_nodes([a])] == [{"version": 2}]
+
+async def test_pipelined_subgraph_empty_node_cache(
+    db_session: Session, db_keyspace: str
+) -> None:
+    uid = secrets.token_hex(8)
+    cache = NodePropertyCache()
+    graph = CassandraKnowledgeGraph(
+        node_table=f"entities_{uid}",
+        edge_table=f"relationships_{uid}",
+        text_embeddings=None,
+        session=db_session,
+        keyspace=db_keyspace,
+        node_cache=cache,
+    )
+    a = Node("a", "T", {"version": 1})
+    graph.insert([a, Relation(a, a, "LINKS")])
+    cache.clear()
+
+    # An empty cache is still consulted (and populated) by the first traversal.
+    await graph.asubgraph(start=a, pipelined=True)
+    assert (cache.stats().hits, cache.stats().misses) == (0, 1)
+    graph.subgraph(start=a, pipelined=True)
+    assert (cache.stats().hits, cache.stats().misses) == (1, 1)
+
+def test_subgraph_without_properties(marie_curie: DataFixture) -> None:
+    (result_nodes, _) = marie_curie.graph_store.graph.subgraph(
+        start=Node("Marie Curie", "Person"), steps=1, properties=False
+    )
+    assert all(n.properties == {} for n in result_nodes)
+    assert len(result_nodes) == 10
+
+
+def test_node_embeddings(marie_curie: DataFixture) -> None:
+    graph = marie_curie.graph_store.graph
+    embeddings = graph.node_embeddings(
+        [Node("Marie Curie", "Person"), Node("Polish", "Nationality"), Node("Missing", "Person")]
+    )
+    assert_that(
+        embeddings.keys(),
+        contains_exactly(Node("Marie Curie", "Person"), Node("Polish", "Nationality")),
+    )
+    assert all(len(e) == graph._text_embeddings_dim for e in embeddings.values())
+
 def test_fuzzy_search(marie_curie: DataFixture) -> None:
     if not marie_curie.has_embeddings:
         pytest.skip("Fuzzy search requires embeddings. Run with openai environment variables")
@@ -81,4 +258,388 @@ def test_fuzzy_search(marie_curie: DataFixture) -> None:
         Node(name="Polish", type="Nationality", properties={"European": True}),
         Node(name="French", type="Nationality", properties={"European": True}),
     ]
-    assert_that(result_nodes, contains_exactly(*expected_nodes))
\ No newline at end of file
+    assert_that(result_nodes, contains_exactly(*expected_nodes))
+
+
+async def test_afuzzy_search(marie_curie: DataFixture) -> None:
+    if not marie_curie.has_embeddings:
+        pytest.skip("Fuzzy search requires embeddings. Run with openai environment variables")
+    result_nodes = await marie_curie.graph_store.graph.aquery_nearest_nodes(["Marie", "Poland"])
+    expected_nodes = [
+        Node(name="Marie Curie", type="Person"),
+        Node(name="Polish", type="Nationality", properties={"European": True}),
+    ]
+    assert_that(result_nodes, contains_exactly(*expected_nodes))
+    assert await marie_curie.graph_store.graph.aquery_nearest_nodes([]) == []
+
+
+def test_fuzzy_search_with_scores(marie_curie: DataFixture) -> None:
+    if not marie_curie.has_embeddings:
+        pytest.skip("Fuzzy search requires embeddings. Run with openai environment variables")
+    graph = marie_curie.graph_store.graph
+
+    result = graph.query_nearest_nodes_with_scores(["European"], k=2)
+    assert_that(
+        [node for node, _ in result],
+        contains_exactly(
+            Node(name="Polish", type="Nationality"),
+            Node(name="French", type="Nationality"),
+        ),
+    )
+    assert all(0.0 <= score <= 1.0 for _, score in result)
+    assert result[0][1] >= result[1][1]
+
+    assert graph.query_nearest_nodes(["European"], k=2, min_similarity=1.01) == []
+
+    result_nodes = graph.query_nearest_nodes(["Marie"], k=3, node_types=["Profession", "Award"])
+    assert all(node.type in ["Profession", "Award"] for node in result_nodes)
+    assert len(result_nodes) == 3
+
+def test_fuzzy_search_local_index(marie_curie: DataFixture) -> None:
+    if not marie_curie.has_embeddings:
+        pytest.skip("Fuzzy search requires embeddings. Run with openai environment variables")
+    source = marie_curie.graph_store.graph
+    index = LocalVectorIndex(dimension=source._text_embeddings_dim)
+    index.bootstrap(source)
+
+    graph = CassandraKnowledgeGraph(
+        node_table=marie_curie.node_table,
+        edge_table=marie_curie.edge_table,
+        text_embeddings=source._text_embeddings,
+        session=marie_curie.session,
+        keyspace=marie_curie.keyspace,
+        vector_index=index,
+    )
+    assert len(index) == 10
+    assert_that(
+        graph.query_nearest_nodes(["European"], k=2),
+        contains_exactly(*source.query_nearest_nodes(["European"], k=2)),
+    )
+
+async def test_link_nodes(marie_curie: DataFixture) -> None:
+    graph = marie_curie.graph_store.graph
+    marie = Node(name="Marie Curie", type="Person")
+    polish = Node(name="Polish", type="Nationality", properties={"European": True})
+
+    # Exact and normalized names are linked without embeddings.
+    assert_that(graph.link_nodes(["Marie Curie", " polish "]), contains_exactly(marie, polish))
+    assert_that(
+        await graph.alink_nodes([Node("MARIE  CURIE", "Person")]), contains_exactly(marie)
+    )
+
+    if marie_curie.has_embeddings:
+        assert_that(graph.link_nodes(["Marie", "Polish"]), contains_exactly(marie, polish))
+
+def test_rebuild_name_index(db_session: Session, db_keyspace: str) -> None:
+    uid = secrets.token_hex(8)
+    node_table = f"entities_{uid}"
+    edge_table = f"relationships_{uid}"
+    CassandraKnowledgeGraph(
+        node_table=node_table, edge_table=edge_table, session=db_session, keyspace=db_keyspace
+    )
+    # Simulate a graph created before the name table was introduced.
+    db_session.execute(f"DROP TABLE {db_keyspace}.{node_table}_names")
+
+    graph = CassandraKnowledgeGraph(
+        node_table=node_table,
+        edge_table=edge_table,
+        session=db_session,
+        keyspace=db_keyspace,
+        apply_schema=False,
+    )
+    marie = Node("Marie Curie", "Person")
+    graph.insert([marie, Node("Pierre Curie", "Person")])
+    assert graph.link_nodes(["Marie Curie"]) == [marie]
+    assert graph.link_nodes(["marie curie"]) == []
+    with pytest.raises(ValueError):
+        graph.insert_aliases({Node("M. Curie", "Person"): marie})
+
+    # Linkers are bootstrapped from the node table.
+    linker = EntityLinker()
+    linker.bootstrap(graph)
+    assert linker.link("Who was marie curie?") == [marie]
+
+    graph.rebuild_name_index(batch_size=1)
+    assert graph.link_nodes(["marie curie"]) == [marie]
+    graph.insert_aliases({Node("M. Curie", "Person"): marie})
+    assert graph.link_nodes(["m. curie"]) == [marie]
+
+def test_entity_linker(marie_curie: DataFixture) -> None:
+    linker = EntityLinker()
+    linker.bootstrap(marie_curie.graph_store.graph)
+
+    graph = CassandraKnowledgeGraph(
+        node_table=marie_curie.node_table,
+        edge_table=marie_curie.edge_table,
+        session=marie_curie.session,
+        keyspace=marie_curie.keyspace,
+        entity_linker=linker,
+    )
+    assert linker.link("Was marie curie polish?") == [
+        Node("Marie Curie", "Person"),
+        Node("Polish", "Nationality"),
+    ]
+
+    # Aliases are added to the linker as they are inserted.
+    graph.insert_aliases({Node("Madame Curie", "Person"): Node("Marie Curie", "Person")})
+    assert linker.link("Who was Madame Curie?") == [Node("Marie Curie", "Person")]
+
+async def test_retrieval_runnable(marie_curie: DataFixture) -> None:
+    graph = marie_curie.graph_store.graph
+    linker = EntityLinker()
+    linker.bootstrap(graph)
+    retrieval = marie_curie.graph_store.as_retrieval_runnable(
+        link_entities(linker), steps=1, timeout=60
+    )
+
+    expected = set(graph.traverse(Node("Polish", "Nationality"), steps=1))
+    expected.update(graph.traverse(Node("Marie Curie", "Person"), steps=1))
+    question = {"question": "Was Marie Curie Polish?"}
+    assert retrieval.invoke(question) == expected
+    assert await retrieval.ainvoke(question) == expected
+
+    # An expired deadline returns an empty (partial) result rather than failing.
+    expired = marie_curie.graph_store.as_retrieval_runnable(link_entities(linker), timeout=0)
+    assert await expired.ainvoke(question) == set()
+
+async def test_query_paths(marie_curie: DataFixture) -> None:
+    store = marie_curie.graph_store
+    rows = store.query("(Person $name)-[WON]->(a:Award)", {"name": "Pierre Curie"})
+    assert rows == [
+        {"n0": Node("Pierre Curie", "Person"), "e0": "WON", "a": Node("Nobel Prize", "Award")}
+    ]
+
+    pattern = "(Person)-[MARRIED_TO]->(Person)-[WON]->(?)"
+    expected = [
+        {
+            "n0": Node("Marie Curie", "Person"),
+            "e0": "MARRIED_TO",
+            "n1": Node("Pierre Curie", "Person"),
+            "e1": "WON",
+            "n2": Node("Nobel Prize", "Award"),
+        }
+    ]
+    assert store.query(pattern) == expected
+    assert await store.graph.aquery_paths(pattern) == expected
+
+class _SlowLinkingGraph:
+    def link_nodes(self, nodes: List[Node], **kwargs: Any) -> List[Node]:
+        if nodes[0].name == "Slow":
+            time.sleep(1)
+        return nodes
+
+    def traverse(self, start: List[Node], **kwargs: Any) -> Set[Relation]:
+        return {Relation(start[0], Node("Nobel Prize", "Award"), "WON")}
+
+    async def atraverse(self, start: List[Node], **kwargs: Any) -> Set[Relation]:
+        return self.traverse(start)
+
+def test_retrieval_runnable_deadline() -> None:
+    store = CassandraGraphStore.__new__(CassandraGraphStore)
+    store.graph = _SlowLinkingGraph()  # type: ignore[assignment]
+    marie = Node("Marie Curie", "Person")
+    extractor = RunnableLambda(lambda _: [marie, Node("Slow", "Person")])
+    retrieval = store.as_retrieval_runnable(extractor, timeout=0.2)
+
+    # Linking which overruns the deadline is abandoned, rather than waited for.
+    start = time.monotonic()
+    assert retrieval.invoke({"question": "Who was Marie Curie?"}) == {
+        Relation(marie, Node("Nobel Prize", "Award"), "WON")
+    }
+    assert time.monotonic() - start < 0.8
+
+def test_entity_resolution(db_session: Session, db_keyspace: str) -> None:
+    uid = secrets.token_hex(8)
+    store = CassandraGraphStore(
+        node_table=f"entities_{uid}",
+        edge_table=f"relationships_{uid}",
+        session=db_session,
+        keyspace=db_keyspace,
+    )
+    marie = LangChainNode(id="Marie Curie", type="Person")
+    document = GraphDocument(
+        nodes=[marie, LangChainNode(id="marie curie", type="Person")],
+        relationships=[
+            Relationship(
+                source=LangChainNode(id="MARIE CURIE", type="Person"),
+                target=LangChainNode(id="Nobel Prize", type="Award"),
+                type="WON",
+            )
+        ],
+        source=Document(page_content="Marie Curie won the Nobel Prize."),
+    )
+    store.add_graph_documents([document], entity_resolver=EntityResolver())
+
+    graph = store.graph
+    assert_that(
+        graph.traverse(Node("Marie Curie", "Person"), steps=1),
+        contains_exactly(
+            Relation(Node("Marie Curie", "Person"), Node("Nobel Prize", "Award"), "WON")
+        ),
+    )
+
+    graph.insert_aliases({Node("M. Curie", "Person"): Node("Marie Curie", "Person")})
+    assert graph.link_nodes(["m. curie"]) == [Node("Marie Curie", "Person")]
+
+def test_supporting_sources(db_session: Session, db_keyspace: str) -> None:
+    uid = secrets.token_hex(8)
+    store = CassandraGraphStore(
+        node_table=f"entities_{uid}",
+        edge_table=f"relationships_{uid}",
+        session=db_session,
+        keyspace=db_keyspace,
+    )
+    marie = LangChainNode(id="Marie Curie", type="Person")
+    nobel = LangChainNode(id="Nobel Prize", type="Award")
+    won = Relationship(source=marie, target=nobel, type="WON")
+    first = Document(page_content="Marie Curie won the Nobel Prize.", metadata={"page": 1})
+    second = Document(page_content="Marie Curie was a physicist.")
+    store.add_graph_documents(
+        [
+            GraphDocument(nodes=[marie, nobel], relationships=[won], source=first),
+            GraphDocument(nodes=[marie], relationships=[], source=second),
+            # Duplicate content is only stored once.
+            GraphDocument(nodes=[marie], relationships=[], source=second),
+        ],
+        include_source=True,
+    )
+
+    marie_curie = Node("Marie Curie", "Person")
+    relation = Relation(marie_curie, Node("Nobel Prize", "Award"), "WON")
+    sources = store.graph.supporting_sources(
+        [marie_curie, relation, Node("Pierre Curie", "Person")]
+    )
+    assert sources.keys() == {marie_curie, relation}
+    assert_that(sources[marie_curie], contains_exactly(first, second))
+    assert sources[relation] == [first]
+
+def test_supporting_sources_resolved(db_session: Session, db_keyspace: str) -> None:
+    embedded: List[str] = []
+
+    class _CountingEmbeddings(FakeEmbeddings):
+        def embed_documents(self, texts: List[str]) -> List[List[float]]:
+            embedded.extend(texts)
+            return super().embed_documents(texts)
+
+    uid = secrets.token_hex(8)
+    store = CassandraGraphStore(
+        node_table=f"entities_{uid}",
+        edge_table=f"relationships_{uid}",
+        text_embeddings=_CountingEmbeddings(size=3),
+        session=db_session,
+        keyspace=db_keyspace,
+    )
+    marie = LangChainNode(id="Marie Curie", type="Person")
+    alias = LangChainNode(id="marie  curie", type="Person")
+    nobel = LangChainNode(id="Nobel Prize", type="Award")
+    first = Document(page_content="Marie Curie won the Nobel Prize.")
+    second = Document(page_content="marie curie was a physicist.")
+    third = Document(page_content="Marie Curie was Polish.")
+    embedded.clear()
+    store.add_graph_documents(
+        [
+            GraphDocument(
+                nodes=[marie, nobel],
+                relationships=[Relationship(source=marie, target=nobel, type="WON")],
+                source=first,
+            ),
+            GraphDocument(nodes=[alias], relationships=[], source=second),
+            GraphDocument(nodes=[marie], relationships=[], source=third),
+        ],
+        include_source=True,
+        entity_resolver=EntityResolver(),
+    )
+
+    # Shared (and merged) nodes are only embedded and written once.
+    assert len(embedded) == 2
+    marie_curie = Node("Marie Curie", "Person")
+    relation = Relation(marie_curie, Node("Nobel Prize", "Award"), "WON")
+    sources = store.graph.supporting_sources([marie_curie, relation])
+    assert_that(sources[marie_curie], contains_exactly(first, second, third))
+    assert sources[relation] == [first]
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_snapshot_round_trip(marie_curie: DataFixture, tmp_path, format: str) -> None:
+    pytest.importorskip("pyarrow")
+
+    source = marie_curie.graph_store.graph
+    source.export_snapshot(tmp_path, format=format)
+
+    uid = secrets.token_hex(8)
+    target = CassandraKnowledgeGraph(
+        node_table=f"entities_{uid}",
+        edge_table=f"relationships_{uid}",
+        text_embeddings=source._text_embeddings,
+        session=marie_curie.session,
+        keyspace=marie_curie.keyspace,
+        track_degrees=True,
+        entity_linker=EntityLinker(),
+    )
+    target.import_snapshot(tmp_path)
+
+    (expected_nodes, expected_edges) = source.subgraph(start=Node("Marie Curie", "Person"))
+    (result_nodes, result_edges) = target.subgraph(start=Node("Marie Curie", "Person"))
+    assert_that(result_edges, contains_exactly(*expected_edges))
+    assert_that(result_nodes, contains_exactly(*expected_nodes))
+    assert_that(
+        [n.properties for n in result_nodes if n.name == "Polish"],
+        contains_exactly({"European": True}),
+    )
+
+    # Degree statistics and the entity linker are maintained by the import.
+    marie = Node("Marie Curie", "Person")
+    assert target.node_degrees([marie]) == {
+        marie: len([e for e in expected_edges if e.source == marie])
+    }
+    assert target.edge_type_counts()["WON"] == 2
+    assert target._entity_linker is not None
+    assert target._entity_linker.link("Was Marie Curie Polish?") == [
+        marie,
+        Node("Polish", "Nationality"),
+    ]
+
+
+def test_degree_statistics(db_session: Session, db_keyspace: str) -> None:
+    uid = secrets.token_hex(8)
+    graph = CassandraKnowledgeGraph(
+        node_table=f"entities_{uid}",
+        edge_table=f"relationships_{uid}",
+        text_embeddings=None,
+        session=db_session,
+        keyspace=db_keyspace,
+        track_degrees=True,
+    )
+
+    a = Node("a", "leaf")
+    hub = Node("hub", "hub")
+    spokes = [Node(f"spoke{i}", "leaf") for i in range(10)]
+    graph.insert(
+        [a, hub, *spokes, Relation(a, hub, "LINKS")]
+        + [Relation(hub, spoke, "HAS_SPOKE") for spoke in spokes]
+    )
+
+    assert graph.node_degrees([a, hub]) == {a: 1, hub: 10}
+    assert graph.node_degrees([hub], edge_types=["LINKS"]) == {hub: 0}
+    assert graph.edge_type_counts() == {"LINKS": 1, "HAS_SPOKE": 10}
+    assert graph.node_type_counts() == {"leaf": 11, "hub": 1}
+    assert graph.estimate_traversal(a, steps=1) == 1
+
+    assert_that(
+        graph.traverse(a, steps=2, max_degree=5),
+        contains_exactly(Relation(a, hub, "LINKS")),
+    )
+    assert len(graph.traverse(a, steps=2, max_degree=5, hub_policy="sample")) == 6
+    assert len(graph.traverse(a, steps=2)) == 11
+
+    # Re-inserting over-counts until the statistics are recomputed.
+    graph.insert([Relation(a, hub, "LINKS")])
+    assert graph.node_degrees([a]) == {a: 2}
+    graph.recompute_degrees()
+    assert graph.node_degrees([a, hub]) == {a: 1, hub: 10}
+    assert graph.edge_type_counts() == {"LINKS": 1, "HAS_SPOKE": 10}
+
+    # Scans spanning several pages (and several batches of counter writes).
+    graph.recompute_degrees(batch_size=3)
+    assert graph.node_degrees([a, hub]) == {a: 1, hub: 10}
+    assert graph.edge_type_counts() == {"LINKS": 1, "HAS_SPOKE": 10}
+    assert graph.node_type_counts() == {"leaf": 11, "hub": 1}
@@ -0,0 +1,183 @@
+from os import path
+
+import pytest
+from langchain_community.graphs.graph_document import GraphDocument, Node, Relationship
+from langchain_core.documents import Document
+
+from knowledge_graph.knowledge_schema import (
+    KnowledgeSchema,
+    KnowledgeSchemaIndex,
+    KnowledgeSchemaValidator,
+    NodeSchema,
+    RelationshipSchema,
+    merge_schemas,
+)
+
+SOURCE = Document(page_content="Marie Curie worked at the University of Paris.")
+MARIE_CURIE = Node(id="Marie Curie", type="Person")
+UNIVERSITY_OF_PARIS = Node(id="University of Paris", type="Institution")
+
+
+@pytest.fixture(scope="module")
+def schema() -> KnowledgeSchema:
+    return KnowledgeSchema.from_file(path.join(path.dirname(__file__), "marie_curie_schema.yaml"))
+
+
+def _document(*relationships: Relationship) -> GraphDocument:
+    nodes = {(n.id, n.type): n for r in relationships for n in (r.source, r.target)}
+    return GraphDocument(
+        nodes=list(nodes.values()), relationships=list(relationships), source=SOURCE
+    )
+
+
+def test_index(schema: KnowledgeSchema):
+    index = KnowledgeSchemaIndex(schema, node_type_aliases={"University": "Institution"})
+
+    assert index.allows_node("Person")
+    assert not index.allows_node("person")
+    assert index.allows_relationship("WORKED_AT", "Person", "Institution")
+    assert not index.allows_relationship("WORKED_AT", "Institution", "Person")
+
+    assert index.resolve_node_type("person") == "Person"
+    assert index.resolve_node_type("university") == "Institution"
+    assert index.resolve_node_type("Planet") is None
+    assert index.resolve_edge_type("worked at") == "WORKED_AT"
+
+
+def test_validate(schema: KnowledgeSchema):
+    validator = KnowledgeSchemaValidator(schema)
+
+    valid = _document(
+        Relationship(source=MARIE_CURIE, target=UNIVERSITY_OF_PARIS, type="WORKED_AT")
+    )
+    validator.validate_graph_document(valid)
+
+    invalid = _document(
+        Relationship(source=UNIVERSITY_OF_PARIS, target=MARIE_CURIE, type="WORKED_AT"),
+        Relationship(source=MARIE_CURIE, target=Node(id="Mars", type="Planet"), type="VISITED"),
+    )
+    with pytest.raises(ValueError) as e:
+        validator.validate_graph_document(invalid)
+    assert e.value.__notes__ == validator.errors(invalid)
+    assert "No node type 'Planet'" in e.value.__notes__
+    assert "No edge type 'VISITED'" in e.value.__notes__
+
+    validator.validate_graph_documents([valid, valid])
+    with pytest.raises(ValueError):
+        validator.validate_graph_documents([valid, invalid])
+
+
+def test_filter_and_repair(schema: KnowledgeSchema):
+    validator = KnowledgeSchemaValidator(schema)
+    person = Node(id="Marie Curie", type="person")
+    document = _document(
+        Relationship(source=person, target=UNIVERSITY_OF_PARIS, type="worked at"),
+        Relationship(source=UNIVERSITY_OF_PARIS, target=MARIE_CURIE, type="STUDIED_AT"),
+        Relationship(source=MARIE_CURIE, target=Node(id="Mars", type="Planet"), type="VISITED"),
+    )
+
+    filtered = validator.filter_graph_document(document, repair=False)
+    assert filtered.nodes == [UNIVERSITY_OF_PARIS, MARIE_CURIE]
+    assert filtered.relationships == []
+
+    repaired = validator.filter_graph_document(document)
+    validator.validate_graph_document(repaired)
+    assert repaired.source == SOURCE
+    assert repaired.nodes == [MARIE_CURIE, UNIVERSITY_OF_PARIS]
+    assert repaired.relationships == [
+        Relationship(source=MARIE_CURIE, target=UNIVERSITY_OF_PARIS, type="WORKED_AT"),
+        Relationship(source=MARIE_CURIE, target=UNIVERSITY_OF_PARIS, type="STUDIED_AT"),
+    ]
+
+
+def test_merge_schemas():
+    first = KnowledgeSchema(
+        nodes=[NodeSchema(type="Person", description="")],
+        relationships=[
+            RelationshipSchema(
+                edge_type="works_at",
+                source_types=["person"],
+                target_types=["Institution"],
+                description="Employment.",
+            )
+        ],
+    )
+    second = KnowledgeSchema(
+        nodes=[
+            NodeSchema(type="person", description="A human."),
+            NodeSchema(type="institution", description="An organization."),
+        ],
+        relationships=[
+            RelationshipSchema(
+                edge_type="WORKS AT",
+                source_types=["Person", "Organization"],
+                target_types=["institution"],
+                description="Works at.",
+            )
+        ],
+    )
+
+    merged = merge_schemas([first, second])
+    assert merged.nodes == [
+        NodeSchema(type="Person", description="A human."),
+        NodeSchema(type="institution", description="An organization."),
+    ]
+    assert merged.relationships == [
+        RelationshipSchema(
+            edge_type="works_at",
+            source_types=["Person", "Organization"],
+            target_types=["institution"],
+            description="Employment.",
+        )
+    ]
+
+    # The inputs are unchanged.
+    assert first.nodes[0].description == ""
+    assert first.relationships[0].source_types == ["person"]
+
+
+def test_merge_schemas_keeps_signatures():
+    first = KnowledgeSchema(
+        nodes=[],
+        relationships=[
+            RelationshipSchema(
+                edge_type="WORKS_AT",
+                source_types=["Person"],
+                target_types=["Org"],
+                description="",
+            )
+        ],
+    )
+    second = KnowledgeSchema(
+        nodes=[],
+        relationships=[
+            RelationshipSchema(
+                edge_type="works at",
+                source_types=["Robot"],
+                target_types=["Lab"],
+                description="Deployed at.",
+            ),
+            RelationshipSchema(
+                edge_type="WORKS_AT",
+                source_types=["person"],
+                target_types=["University"],
+                description="Employment.",
+            ),
+        ],
+    )
+
+    # Neither input allows `Person -> Lab` or `Robot -> Org`.
+    assert merge_schemas([first, second]).relationships == [
+        RelationshipSchema(
+            edge_type="WORKS_AT",
+            source_types=["Person"],
+            target_types=["Org", "University"],
+            description="Employment.",
+        ),
+        RelationshipSchema(
+            edge_type="WORKS_AT",
+            source_types=["Robot"],
+            target_types=["Lab"],
+            description="Deployed at.",
+        ),
+    ]
@@ -0,0 +1,48 @@
+import time
+
+from precisely import assert_that, contains_exactly
+
+from knowledge_graph.node_cache import NodePropertyCache
+from knowledge_graph.traverse import Node
+
+
+def test_node_cache_hits_and_misses() -> None:
+    cache = NodePropertyCache()
+    marie_curie = Node("Marie Curie", "Person", {"born": 1867})
+
+    assert cache.get(Node("Marie Curie", "Person")) is None
+    cache.put(marie_curie, '{"born":1867}')
+
+    cached = cache.get(Node("Marie Curie", "Person"))
+    assert cached == marie_curie
+    assert cached.properties == {"born": 1867}
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+    assert stats.hit_rate == 0.5
+    assert stats.memory_bytes == len("Marie Curie") + len("Person") + len('{"born":1867}')
+
+    cache.invalidate(marie_curie)
+    assert cache.get(marie_curie) is None
+    assert cache.stats().memory_bytes == 0
+
+
+def test_node_cache_evicts_least_recently_used() -> None:
+    cache = NodePropertyCache(max_entries=2)
+    a, b, c = Node("a", "T"), Node("b", "T"), Node("c", "T")
+    cache.put(a)
+    cache.put(b)
+    cache.get(a)
+    cache.put(c)
+
+    assert cache.get(b) is None
+    assert_that([cache.get(a), cache.get(c)], contains_exactly(a, c))
+    assert len(cache) == 2
+
+
+def test_node_cache_expires_entries() -> None:
+    cache = NodePropertyCache(ttl=0.01)
+    cache.put(Node("a", "T"))
+    time.sleep(0.02)
+    assert cache.get(Node("a", "T")) is None
+    assert len(cache) == 0
@@ -0,0 +1,159 @@
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from knowledge_graph.path_query import (
+    EdgePattern,
+    NodePattern,
+    PathQueryPlan,
+    PathQueryStatements,
+    execute_path_plan,
+    parse_path_pattern,
+    path_rows,
+    plan_path_query,
+)
+from knowledge_graph.traverse import Node
+
+EDGES = [
+    ("Marie Curie", "Person", "University of Paris", "Organization", "WORKED_AT"),
+    ("Marie Curie", "Person", "Nobel Prize", "Award", "WON"),
+    ("Pierre Curie", "Person", "University of Paris", "Organization", "WORKED_AT"),
+    ("Pierre Curie", "Person", "Nobel Prize", "Award", "WON"),
+    ("University of Paris", "Organization", "Paris", "City", "LOCATED_IN"),
+    ("Paris", "City", "France", "Country", "LOCATED_IN"),
+]
+NODES = {(e[0], e[1]) for e in EDGES} | {(e[2], e[3]) for e in EDGES}
+
+STATEMENTS = PathQueryStatements(
+    nodes_by_name="nodes_by_name",
+    nodes_by_type="nodes_by_type",
+    edges="edges",
+    edges_by_type="edges_by_type",
+    edges_from="edges_from",
+    edges_from_by_type="edges_from_by_type",
+)
+
+
+def _edge_row(edge: Tuple[str, ...]) -> SimpleNamespace:
+    return SimpleNamespace(
+        source_name=edge[0],
+        source_type=edge[1],
+        target_name=edge[2],
+        target_type=edge[3],
+        edge_type=edge[4],
+    )
+
+
+def _rows(statement: str, args: Tuple[Any, ...]) -> List[SimpleNamespace]:
+    if statement == "nodes_by_name":
+        return [SimpleNamespace(name=n, type=t) for n, t in NODES if n == args[0]]
+    if statement == "nodes_by_type":
+        return [SimpleNamespace(name=n, type=t) for n, t in NODES if t == args[0]]
+    if statement == "edges":
+        return [_edge_row(e) for e in EDGES]
+    if statement == "edges_by_type":
+        return [_edge_row(e) for e in EDGES if e[4] == args[0]]
+    return [
+        _edge_row(e)
+        for e in EDGES
+        if e[:2] == args[:2] and (statement == "edges_from" or e[4] == args[2])
+    ]
+
+
+def _execute(plan: PathQueryPlan, batches: List[str]) -> List[Dict[str, Any]]:
+    execution = execute_path_plan(plan, STATEMENTS)
+    try:
+        statement, args = next(execution)
+        while True:
+            batches.append(statement)
+            statement, args = execution.send([_rows(statement, a) for a in args])
+    except StopIteration as done:
+        return path_rows(plan.pattern, done.value)
+
+
+def test_parse_path_pattern() -> None:
+    pattern = parse_path_pattern(
+        ' (p:Person "Marie Curie") -[WORKED_AT|STUDIED_AT]-> (Organization)-[?]->(?) '
+    )
+    assert pattern.nodes == (
+        NodePattern(("Person",), "Marie Curie", alias="p"),
+        NodePattern(("Organization",)),
+        NodePattern(),
+    )
+    assert pattern.edges == (EdgePattern(("WORKED_AT", "STUDIED_AT")), EdgePattern())
+    assert pattern.keys() == ["p", "e0", "n1", "e1", "n2"]
+
+    bound = parse_path_pattern("(Person $name)-[WON]->(?)").bind({"name": "Marie Curie"})
+    assert bound.nodes[0].name == "Marie Curie"
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    ["", "(Person)", "(Person)-[WON]", "(Person)->(Award)", "(a:Person)-[a:WON]->(?)"],
+)
+def test_parse_path_pattern_errors(pattern: str) -> None:
+    with pytest.raises(ValueError):
+        parse_path_pattern(pattern)
+
+
+def test_plan_path_query() -> None:
+    pattern = parse_path_pattern("(Person)-[WON]->(Award)")
+    # Without statistics, the edge type index is used.
+    assert plan_path_query(pattern).start == "edges"
+    # With statistics, the side reading fewer partitions or rows is used.
+    assert plan_path_query(pattern, {"Person": 2}, {"WON": 10}) == PathQueryPlan(
+        pattern, "nodes", 2
+    )
+    assert plan_path_query(pattern, {"Person": 20}, {"WON": 10}) == PathQueryPlan(
+        pattern, "edges", 10
+    )
+
+    named = parse_path_pattern('(Person "Marie Curie")-[WON]->(Award)')
+    assert plan_path_query(named, {"Person": 20}, {"WON": 1}).start == "nodes"
+    assert plan_path_query(parse_path_pattern("(?)-[?]->(?)")).start == "edges"
+
+    with pytest.raises(ValueError):
+        plan_path_query(parse_path_pattern("(Person $name)-[WON]->(?)"))
+
+
+def test_execute_path_plan() -> None:
+    pattern = parse_path_pattern("(Person)-[WORKED_AT]->(o:Organization)-[LOCATED_IN]->(?)")
+    expected = [
+        {
+            "n0": Node("Marie Curie", "Person"),
+            "e0": "WORKED_AT",
+            "o": Node("University of Paris", "Organization"),
+            "e1": "LOCATED_IN",
+            "n2": Node("Paris", "City"),
+        },
+        {
+            "n0": Node("Pierre Curie", "Person"),
+            "e0": "WORKED_AT",
+            "o": Node("University of Paris", "Organization"),
+            "e1": "LOCATED_IN",
+            "n2": Node("Paris", "City"),
+        },
+    ]
+
+    batches: List[str] = []
+    assert _execute(PathQueryPlan(pattern, "nodes", None), batches) == expected
+    assert batches == ["nodes_by_type", "edges_from_by_type", "edges_from_by_type"]
+
+    batches = []
+    assert _execute(PathQueryPlan(pattern, "edges", None), batches) == expected
+    assert batches == ["edges_by_type", "edges_from_by_type"]
+
+
+def test_execute_path_plan_filters_each_hop() -> None:
+    pattern = parse_path_pattern('(Person "Marie Curie")-[?]->(City|Organization)-[?]->(?)')
+    batches: List[str] = []
+    rows = _execute(plan_path_query(pattern), batches)
+    # The named start isn't looked up, and the award isn't extended.
+    assert batches == ["edges_from", "edges_from"]
+    assert [row["n2"] for row in rows] == [Node("Paris", "City")]
+
+    pattern = parse_path_pattern("(?)-[LOCATED_IN]->(City)-[WON]->(?)")
+    batches = []
+    assert _execute(plan_path_query(pattern), batches) == []
+    assert batches == ["edges_by_type", "edges_from_by_type"]
@@ -0,0 +1,39 @@
+import time
+
+from knowledge_graph.rate_limit import RateLimiter, estimate_tokens
+
+
+def test_burst_within_quota():
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=6000)
+    start = time.monotonic()
+    for _ in range(10):
+        limiter.acquire(100)
+    assert time.monotonic() - start < 0.05
+
+
+def test_waits_for_tokens():
+    # 100 tokens per second.
+    limiter = RateLimiter(tokens_per_minute=6000)
+    limiter.acquire(6000)
+
+    start = time.monotonic()
+    limiter.acquire(10)
+    assert 0.05 < time.monotonic() - start < 0.5
+
+
+async def test_awaits_for_requests():
+    # 10 requests per second.
+    limiter = RateLimiter(requests_per_minute=600)
+    for _ in range(600):
+        await limiter.aacquire()
+
+    start = time.monotonic()
+    await limiter.aacquire()
+    await limiter.aacquire()
+    assert 0.1 < time.monotonic() - start < 0.5
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
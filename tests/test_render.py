@@ -0,0 +1,63 @@
+from langchain_community.graphs.graph_document import GraphDocument, Relationship
+from langchain_community.graphs.graph_document import Node as LangChainNode
+from langchain_core.documents import Document
+
+from knowledge_graph.render import iter_dot, render_graph_documents, write_dot
+from knowledge_graph.traverse import Node, Relation
+
+MARIE_CURIE = LangChainNode(id="Marie Curie", type="Person")
+PIERRE_CURIE = LangChainNode(id="Pierre Curie", type="Person")
+NOBEL_PRIZE = LangChainNode(id='The "Nobel Prize"', type="Award")
+
+DOCUMENT = GraphDocument(
+    nodes=[MARIE_CURIE, PIERRE_CURIE, NOBEL_PRIZE],
+    relationships=[
+        Relationship(source=MARIE_CURIE, target=NOBEL_PRIZE, type="WON"),
+        Relationship(source=PIERRE_CURIE, target=NOBEL_PRIZE, type="WON"),
+    ],
+    source=Document(page_content="Marie and Pierre Curie won the Nobel Prize."),
+)
+
+# A chain `n0 -> n1 -> ... -> n5`, with a hub pointing at each node in the chain.
+CHAIN = [Relation(Node(f"n{i}", "T"), Node(f"n{i + 1}", "T"), "NEXT") for i in range(5)]
+HUB = [Relation(Node("hub", "H"), Node(f"n{i}", "T"), "HAS") for i in range(6)]
+
+
+def test_render_single_document() -> None:
+    assert render_graph_documents(DOCUMENT).body == [
+        '\t0 [label="Marie Curie [Person]"]\n',
+        '\t1 [label="Pierre Curie [Person]"]\n',
+        '\t2 [label="The \\"Nobel Prize\\" [Award]"]\n',
+        '\t0 -> 2 [label="WON"]\n',
+        '\t1 -> 2 [label="WON"]\n',
+    ]
+
+
+def test_collapse_types() -> None:
+    assert list(iter_dot([DOCUMENT], collapse_types=True)) == [
+        "digraph {",
+        '\t"Award" [label="Award (1)"]',
+        '\t"Person" [label="Person (2)"]',
+        '\t"Person" -> "Award" [label="WON (2)"]',
+        "}",
+    ]
+
+
+def test_focus_and_max_degree() -> None:
+    lines = list(iter_dot(CHAIN, focus=[Node("n0", "T"), Node("n5", "T")], hops=1))
+    assert [line for line in lines if "->" in line] == [
+        '\t0 -> 1 [label="NEXT"]',
+        '\t2 -> 3 [label="NEXT"]',
+    ]
+
+    # The hub's edges beyond the first two are dropped, as is `n1 -> n2` since `n1`
+    # already has an edge from the hub and one to `n0`.
+    lines = list(iter_dot(HUB + CHAIN, max_degree=2))
+    assert sum(1 for line in lines if "HAS" in line) == 2
+    assert sum(1 for line in lines if "NEXT" in line) == 4
+
+
+def test_write_dot(tmp_path) -> None:
+    path = tmp_path / "graph.dot"
+    write_dot(CHAIN, path)
+    assert path.read_text() == "\n".join(iter_dot(CHAIN)) + "\n"
@@ -1,5 +1,7 @@
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
 from precisely import assert_that, contains_exactly
 
+from knowledge_graph.entity_cache import EntityCache
 from knowledge_graph.runnables import extract_entities
 from knowledge_graph.traverse import Node
 
@@ -10,3 +12,30 @@ def test_extract_entities(llm):
         extractor.invoke({"question": "Who is Marie Curie?"}),
         contains_exactly(Node("Marie Curie", "Person")),
     )
+
+
+def test_extract_entities_batch_dedupes_and_caches():
+    response = '{"nodes": [{"id": "Marie Curie", "type": "Person"}]}'
+    llm = FakeListChatModel(responses=[response] * 3)
+    cache = EntityCache()
+    extractor = extract_entities(llm, cache=cache)
+
+    questions = ["Who is Marie Curie?", "who is  marie curie?", "Who was Marie Curie?"]
+    results = extractor.batch([{"question": question} for question in questions])
+    assert results == [[Node("Marie Curie", "Person")]] * 3
+    assert llm.i == 2
+
+    assert extractor.invoke({"question": "WHO IS MARIE CURIE?"}) == [
+        Node("Marie Curie", "Person")
+    ]
+    assert llm.i == 2
+
+
+async def test_extract_entities_accepts_kwargs():
+    response = '{"nodes": [{"id": "Marie Curie", "type": "Person"}]}'
+    extractor = extract_entities(FakeListChatModel(responses=[response] * 2))
+
+    # Extra kwargs (such as bound ones) are accepted and passed through the chain.
+    expected = [Node("Marie Curie", "Person")]
+    assert extractor.bind(stop=None).invoke({"question": "Who is Marie Curie?"}) == expected
+    assert await extractor.ainvoke({"question": "Who was Marie Curie?"}, stop=None) == expected
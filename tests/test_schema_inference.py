@@ -1,8 +1,11 @@
+from typing import List
+
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_core.language_models import BaseChatModel
 from precisely import assert_that, contains_exactly
 
-from knowledge_graph.schema_inference import KnowledgeSchemaInferer
+from knowledge_graph.schema_inference import KnowledgeSchemaInferer, sample_documents
 
 MARIE_CURIE_SOURCE = """
 Marie Curie, was a Polish and naturalised-French physicist and chemist who
@@ -32,3 +35,29 @@ def test_schema_inference(llm: BaseChatModel):
     )
 
     # We don't do more testing here since this is meant to attempt to infer things.
+
+
+class _TopicEmbeddings(Embeddings):
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        topic, idx = text.split()
+        return [1.0, 0.01 * int(idx)] if topic == "physics" else [0.01 * int(idx), 1.0]
+
+
+def test_sample_documents():
+    documents = [Document(page_content=f"physics {i}") for i in range(20)]
+    documents.append(Document(page_content="poetry 0"))
+
+    sample = sample_documents(documents, 2, _TopicEmbeddings())
+    assert_that(
+        [doc.page_content.split()[0] for doc in sample],
+        contains_exactly("physics", "poetry"),
+    )
+
+    sample = sample_documents(documents, 5)
+    assert len(sample) == 5
+    assert sample == sample_documents(documents, 5)
+
+    assert sample_documents(documents[:3], 5) == documents[:3]
@@ -0,0 +1,55 @@
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from knowledge_graph.serialization import SubgraphSerializer
+from knowledge_graph.traverse import Node, Relation
+
+MARIE_CURIE = Node("Marie Curie", "Person")
+PIERRE_CURIE = Node("Pierre Curie", "Person")
+NOBEL_PRIZE = Node("Nobel Prize", "Award")
+POLISH = Node("Polish", "Nationality")
+PHYSICS = Node("Physics", "Field")
+
+RELATIONS = {
+    Relation(NOBEL_PRIZE, PHYSICS, "AWARDED_IN"),
+    Relation(MARIE_CURIE, POLISH, "HAS_NATIONALITY"),
+    Relation(MARIE_CURIE, NOBEL_PRIZE, "WON"),
+    Relation(MARIE_CURIE, PIERRE_CURIE, "MARRIED_TO"),
+}
+
+
+class _KeywordEmbeddings(Embeddings):
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return [float("married" in text.lower()), 1.0]
+
+
+def test_serialize_ranks_by_hops_and_edge_type() -> None:
+    serializer = SubgraphSerializer(edge_type_priority=["WON"])
+    assert serializer.serialize(RELATIONS).splitlines() == [
+        "Marie Curie (Person) -WON-> Nobel Prize (Award)",
+        "Marie Curie -HAS_NATIONALITY-> Polish (Nationality)",
+        "Marie Curie -MARRIED_TO-> Pierre Curie (Person)",
+        "Nobel Prize -AWARDED_IN-> Physics (Field)",
+    ]
+
+    # Starting from the prize, the relations from Marie Curie are unreachable.
+    assert serializer.rank(RELATIONS, start=[NOBEL_PRIZE])[0] == Relation(
+        NOBEL_PRIZE, PHYSICS, "AWARDED_IN"
+    )
+
+
+def test_serialize_within_budget() -> None:
+    serializer = SubgraphSerializer(token_budget=30, text_embeddings=_KeywordEmbeddings())
+    lines = list(serializer.iter_lines(RELATIONS, question="Who was she married to?"))
+    assert lines == [
+        "Marie Curie (Person) -MARRIED_TO-> Pierre Curie (Person)",
+        "Marie Curie -HAS_NATIONALITY-> Polish (Nationality)",
+    ]
+
+    runnable = serializer.as_runnable()
+    assert runnable.invoke({"relations": RELATIONS, "question": "Married?"}) == "\n".join(lines)
+    assert SubgraphSerializer(token_budget=0).as_runnable().invoke(RELATIONS) == ""
@@ -1,3 +1,6 @@
+from types import SimpleNamespace
+from typing import Any, List, Tuple
+
 from precisely import assert_that, contains_exactly
 
 from knowledge_graph.traverse import Node, Relation, atraverse, traverse
@@ -145,3 +148,95 @@ async def test_atraverse_marie_curie_filtered_edges(marie_curie: DataFixture) ->
         Relation(Node("Marie Curie", "Person"), Node("French", "Nationality"), "HAS_NATIONALITY"),
     }
     assert_that(results, contains_exactly(*expected))
+
+
+def test_traverse_timeout(marie_curie: DataFixture) -> None:
+    kwargs = dict(
+        start=Node("Marie Curie", "Person"),
+        steps=3,
+        edge_table=marie_curie.edge_table,
+        session=marie_curie.session,
+        keyspace=marie_curie.keyspace,
+    )
+    complete = set(traverse(**kwargs))
+    assert set(traverse(**kwargs, timeout=60)) == complete
+    # A timeout which is reached immediately returns a partial sub-graph.
+    assert set(traverse(**kwargs, timeout=0)) <= complete
+
+
+async def test_atraverse_timeout(marie_curie: DataFixture) -> None:
+    kwargs = dict(
+        start=Node("Marie Curie", "Person"),
+        steps=3,
+        edge_table=marie_curie.edge_table,
+        session=marie_curie.session,
+        keyspace=marie_curie.keyspace,
+    )
+    complete = set(await atraverse(**kwargs))
+    assert set(await atraverse(**kwargs, timeout=60)) == complete
+    assert set(await atraverse(**kwargs, timeout=0)) == set()
+
+
+class _FakeResponse:
+    """A response whose single page is delivered as soon as callbacks are added."""
+
+    has_more_pages = False
+
+    def __init__(self, rows: List[Any]) -> None:
+        self._rows = rows
+
+    def add_callbacks(self, callback, errback, callback_kwargs={}) -> None:
+        callback(self._rows, **callback_kwargs)
+
+
+class _FakeSession:
+    """Serves edges and degrees from memory, recording the edge queries sent."""
+
+    def __init__(self, edges: List[Relation]) -> None:
+        self.edges = edges
+        self.edge_queries: List[Node] = []
+
+    def prepare(self, query: str) -> str:
+        return query
+
+    def execute_async(self, query: str, args: Tuple[Any, ...]) -> _FakeResponse:
+        source = Node(args[0], args[1])
+        edges = [e for e in self.edges if e.source == source]
+        if "count" in query:
+            return _FakeResponse([SimpleNamespace(count=len(edges))])
+        self.edge_queries.append(source)
+        return _FakeResponse(
+            [
+                SimpleNamespace(
+                    source_name=e.source.name,
+                    source_type=e.source.type,
+                    target_name=e.target.name,
+                    target_type=e.target.type,
+                    type=e.type,
+                )
+                for e in edges
+            ]
+        )
+
+
+def test_traverse_orders_frontier_by_degree() -> None:
+    start = Node("start", "T")
+    hub = Node("hub", "T")
+    leaf = Node("leaf", "T")
+    edges = [Relation(start, hub, "LINKS"), Relation(start, leaf, "LINKS")]
+    edges += [Relation(hub, Node(f"spoke{i}", "T"), "LINKS") for i in range(3)]
+    edges += [Relation(leaf, Node("end", "T"), "LINKS")]
+    session = _FakeSession(edges)
+
+    results = traverse(
+        start=start,
+        steps=2,
+        edge_table="edges",
+        session=session,  # type: ignore[arg-type]
+        keyspace="ks",
+        degree_table="degrees",
+        max_degree=5,
+    )
+    assert_that(results, contains_exactly(*edges))
+    # As in `atraverse`, the lower degree node is visited first.
+    assert session.edge_queries == [start, leaf, hub]
@@ -0,0 +1,59 @@
+import pytest
+from precisely import assert_that, contains_exactly
+
+from knowledge_graph.traverse import Node
+from knowledge_graph.vector_index import LocalVectorIndex
+
+MARIE_CURIE = Node("Marie Curie", "Person", {"born": 1867})
+PIERRE_CURIE = Node("Pierre Curie", "Person")
+NOBEL_PRIZE = Node("Nobel Prize", "Award")
+
+
+@pytest.fixture(params=["brute_force", "hnsw"])
+def index(request) -> LocalVectorIndex:
+    if request.param == "hnsw":
+        pytest.importorskip("hnswlib")
+    index = LocalVectorIndex(dimension=3, backend=request.param)
+    index.add(
+        [MARIE_CURIE, PIERRE_CURIE, NOBEL_PRIZE],
+        [[1.0, 0.0, 0.0], [0.9, 0.1, 0.0], [0.0, 0.0, 1.0]],
+    )
+    return index
+
+
+def test_search(index: LocalVectorIndex) -> None:
+    [nearest] = index.search([[1.0, 0.0, 0.0]], k=2)
+    assert_that([node for node, _ in nearest], contains_exactly(MARIE_CURIE, PIERRE_CURIE))
+    assert nearest[0][0] == MARIE_CURIE
+    assert nearest[0][0].properties == {"born": 1867}
+    assert nearest[0][1] == pytest.approx(1.0)
+    assert nearest[0][1] > nearest[1][1]
+
+
+def test_search_node_types(index: LocalVectorIndex) -> None:
+    [nearest] = index.search([[1.0, 0.0, 0.0]], k=2, node_types=["Award"])
+    assert [node for node, _ in nearest] == [NOBEL_PRIZE]
+    assert nearest[0][1] == pytest.approx(0.5)
+
+    assert index.search([[1.0, 0.0, 0.0]], k=2, node_types=["Unknown"]) == [[]]
+
+
+def test_add_replaces(index: LocalVectorIndex) -> None:
+    index.add([NOBEL_PRIZE], [[0.0, 1.0, 0.0]])
+    assert len(index) == 3
+    [nearest] = index.search([[0.0, 1.0, 0.0]], k=1)
+    assert nearest[0][0] == NOBEL_PRIZE
+    assert nearest[0][1] == pytest.approx(1.0)
+
+
+def test_save_and_load(index: LocalVectorIndex, tmp_path) -> None:
+    index.save(tmp_path)
+    loaded = LocalVectorIndex.load(tmp_path, backend="brute_force")
+    assert len(loaded) == 3
+    assert loaded.search([[1.0, 0.0, 0.0]], k=1) == index.search([[1.0, 0.0, 0.0]], k=1)
+
+    # Modifying the memory-mapped index copies it into memory.
+    loaded.add([Node("Radioactivity", "Concept")], [[0.0, 1.0, 0.0]])
+    [nearest] = loaded.search([[0.0, 1.0, 0.0]], k=1)
+    assert nearest[0][0] == Node("Radioactivity", "Concept")
+    assert len(LocalVectorIndex.load(tmp_path)) == 3